@@ -0,0 +1,190 @@
+"""Инкрементальное хранилище агрегатов для data_preparation.py.
+
+Хранит куб TradeCube по годам: для каждого года - суммы по (поток, партнёр,
+группа ТН ВЭД), плюс суммы за все годы и итоги по годам. Каждый раздел
+дашборда объявляет в data_preparation.SECTIONS, от каких данных зависит, и
+пересчитывается только если они изменились:
+
+- "yearly" (динамика торговли) - из итогов по годам;
+- "all" (ТОП товаров, отрасли, регионы) - из сумм за все годы, которые при
+  добавлении года обновляются прибавлением его сумм;
+- N последних лет (партнёры, Россия, снижение, прирост) - из сумм только
+  этих лет; раздел не трогается, если окно и годы в нём не изменились.
+
+Так добавление года N+1 стоит пропорционально его данным и окнам, а не всей
+истории. Повторная загрузка уже известного года заменяет его суммы.
+
+Раскладка на диске:
+
+    <root>/manifest.json        - годы, справочники, кэш разделов с их зависимостями
+    <root>/years/<year>.npz     - суммы года
+    <root>/cumulative.npz       - суммы за все годы
+
+Файлы пишутся через временные и os.replace, manifest.json - последним.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_preparation import SECTIONS, attach_names
+
+MANIFEST = "manifest.json"
+KEY_COLUMNS = ["flow", "partner", "hs2"]
+
+
+def _save_frame(df, path):
+    tmp = f"{path}.tmp.npz"
+    np.savez(tmp, **{column: df[column].to_numpy(dtype=str) for column in KEY_COLUMNS},
+             value=df["value"].to_numpy(dtype=np.float64))
+    os.replace(tmp, path)
+
+
+def _load_frame(path):
+    with np.load(path) as arrays:
+        df = pd.DataFrame({column: arrays[column].astype(object) for column in KEY_COLUMNS})
+        df["value"] = arrays["value"]
+    return df
+
+
+def _sum_by_key(frames):
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=[*KEY_COLUMNS, "value"])
+    return pd.concat(frames).groupby(KEY_COLUMNS, as_index=False, sort=False)["value"].sum()
+
+
+def _dependency_years(dependency, years):
+    if dependency in ("yearly", "all"):
+        return years
+    last_year = years[-1]
+    return [year for year in years if year > last_year - dependency]
+
+
+class AggregateStore:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(os.path.join(root, "years"), exist_ok=True)
+        path = os.path.join(root, MANIFEST)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"years": {}, "reference": None, "names": {"commodities": {}, "partners": {}},
+                             "sections": {}}
+
+    @property
+    def years(self):
+        return sorted(int(year) for year in self.manifest["years"])
+
+    def _year_path(self, year):
+        return os.path.join(self.root, "years", f"{year}.npz")
+
+    def _year_frame(self, year):
+        return _load_frame(self._year_path(year))
+
+    def _cumulative_path(self):
+        return os.path.join(self.root, "cumulative.npz")
+
+    def frame(self):
+        """Все годы одной таблицей, как TradeCube.frame()."""
+        return pd.concat([self._year_frame(year).assign(year=year) for year in self.years], ignore_index=True)
+
+    def update(self, cube, commodity_names=None, partner_names=None):
+        """Записывает суммы лет из куба TradeCube.frame(), возвращает список изменённых лет."""
+        changed = []
+        replaced = False
+        added = []
+        for year, part in cube.groupby("year"):
+            year = int(year)
+            part = part[[*KEY_COLUMNS, "value"]].reset_index(drop=True)
+            digest = hashlib.sha256(pd.util.hash_pandas_object(part, index=False).values.tobytes()).hexdigest()[:12]
+            known = self.manifest["years"].get(str(year))
+            if known is not None and known["digest"] == digest:
+                continue
+            replaced = replaced or known is not None
+            _save_frame(part, self._year_path(year))
+            self.manifest["years"][str(year)] = {
+                "digest": digest,
+                "M": float(part.loc[part["flow"] == "M", "value"].sum()),
+                "X": float(part.loc[part["flow"] == "X", "value"].sum()),
+            }
+            changed.append(year)
+            added.append(part)
+
+        if changed:
+            if replaced or not os.path.exists(self._cumulative_path()):
+                # Исправление уже загруженного года: суммы за все годы собираются заново
+                cumulative = _sum_by_key(self._year_frame(year) for year in self.years)
+            else:
+                cumulative = _sum_by_key([_load_frame(self._cumulative_path()), *added])
+            _save_frame(cumulative, self._cumulative_path())
+
+        self.manifest["names"]["commodities"].update(commodity_names or {})
+        self.manifest["names"]["partners"].update(partner_names or {})
+        self.manifest["changed"] = sorted(set(self.manifest.get("changed", [])) | set(changed))
+        self._write_manifest()
+        return changed
+
+    def sections(self, commodities=None, partners=None):
+        """Разделы dashboard_data.json; пересчитываются только устаревшие."""
+        years = self.years
+        if not years:
+            raise ValueError("В хранилище агрегатов нет данных")
+        names = self.manifest["names"]
+        reference = self._reference_digest(commodities, partners, names)
+        if reference != self.manifest["reference"]:
+            self.manifest["sections"] = {}
+            self.manifest["reference"] = reference
+        changed = set(self.manifest.get("changed", []))
+        last_year = years[-1]
+
+        cache = self.manifest["sections"]
+        frames = {}
+        window_frames = {}
+        for name, (dependency, build) in SECTIONS.items():
+            needed = _dependency_years(dependency, years)
+            cached = cache.get(name)
+            if cached is not None and cached["years"] == needed and not changed & set(needed):
+                continue
+
+            if dependency == "yearly":
+                df = pd.DataFrame([
+                    {"year": year, "flow": flow, "value": self.manifest["years"][str(year)][flow]}
+                    for year in years for flow in ("M", "X")
+                ])
+            elif dependency == "all":
+                if "all" not in frames:
+                    frames["all"] = attach_names(_load_frame(self._cumulative_path()), commodities, partners,
+                                                 names["commodities"], names["partners"])
+                df = frames["all"]
+            else:
+                missing = [year for year in needed if year not in window_frames]
+                for year in missing:
+                    window_frames[year] = self._year_frame(year).assign(year=year)
+                df = attach_names(pd.concat([window_frames[year] for year in needed], ignore_index=True),
+                                  commodities, partners, names["commodities"], names["partners"])
+            cache[name] = {"years": needed, "data": build(df, last_year)}
+
+        self.manifest["changed"] = []
+        self._write_manifest()
+        return {name: cache[name]["data"] for name in SECTIONS}
+
+    @staticmethod
+    def _reference_digest(commodities, partners, names):
+        # Справочники и названия из записей: при их смене устаревают все разделы
+        digest = hashlib.sha256(json.dumps(names, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        for table in (commodities, partners):
+            if table is not None:
+                digest.update(pd.util.hash_pandas_object(table).values.tobytes())
+            digest.update(b"|")
+        return digest.hexdigest()[:12]
+
+    def _write_manifest(self):
+        path = os.path.join(self.root, MANIFEST)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp, path)
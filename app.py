@@ -1,751 +1,973 @@
 import dash
-from dash import dcc, html, Input, Output, callback
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
-import pandas as pd
-import json
+import flask
+from dash import dcc, html, ClientsideFunction, Input, Output, State
 import os
+import time
+from plotly.io.json import to_json_plotly
+
+import exports
+import metrics
+import profiling
+from clientside import STORE_ID, client_data
+from data_manager import DataManager, DataSnapshot
+from datamodel import TradeData, table
+from downsampling import WEBGL_POINTS, SeriesPyramid
+from figures import FIGURE_BUILDERS, ZOOM_SERIES, FigureRegistry, build_bilateral_trade, refill_ranking, slice_figure
+from formatting import fmt_ru
+from olap import GROWTH_TOP_N, GROWTH_YEARS, PARTNER_YEARS, STRUCTURE_YEARS, TOP_N, CubeFile
+from partner_shards import PartnerShards
+from partners import PartnerIndex
+from reporters import ReporterRegistry
+from responses import PrecompressedResponse, dumps
+from trade_totals import TradeTotals
+
+
+# Режим первичной отрисовки графиков:
+#   layout    - фигуры встроены в ответ /_dash-layout, колбэков нет (по умолчанию)
+#   batch     - все графики заполняются одним колбэком, т.е. одним POST-запросом
+#   callbacks - отдельный колбэк на каждый график (старое поведение, для сравнения)
+#   clientside - в макете только компактные данные (dcc.Store), фигуры, слайдер
+#                лет и карточку партнёра считает браузер (assets/clientside.js)
+#   progressive - графики первого экрана встроены в макет, остальные (LAZY_GRAPHS)
+#                 приходят колбэком, когда доходят до области видимости (assets/lazy.js)
+RENDER_MODES = ("layout", "batch", "callbacks", "clientside", "progressive")
+RENDER_MODE = os.environ.get("DASH_RENDER_MODE", "layout")
+if RENDER_MODE not in RENDER_MODES:
+    raise ValueError(f"Неизвестный DASH_RENDER_MODE={RENDER_MODE!r}, ожидается один из {RENDER_MODES}")
+
+DATA_PATH = os.environ.get("DASHBOARD_DATA", "dashboard_data.json")
+# Как часто (в секундах) проверять файл данных на изменения; 0 - не следить
+DATA_RELOAD_INTERVAL = float(os.environ.get("DATA_RELOAD_INTERVAL", "10"))
+
+# Каталог с данными нескольких стран (см. reporters.py): страна выбирается
+# путём страницы (/swe) или списком в шапке. Без него дашборд показывает
+# одну страну из DASHBOARD_DATA
+REPORTERS_PATH = os.environ.get("DASHBOARD_REPORTERS")
+# Бюджет памяти на собранные снимки стран, МБ
+REPORTERS_MEMORY_MB = float(os.environ.get("REPORTERS_MEMORY_MB", "512"))
+# Сколько самых популярных стран собирать при старте
+REPORTERS_WARM = int(os.environ.get("REPORTERS_WARM", "5"))
+if REPORTERS_PATH and RENDER_MODE != "layout":
+    # Страница страны целиком приходит одним готовым ответом колбэка
+    raise ValueError("DASHBOARD_REPORTERS поддерживается только с DASH_RENDER_MODE=layout")
+
+# Куб для интерактивных рейтингов (data_preparation.py --cube); без него
+# рейтинги показываются в том виде, в каком посчитаны в файле данных
+CUBE_PATH = os.environ.get("DASHBOARD_CUBE", "trade_cube.npz")
+# Куб и ряды по странам-партнёрам (ниже) строятся для одной страны,
+# в режиме нескольких стран они не подключаются
+# (перечитывается при смене файла, см. olap.CubeFile)
+cube_file = CubeFile(CUBE_PATH) if not REPORTERS_PATH and os.path.exists(CUBE_PATH) else None
+
+# Ряды по отдельным странам (data_preparation.py --partner-shards): с ними
+# график торговли с Россией можно переключить на любую страну
+PARTNER_SHARDS_PATH = os.environ.get("DASHBOARD_PARTNER_SHARDS", "partner_shards")
+PARTNER_CACHE_SIZE = int(os.environ.get("PARTNER_CACHE_SIZE", "32"))
+partner_shards = (PartnerShards(PARTNER_SHARDS_PATH, PARTNER_CACHE_SIZE)
+                  if not REPORTERS_PATH and os.path.isdir(PARTNER_SHARDS_PATH) else None)
+if partner_shards is not None and not partner_shards.countries:
+    # Пустой каталог рядов: выбирать не из чего, остаётся встроенный ряд по России
+    partner_shards = None
+# Страна дашборда в режиме одной страны (в режиме нескольких стран названия
+# берутся из reporters.json)
+REPORTER_NAME = "Финляндия"
+REPORTER_GENITIVE = "Финляндии"
+# Сколько последних лет показывает график двусторонней торговли
+BILATERAL_YEARS = 5
+DEFAULT_BILATERAL_PARTNER = "Россия"
+
+GRAPH_IDS = list(FIGURE_BUILDERS)
+# Заглушка той же высоты, что и фигуры, чтобы страница не прыгала при загрузке
+LAZY_PLACEHOLDER = {
+    "data": [],
+    "layout": {
+        "height": 400,
+        "xaxis": {"visible": False},
+        "yaxis": {"visible": False},
+        "annotations": [{"text": "Загрузка графика...", "xref": "paper", "yref": "paper", "x": 0.5, "y": 0.5,
+                         "showarrow": False, "font": {"size": 16, "color": "gray"}}],
+        "plot_bgcolor": "rgba(0,0,0,0)",
+        "paper_bgcolor": "rgba(0,0,0,0)",
+    },
+}
+
+
+def graph(figures, graph_id):
+    if RENDER_MODE == "progressive" and graph_id in LAZY_GRAPHS:
+        # data-lazy ищет assets/lazy.js, Store "<id>-visible" запускает колбэк графика
+        return html.Div([
+            dcc.Graph(id=graph_id, figure=LAZY_PLACEHOLDER),
+            dcc.Store(id=f"{graph_id}-visible")
+        ], **{"data-lazy": graph_id})
+    if RENDER_MODE in ("layout", "progressive"):
+        return dcc.Graph(id=graph_id, figure=figures.figure(graph_id))
+    return dcc.Graph(id=graph_id)
+
+
+# Блок с показателями торговли с ключевым партнёром (за 5 лет)
+PARTNER_FIELDS = [
+    ("partner-turnover", "Товарооборот", "turnover"),
+    ("partner-export", "Экспорт", "export"),
+    ("partner-import", "Импорт", "import"),
+]
+
+
+def build_partner_card(partners):
+    country = partners.default
+    card = partners.card(country) or {}
+    # Без стран-партнёров в данных выбор не показывается (колбэку карточки
+    # список всё равно нужен в макете)
+    title = f"Ключевой партнёр — {country}" if country is not None else "Ключевой партнёр — нет данных"
+    return html.Div([
+        html.H3(title, id="partner-title", style={"marginBottom": "10px"}),
+        dcc.Dropdown(
+            id="partner-select",
+            options=[{"label": name, "value": name} for name in partners.countries],
+            value=country,
+            clearable=False,
+            style={"marginBottom": "10px"} if country is not None else {"display": "none"}
+        ),
+        html.Div([
+            html.Div([
+                html.H4(title),
+                html.P(card.get(key, ""), id=value_id)
+            ], style={"width": "30%", "display": "inline-block"})
+            for value_id, title, key in PARTNER_FIELDS
+        ], style={"display": "flex", "justifyContent": "space-between"})
+    ], style={"backgroundColor": "#ffffff", "padding": "20px", "borderRadius": "8px", "marginBottom": "20px"})
+
+
+# Показатели торговли за выбранный диапазон лет
+KPI_CARDS = [
+    ("kpi-export", "Экспорт", "X"),
+    ("kpi-import", "Импорт", "M"),
+    ("kpi-balance", "Сальдо", "balance"),
+    ("kpi-cagr", "Среднегодовой рост экспорта", "cagr"),
+]
+
+
+def kpi_values(totals):
+    values = []
+    for _, _, key in KPI_CARDS:
+        if key == "cagr":
+            values.append("—" if totals["cagr"] is None else f"{totals['cagr'] * 100:.1f}%")
+        else:
+            values.append(fmt_ru(totals[key] / 1_000_000_000))
+    return values
+
+
+# Отметки слайдера лет: крайние годы и каждый 5-й год (на длинных рядах -
+# 10-й, 25-й, 50-й..., не больше YEAR_MARKS отметок), без годов вплотную к крайним
+YEAR_MARKS = 10
+
+
+def year_marks(first, last):
+    step = 5
+    while last - first > step * YEAR_MARKS:
+        step = step * 5 // 2 if str(step).startswith("1") else step * 2
+    years = [year for year in range(first - first % step + step, last, step)
+             if year - first > step // 2 and last - year > step // 2]
+    return {year: str(year) for year in [first, *years, last]}
+
+
+def build_trade_range_controls(trade_totals):
+    first, last = trade_totals.first_year, trade_totals.last_year
+    values = kpi_values(trade_totals.totals(first, last))
+    return html.Div([
+        dcc.RangeSlider(
+            id="year-range",
+            min=first,
+            max=last,
+            step=1,
+            value=[first, last],
+            marks=year_marks(first, last),
+            updatemode="drag",
+            allowCross=False,
+        ),
+        html.Div([
+            html.Div([
+                html.H4(title),
+                html.P(value, id=value_id)
+            ], style={"width": "24%", "display": "inline-block"})
+            for (value_id, title, _), value in zip(KPI_CARDS, values)
+        ], style={"display": "flex", "justifyContent": "space-between", "marginTop": "15px"})
+    ], style={"marginTop": "10px"})
+
+
+def build_bilateral_controls(shards):
+    countries = shards.countries
+    value = DEFAULT_BILATERAL_PARTNER if DEFAULT_BILATERAL_PARTNER in shards else next(iter(countries), None)
+    return dcc.Dropdown(
+        id="bilateral-partner",
+        options=[{"label": name, "value": name} for name in countries],
+        value=value,
+        clearable=False,
+        # Ряды пропали после перезаписи каталога: список прячется, график остаётся прежним
+        style={"marginBottom": "10px"} if countries else {"display": "none"}
+    )
+
 
+def build_reporter_select(reporter):
+    # Смена страны меняет путь страницы, а по нему колбэк отдаёт её страницу
+    return dcc.Dropdown(
+        id="reporter-select",
+        options=[{"label": meta["name"], "value": reporter_id}
+                 for reporter_id, meta in reporter_registry.reporters.items()],
+        value=reporter,
+        clearable=False,
+        style={"width": "300px", "margin": "0 auto"}
+    )
 
 
-# Функция для форматирования чисел
-def fmt_ru(v):
-    if pd.isna(v):
-        return ""
-    abs_v = abs(v)
-    sign = "-" if v < 0 else ""
-    if abs_v >= 1:
-        return f"{sign}{abs_v:,.1f} млрд USD".replace(",", " ")
-    else:
-        return f"{sign}{abs_v*1_000:,.1f} млн USD".replace(",", " ")
-
-# Загрузка данных
-with open("dashboard_data.json", "r", encoding="utf-8") as f:
-    data = json.load(f)
-
-# Данные по ключевому партнёру Германии (за 5 лет)
-df_partners = pd.DataFrame(data["top_partner_countries"])
-germany_row = df_partners[df_partners["country_name"] == "Германия"].iloc[0]
-turnover_bln = germany_row.get("turnover_bln", (germany_row["X"] + germany_row["M"]) / 1_000_000_000)
-export_bln = germany_row.get("export_bln", germany_row["X"] / 1_000_000_000)
-import_bln = germany_row.get("import_bln", germany_row["M"] / 1_000_000_000)
-
-# Блок с показателями торговли с Германией
-div_germany = html.Div([
-    html.H3("Ключевой партнёр — Германия", style={"marginBottom": "10px"}),
-    html.Div([
-        html.Div([
-            html.H4("Товарооборот"),
-            html.P(f"{fmt_ru(turnover_bln)}")
-        ], style={"width": "30%", "display": "inline-block"}),
-        html.Div([
-            html.H4("Экспорт"),
-            html.P(f"{fmt_ru(export_bln)}")
-        ], style={"width": "30%", "display": "inline-block"}),
-        html.Div([
-            html.H4("Импорт"),
-            html.P(f"{fmt_ru(import_bln)}")
-        ], style={"width": "30%", "display": "inline-block"}),
-    ], style={"display": "flex", "justifyContent": "space-between"})
-], style={"backgroundColor": "#ffffff", "padding": "20px", "borderRadius": "8px", "marginBottom": "20px"})
-
-# Данные по ключевому партнёру Германии (за 5 лет)
-df_partners = pd.DataFrame(data["top_partner_countries"])
-germany_row = df_partners[df_partners["country_name"] == "Германия"].iloc[0]
-turnover_bln = germany_row.get(
-    "turnover_bln", (germany_row["X"] + germany_row["M"]) / 1_000_000_000
+# Графики-рейтинги, которые пересчитываются по кубу, и их заголовки
+# (окна лет - ranking_windows)
+RANKING_TITLES = {
+    "top-commodities-export-chart": "ТОП-{n} товарных групп по экспорту ({first}–{last})",
+    "top-commodities-import-chart": "ТОП-{n} товарных групп по импорту ({first}–{last})",
+    "top-countries-chart": "ТОП-{n} стран-партнёров по общему объёму торговли ({partner_first}–{last})",
+    "structure-changes-chart": "Наибольшее снижение торговли: {structure_first}–{middle_last} → {middle}–{last}",
+    "top-growth-export-chart": "Топ-{growth_n} прироста по экспорту ({growth_first}→{last})",
+    "top-growth-import-chart": "Топ-{growth_n} прироста по импорту ({growth_first}→{last})",
+}
+
+# Заголовки блоков с рейтингами. С кубом число позиций и период задают
+# слайдеры и показывают заголовки самих графиков, поэтому в заголовках
+# блоков их нет - иначе они расходились бы с графиками после смены слайдеров
+RANKING_HEADINGS = {
+    "ТОП-10 товарных групп по экспорту": "Товарные группы по экспорту",
+    "ТОП-10 товарных групп по импорту": "Товарные группы по импорту",
+    "ТОП-10 стран-партнёров (5 лет)": "Страны-партнёры",
+    "Топ-5 прироста товарных групп (3 года)": "Прирост товарных групп",
+    "Топ-5 прироста по экспорту": "Прирост по экспорту",
+    "Топ-5 прироста по импорту": "Прирост по импорту",
+    "Изменения структуры (10 лет)": "Изменения структуры",
+}
+
+
+def ranking_heading(text):
+    return RANKING_HEADINGS[text] if cube_file is not None else text
+
+# Графики ниже первого экрана: в режиме progressive грузятся по прокрутке.
+# Графики, которые ещё до прокрутки меняют слайдеры рейтингов (куб) или выбор
+# страны-партнёра, грузятся сразу: иначе ленивая загрузка затёрла бы выбор
+LAZY_GRAPHS = tuple(
+    graph_id for graph_id in ("russia-trade-chart", "top-growth-export-chart", "top-growth-import-chart",
+                              "structure-changes-chart")
+    if not (cube_file is not None and graph_id in RANKING_TITLES)
+    and not (partner_shards is not None and graph_id == "russia-trade-chart")
 )
 
-# Данные по ключевому партнёру Германии (за 5 лет)
-df_partners = pd.DataFrame(data["top_partner_countries"])
-germany_row = df_partners[df_partners["country_name"] == "Германия"].iloc[0]
-turnover_bln = germany_row.get("turnover_bln", (germany_row["X"] + germany_row["M"]) / 1_000_000_000)
-
-export_bln = germany_row.get("export_bln", germany_row["X"] / 1_000_000_000)
-import_bln = germany_row.get("import_bln", germany_row["M"] / 1_000_000_000)
 
-# Блок с показателями торговли с Германией
-div_germany = html.Div([
-    html.H3("Ключевой партнёр — Германия", style={"marginBottom": "10px"}),
-    html.Div([
-        html.Div([
-            html.H4("Товарооборот"),
-            html.P(f"{fmt_ru(turnover_bln)}")
-        ], style={"width": "30%", "display": "inline-block"}),
+def build_ranking_controls(cube):
+    return html.Div([
+        html.H3("Рейтинги: число позиций и период", style={"color": "#2c3e50", "marginBottom": "15px"}),
+        dcc.Slider(id="ranking-n", min=3, max=30, step=1, value=TOP_N,
+                   marks={n: str(n) for n in (3, 5, 10, 15, 20, 25, 30)}),
+        dcc.RangeSlider(
+            id="ranking-years",
+            min=cube.first_year,
+            max=cube.last_year,
+            step=1,
+            value=[cube.first_year, cube.last_year],
+            marks=year_marks(cube.first_year, cube.last_year),
+            allowCross=False,
+        ),
+    ], style={"backgroundColor": "#ffffff", "padding": "20px", "marginBottom": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
+
+
+# Разделы, которые пересчитываются по кубу (ranking_sections)
+RANKING_SECTIONS = ("top_export_commodities", "top_import_commodities", "top_partner_countries",
+                    "declining_commodities", "export_growth", "import_growth")
+
+
+def ranking_windows(n, first, last):
+    """Окна лет и число позиций рейтингов для периода first..last.
+
+    Окна те же, что в файле данных (data_preparation.py), но заканчиваются
+    годом last и не выходят за first: при периоде по умолчанию (все годы
+    куба) рейтинги по кубу совпадают по смыслу с рейтингами из файла.
+    """
+    structure_first = max(first, last - STRUCTURE_YEARS + 1)
+    # Снижение - вторая половина окна против первой
+    middle = structure_first + (last - structure_first + 1) // 2
+    return {
+        "n": n, "first": first, "last": last,
+        "partner_first": max(first, last - PARTNER_YEARS + 1),
+        "structure_first": structure_first, "middle": middle, "middle_last": middle - 1,
+        "growth_first": max(first, last - GROWTH_YEARS),
+        # Прирост в файле данных - вдвое короче остальных рейтингов
+        "growth_n": max(n * GROWTH_TOP_N // TOP_N, 1),
+    }
+
+
+def ranking_sections(cube, n, first, last):
+    """Разделы данных для графиков-рейтингов по кубу: n позиций за годы first..last."""
+    windows = ranking_windows(n, first, last)
+    years = (first, last)
+    partner_years = (windows["partner_first"], last)
+    middle, growth_first, growth_n = windows["middle"], windows["growth_first"], windows["growth_n"]
+    partners = cube.top_n("partner", "turnover", partner_years, n)
+    partner_flows = cube.flows("partner", partner_years, [name for name, _ in partners])
+    return {
+        "top_export_commodities": [{"commodity_name": name, "primaryValue": value}
+                                   for name, value in cube.top_n("commodity", "X", years, n)],
+        "top_import_commodities": [{"commodity_name": name, "primaryValue": value}
+                                   for name, value in cube.top_n("commodity", "M", years, n)],
+        "top_partner_countries": [
+            {"country_name": name, "M": m, "X": x, "balance": x - m, "turnover": turnover,
+             "balance_bln": (x - m) / 1_000_000_000, "turnover_bln": turnover / 1_000_000_000}
+            for (name, turnover), (x, m) in zip(partners, partner_flows)
+        ],
+        "declining_commodities": [
+            {"commodity_name": name, "first_half": before, "second_half": after, "change": change}
+            for name, before, after, change in cube.delta(
+                "commodity", (windows["structure_first"], middle - 1), (middle, last), "turnover", n, largest=False)
+        ],
+        "export_growth": [{"commodity_name": name, "delta": change / 1_000_000_000}
+                          for name, _, _, change in cube.delta(
+                              "commodity", (growth_first, growth_first), (last, last), "X", growth_n)],
+        "import_growth": [{"commodity_name": name, "delta": change / 1_000_000_000}
+                          for name, _, _, change in cube.delta(
+                              "commodity", (growth_first, growth_first), (last, last), "M", growth_n)],
+    }
+
+
+# Макет страницы для одной версии данных; reporter - id страны в режиме нескольких стран,
+# client - данные для браузера в режиме clientside (clientside.client_data)
+def build_layout(figures, trade_totals, partners, reporter=None, client=None):
+    if reporter is None:
+        genitive, years, selector = REPORTER_GENITIVE, "2000-2023", []
+    else:
+        genitive = reporter_registry.reporters[reporter]["genitive"]
+        years = f"{trade_totals.first_year}-{trade_totals.last_year}"
+        selector = [build_reporter_select(reporter)]
+    return html.Div([
         html.Div([
-            html.H4("Экспорт"),
-            html.P(f"{fmt_ru(export_bln)}")
-        ], style={"width": "30%", "display": "inline-block"}),
+            html.H1(f"Дашборд внешней торговли {genitive}", 
+                    style={"textAlign": "center", "color": "#2c3e50", "marginBottom": "10px"}),
+            html.P(f"Интерактивный анализ данных международной торговли {genitive} ({years})", 
+                   style={"textAlign": "center", "color": "#7f8c8d", "marginBottom": "30px"}),
+            *selector
+        ], style={"backgroundColor": "#ecf0f1", "padding": "20px", "marginBottom": "20px"}),
+    
+        # График динамики торговли
         html.Div([
-            html.H4("Импорт"),
-            html.P(f"{fmt_ru(import_bln)}")
-        ], style={"width": "30%", "display": "inline-block"}),
-    ], style={"display": "flex", "justifyContent": "space-between"})
-], style={"backgroundColor": "#ffffff", "padding": "20px", "borderRadius": "8px", "marginBottom": "20px"})
-
-# Инициализация приложения Dash
-app = dash.Dash(__name__)
-server = app.server
+            html.H3("Динамика торговли", style={"color": "#2c3e50", "marginBottom": "15px"}),
+            graph(figures, "trade-dynamics-chart"),
+            build_trade_range_controls(trade_totals)
+        ], style={"backgroundColor": "#ffffff", "padding": "20px", "marginBottom": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
 
-# Стили CSS
-app.layout = html.Div([
-    html.Div([
-        html.H1("Дашборд внешней торговли Финляндии", 
-                style={"textAlign": "center", "color": "#2c3e50", "marginBottom": "10px"}),
-        html.P("Интерактивный анализ данных международной торговли Финляндии (2000-2023)", 
-               style={"textAlign": "center", "color": "#7f8c8d", "marginBottom": "30px"})
-    ], style={"backgroundColor": "#ecf0f1", "padding": "20px", "marginBottom": "20px"}),
-    
-    # График динамики торговли
-    html.Div([
-        html.H3("Динамика торговли", style={"color": "#2c3e50", "marginBottom": "15px"}),
-        dcc.Graph(id="trade-dynamics-chart")
-    ], style={"backgroundColor": "#ffffff", "padding": "20px", "marginBottom": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
-    
-    # Строка с двумя графиками - товарные группы
-    html.Div([
-        # ТОП-10 товарных групп по экспорту
-        html.Div([
-            html.H3("ТОП-10 товарных групп по экспорту", style={"color": "#2c3e50", "marginBottom": "15px"}),
-            dcc.Graph(id="top-commodities-export-chart")
-        ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff", 
-                  "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
-        
-        # ТОП-10 товарных групп по импорту
-        html.Div([
-            html.H3("ТОП-10 товарных групп по импорту", style={"color": "#2c3e50", "marginBottom": "15px"}),
-            dcc.Graph(id="top-commodities-import-chart")
-        ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
-                  "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
-    ], style={"marginBottom": "20px"}),
+        *([build_ranking_controls(cube_file.current)] if cube_file is not None else []),
     
-    # Строка с двумя графиками
-    html.Div([
-        # Экономические секторы
+        # Строка с двумя графиками - товарные группы
         html.Div([
-            html.H3("Экономические секторы", style={"color": "#2c3e50", "marginBottom": "15px"}),
-            dcc.Graph(id="economic-sectors-chart")
-        ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff", 
-                  "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
+            # ТОП-10 товарных групп по экспорту
+            html.Div([
+                html.H3(ranking_heading("ТОП-10 товарных групп по экспорту"), style={"color": "#2c3e50", "marginBottom": "15px"}),
+                graph(figures, "top-commodities-export-chart")
+            ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff", 
+                      "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
         
-        # География торговли
-        html.Div([
-            html.H3("География торговли", style={"color": "#2c3e50", "marginBottom": "15px"}),
-            dcc.Graph(id="trade-geography-chart")
-        ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
-                  "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
-    ], style={"marginBottom": "20px"}),
+            # ТОП-10 товарных групп по импорту
+            html.Div([
+                html.H3(ranking_heading("ТОП-10 товарных групп по импорту"), style={"color": "#2c3e50", "marginBottom": "15px"}),
+                graph(figures, "top-commodities-import-chart")
+            ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
+                      "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
+        ], style={"marginBottom": "20px"}),
     
-    # Строка с двумя графиками
-    html.Div([
-        # ТОП-10 стран-партнёров
+        # Строка с двумя графиками
         html.Div([
-            html.H3("ТОП-10 стран-партнёров (5 лет)", style={"color": "#2c3e50", "marginBottom": "15px"}),
-            div_germany,
-            dcc.Graph(id="top-countries-chart")
-        ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff",
-                  "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
+            # Экономические секторы
+            html.Div([
+                html.H3("Экономические секторы", style={"color": "#2c3e50", "marginBottom": "15px"}),
+                graph(figures, "economic-sectors-chart")
+            ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff", 
+                      "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
         
-        # Торговля с Россией
-        html.Div([
-            html.H3("Торговля с Россией (5 лет)", style={"color": "#2c3e50", "marginBottom": "15px"}),
-            dcc.Graph(id="russia-trade-chart")
-        ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
-                  "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
-    ], style={"marginBottom": "20px"}),
+            # География торговли
+            html.Div([
+                html.H3("География торговли", style={"color": "#2c3e50", "marginBottom": "15px"}),
+                graph(figures, "trade-geography-chart")
+            ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
+                      "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
+        ], style={"marginBottom": "20px"}),
     
-    # Топ-5 прироста товарных групп (3 года)
-    html.Div([
-        html.H3("Топ-5 прироста товарных групп (3 года)", style={"color": "#2c3e50", "marginBottom": "15px", "textAlign": "center"}),
+        # Строка с двумя графиками
         html.Div([
-            # Прирост экспорта
+            # ТОП-10 стран-партнёров
             html.Div([
-                html.H4("Топ-5 прироста по экспорту", style={"color": "#2c3e50", "marginBottom": "15px"}),
-                dcc.Graph(id="top-growth-export-chart")
-            ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff", 
+                html.H3(ranking_heading("ТОП-10 стран-партнёров (5 лет)"), style={"color": "#2c3e50", "marginBottom": "15px"}),
+                build_partner_card(partners),
+                graph(figures, "top-countries-chart")
+            ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff",
                       "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
-            
-            # Прирост импорта
+        
+            # Торговля с Россией
             html.Div([
-                html.H4("Топ-5 прироста по импорту", style={"color": "#2c3e50", "marginBottom": "15px"}),
-                dcc.Graph(id="top-growth-import-chart")
+                html.H3("Торговля с Россией (5 лет)", id="bilateral-title", style={"color": "#2c3e50", "marginBottom": "15px"}),
+                *([build_bilateral_controls(partner_shards)] if partner_shards is not None else []),
+                graph(figures, "russia-trade-chart")
             ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
                       "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
-        ])
-    ], style={"backgroundColor": "#ecf0f1", "padding": "20px", "marginBottom": "20px", "borderRadius": "8px"}),
-    
-    # Изменения структуры торговли
-    html.Div([
-        html.H3("Изменения структуры (10 лет)", style={"color": "#2c3e50", "marginBottom": "15px"}),
-        dcc.Graph(id="structure-changes-chart")
-    ], style={"backgroundColor": "#ffffff", "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
-
-], style={"fontFamily": "Arial, sans-serif", "margin": "0", "padding": "20px", "backgroundColor": "#f8f9fa"})
-
-# Callback для динамики торговли
-@app.callback(
-    Output("trade-dynamics-chart", "figure"),
-    Input("trade-dynamics-chart", "id") # Dummy input to trigger callback on load
-)
-def update_trade_dynamics(dummy_input):
-    df = pd.DataFrame(data["trade_dynamics"])
-    df["year"] = df["year"].astype(int) # Ensure years are integers
-    df["X_bln"] = df["X"] / 1_000_000_000
-    df["M_bln"] = df["M"] / 1_000_000_000
-    df["balance_bln"] = df["balance"] / 1_000_000_000
-    
-    fig = go.Figure()
-    
-    # Экспорт
-    fig.add_trace(go.Scatter(
-        x=df["year"],
-        y=df["X_bln"],
-        mode="lines+markers",
-        name="Экспорт",
-        line=dict(color="#27ae60", width=3),
-        marker=dict(size=6),
-        hovertemplate="Год: %{x}<br>Экспорт: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val) for val in df["X_bln"]]
-    ))
-    
-    # Импорт
-    fig.add_trace(go.Scatter(
-        x=df["year"],
-        y=df["M_bln"],
-        mode="lines+markers",
-        name="Импорт",
-        line=dict(color="#e74c3c", width=3),
-        marker=dict(size=6),
-        hovertemplate="Год: %{x}<br>Импорт: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val) for val in df["M_bln"]]
-    ))
-    
-    # Сальдо на второй оси
-    fig.add_trace(go.Scatter(
-        x=df["year"],
-        y=df["balance_bln"],
-        mode="lines+markers",
-        name="Сальдо",
-        line=dict(color="#3498db", width=3),
-        marker=dict(size=6),
-        yaxis="y2",
-        hovertemplate="Год: %{x}<br>Сальдо: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val) for val in df["balance_bln"]]
-    ))
-    
-    fig.update_layout(
-        title="Динамика экспорта, импорта и торгового сальдо",
-        xaxis_title="Год",
-        yaxis=dict(
-            title="Объём торговли (млрд USD)",
-            side="left",
-            tickformat=".1f", # Format for billion USD
-            gridcolor="rgba(0,0,0,0.05)"
-        ),
-        yaxis2=dict(
-            title="Торговое сальдо (млрд USD)",
-            side="right",
-            overlaying="y",
-            tickformat=".1f", # Format for billion USD
-            gridcolor="rgba(0,0,0,0.05)"
-        ),
-        hovermode="x unified",
-        legend=dict(x=0.02, y=0.98),
-        height=400,
-        font=dict(family="Arial", size=12),
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)" # Transparent background
-    )
+        ], style={"marginBottom": "20px"}),
     
-    return fig
+        # Топ-5 прироста товарных групп (3 года)
+        html.Div([
+            html.H3(ranking_heading("Топ-5 прироста товарных групп (3 года)"), style={"color": "#2c3e50", "marginBottom": "15px", "textAlign": "center"}),
+            html.Div([
+                # Прирост экспорта
+                html.Div([
+                    html.H4(ranking_heading("Топ-5 прироста по экспорту"), style={"color": "#2c3e50", "marginBottom": "15px"}),
+                    graph(figures, "top-growth-export-chart")
+                ], style={"width": "48%", "display": "inline-block", "backgroundColor": "#ffffff", 
+                          "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
+            
+                # Прирост импорта
+                html.Div([
+                    html.H4(ranking_heading("Топ-5 прироста по импорту"), style={"color": "#2c3e50", "marginBottom": "15px"}),
+                    graph(figures, "top-growth-import-chart")
+                ], style={"width": "48%", "display": "inline-block", "marginLeft": "4%", "backgroundColor": "#ffffff", 
+                          "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"})
+            ])
+        ], style={"backgroundColor": "#ecf0f1", "padding": "20px", "marginBottom": "20px", "borderRadius": "8px"}),
+    
+        # Изменения структуры торговли
+        html.Div([
+            html.H3(ranking_heading("Изменения структуры (10 лет)"), style={"color": "#2c3e50", "marginBottom": "15px"}),
+            graph(figures, "structure-changes-chart")
+        ], style={"backgroundColor": "#ffffff", "padding": "20px", "borderRadius": "8px", "boxShadow": "0 2px 4px rgba(0,0,0,0.1)"}),
+
+        *([dcc.Store(id=STORE_ID, data=client)] if client is not None else []),
+        # Окно зума прореженных графиков (см. ZOOM_FILTER)
+        *([dcc.Store(id=f"{graph_id}-window") for graph_id in ZOOM_SERIES] if client is None else [])
+
+    ], style={"fontFamily": "Arial, sans-serif", "margin": "0", "padding": "20px", "backgroundColor": "#f8f9fa"})
+
+
+# Ответы колбэков, которые не зависят от входов: "output" запроса -> тело ответа
+def static_callback_payloads(figures):
+    if RENDER_MODE == "batch":
+        output = "".join(f"..{graph_id}.figure." for graph_id in GRAPH_IDS) + "."
+        return {output: {"multi": True, "response": {
+            graph_id: {"figure": figures.figure(graph_id)} for graph_id in GRAPH_IDS
+        }}}
+    if RENDER_MODE in ("callbacks", "progressive"):
+        return {
+            f"{graph_id}.figure": {"multi": True, "response": {graph_id: {"figure": figures.figure(graph_id)}}}
+            for graph_id in (GRAPH_IDS if RENDER_MODE == "callbacks" else LAZY_GRAPHS)
+        }
+    return {}
+
+
+# Пирамиды прореживания для графиков, ряд которых длиннее WEBGL_POINTS
+def build_series(model):
+    series = {}
+    for graph_id, (section, columns, unit) in ZOOM_SERIES.items():
+        data = model[section]
+        if data.rows > WEBGL_POINTS:
+            series[graph_id] = SeriesPyramid(data["year"], [data[column] for column in columns], unit)
+    return series
+
+
+# Выход колбэка, который отдаёт страницу страны в режиме нескольких стран
+PAGE_OUTPUT = "reporter-page.children"
+
+
+def build_snapshot(data, version, reporter=None):
+    # Всё, что зависит от данных, собирается один раз на версию
+    model = TradeData(data)
+    figures = FigureRegistry(model)
+    trade_totals = TradeTotals(model["trade_dynamics"])
+    partners = PartnerIndex(model["top_partner_countries"])
+    client = None
+    if RENDER_MODE == "clientside":
+        # Шаблон plotly у всех фигур общий, браузер получает его один раз
+        client = client_data(model, figures.figure(GRAPH_IDS[0])["layout"]["template"])
+    layout = build_layout(figures, trade_totals, partners, reporter, client)
+    if reporter is None:
+        responses = {"layout": PrecompressedResponse(to_json_plotly(layout).encode("utf-8"), version)}
+    else:
+        # Макет страны - не /_dash-layout, а ответ колбэка страницы
+        page = {"multi": True, "response": {"reporter-page": {"children": layout}}}
+        responses = {("callback", PAGE_OUTPUT): PrecompressedResponse(to_json_plotly(page).encode("utf-8"), version)}
+    for output, payload in static_callback_payloads(figures).items():
+        responses[("callback", output)] = PrecompressedResponse(dumps(payload), version)
+    series = build_series(model) if RENDER_MODE != "clientside" else {}
+    return DataSnapshot(version, data, figures, layout=layout, responses=responses,
+                        trade_totals=trade_totals, partners=partners, model=model, series=series)
+
+
+if REPORTERS_PATH:
+    reporter_registry = ReporterRegistry(REPORTERS_PATH, build_snapshot, REPORTERS_MEMORY_MB * 1_000_000,
+                                         interval=DATA_RELOAD_INTERVAL)
+    data_manager = None
+else:
+    reporter_registry = None
+    data_manager = DataManager(DATA_PATH, build_snapshot, interval=DATA_RELOAD_INTERVAL)
+
+
+def current_snapshot(pathname=None, visit=False):
+    """Снимок страны по пути страницы (в режиме одной страны - единственный)."""
+    if reporter_registry is None:
+        return data_manager.current
+    return reporter_registry.snapshot(reporter_registry.resolve(pathname), visit)
+
+
+# Инициализация приложения Dash. Элементы страницы страны появляются в
+# макете только после колбэка страницы, поэтому проверку id колбэков отключаем.
+# Скрипты режимов clientside и progressive подключаются только в своём режиме
+MODE_ASSETS = {"clientside": r"clientside\.js", "progressive": r"lazy\.js"}
+app = dash.Dash(__name__, suppress_callback_exceptions=reporter_registry is not None,
+                assets_ignore="|".join(pattern for mode, pattern in MODE_ASSETS.items() if mode != RENDER_MODE))
+server = app.server
 
-# Callback для ТОП-10 товарных групп по экспорту
-@app.callback(
-    Output("top-commodities-export-chart", "figure"),
-    Input("top-commodities-export-chart", "id") # Dummy input
-)
-def update_top_commodities_export(dummy_input):
-    df = pd.DataFrame(data["top_export_commodities"])
-    df["value_bln"] = df["primaryValue"] / 1_000_000_000
-    
-    # Сокращаем длинные названия товарных групп
-    df["short_name"] = df["commodity_name"].apply(lambda x: (x[:35] + "...") if len(x) > 35 else x)
-    
-    fig = go.Figure(go.Bar(
-        x=df["value_bln"],
-        y=df["short_name"],
-        orientation="h",
-        marker_color="#27ae60",
-        text=[fmt_ru(val) for val in df["value_bln"]],
-        textposition="inside",
-        textfont=dict(color="white", size=10),
-        hovertemplate="%{customdata}<br>Объём: %{text}<extra></extra>",
-        customdata=df["commodity_name"]
-    ))
-    
-    fig.update_layout(
-        title="ТОП-10 товарных групп по экспорту",
-        xaxis_title="Объём (млрд USD)",
-        yaxis_title="Товарная группа",
-        height=500,
-        margin=dict(l=200),
-        font=dict(family="Arial", size=10),
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+# Оболочка режима нескольких стран: адрес страницы и место под страницу страны
+SHELL_LAYOUT = html.Div([dcc.Location(id="url", refresh=False), html.Div(id="reporter-page")])
+SHELL_VERSION = "reporters"
+shell_responses = {"layout": PrecompressedResponse(to_json_plotly(SHELL_LAYOUT).encode("utf-8"), SHELL_VERSION)}
+
+
+# Каждый запрос макета берёт текущий снимок целиком, поэтому видит одну версию данных
+def serve_layout():
+    if reporter_registry is not None:
+        return SHELL_LAYOUT
+    return data_manager.current.layout
+
+
+app.layout = serve_layout
+
+
+_served_version = None
+
+
+def track_data_version(version):
+    # Версия данных, которую отдаёт этот процесс, для метрик
+    global _served_version
+    key = (os.getpid(), version)
+    if _served_version == key:
+        return
+    if _served_version is not None and _served_version[0] == key[0]:
+        metrics.data_reloads.inc()
+    _served_version = key
+    metrics.data_version.clear()
+    metrics.data_version.set(1, version=version)
+
+
+@server.before_request
+def start_request_metrics():
+    flask.g.request_start = time.perf_counter()
+    if data_manager is not None:
+        track_data_version(data_manager.current.version)
+
+
+@server.before_request
+def ensure_data_watcher():
+    # Запускает наблюдение за файлом данных в текущем воркере (идемпотентно);
+    # файлы стран проверяет сам ReporterRegistry при обращении
+    if data_manager is not None:
+        data_manager.start()
+
+
+@server.before_request
+def start_profiling():
+    # Профиль по требованию, см. profiling.py
+    request = flask.request
+    if not profiling.requested(request):
+        return None
+    prefix = app.config.routes_pathname_prefix
+    if request.path == prefix + "_dash-layout":
+        # Макет отдаётся готовым из снимка, поэтому профилируется его сборка заново
+        # (в режиме нескольких стран - страница страны по умолчанию)
+        reporter = None if reporter_registry is None else reporter_registry.default
+        snapshot = current_snapshot()
+        with profiling.profiled("layout"):
+            build_snapshot(snapshot.data, snapshot.version, reporter)
+    elif request.method == "POST" and request.path == prefix + "_dash-update-component":
+        body = request.get_json(silent=True) or {}
+        profile = profiling.start()
+        if profile is not None:
+            # "..a.figure@hash...b.children.." -> "a_b"
+            outputs = body.get("output", "callback").strip(".").split("...")
+            flask.g.profile = (profile, "_".join(part.rsplit(".", 1)[0] for part in outputs))
+    return None
+
+
+@server.teardown_request
+def finish_profiling(exc):
+    profile = flask.g.pop("profile", None)
+    if profile is not None:
+        profiling.finish(*profile)
+
+
+@server.before_request
+def serve_precompressed():
+    # Отдаём готовые сжатые байты вместо повторной сериализации в Dash
+    request = flask.request
+    if reporter_registry is None:
+        snapshot = data_manager.current
+        responses, version = snapshot.responses, snapshot.version
+    else:
+        responses, version = shell_responses, SHELL_VERSION
+    prefix = app.config.routes_pathname_prefix
+    if request.method == "GET" and request.path == prefix + "_dash-layout":
+        flask.g.response_cache = "hit"
+        return responses["layout"].to_response(request)
+    if request.method == "GET" and request.path == prefix + "_dash-dependencies":
+        cached = responses.get("dependencies")
+        flask.g.response_cache = "miss" if cached is None else "hit"
+        if cached is None:
+            # Список колбэков известен только после инициализации Dash,
+            # поэтому собирается при первом запросе к версии
+            body = app.dependencies().get_data()
+            cached = responses["dependencies"] = PrecompressedResponse(body, version)
+        return cached.to_response(request)
+    if request.method == "POST" and request.path == prefix + "_dash-update-component":
+        if "profile" in flask.g:
+            # Под профилировщиком выполняется сам колбэк: профиль выдачи готовых
+            # байтов из кэша показал бы только поиск по словарю
+            return None
+        body = request.get_json(silent=True) or {}
+        output = body.get("output")
+        if reporter_registry is not None and output == PAGE_OUTPUT:
+            # Страница страны собирается при первом открытии и дальше отдаётся из кэша
+            pathname = (body.get("inputs") or [{}])[0].get("value")
+            responses = current_snapshot(pathname, visit=True).responses
+        cached = responses.get(("callback", output))
+        flask.g.response_cache = "miss" if cached is None else "hit"
+        if cached is not None:
+            return cached.to_response(request)
+    return None
+
+
+def count_streamed_bytes(chunks, endpoint):
+    # Размер потокового ответа (выгрузки) известен только после отправки
+    # последней порции, поэтому записывается при закрытии потока
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        metrics.response_bytes.observe(size, endpoint=endpoint)
+        metrics.registry.flush()
+
+
+@server.after_request
+def record_request_metrics(response):
+    start = flask.g.pop("request_start", None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    request = flask.request
+    # Шаблон маршрута, а не путь: у ассетов в пути хэш, это раздуло бы метки
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.request_seconds.observe(elapsed, endpoint=endpoint, method=request.method,
+                                    status=response.status_code)
+    if response.is_streamed:
+        response.response = count_streamed_bytes(response.response, endpoint)
+    else:
+        metrics.response_bytes.observe(response.content_length or 0, endpoint=endpoint)
+    cache = flask.g.pop("response_cache", None)
+    if cache is not None:
+        metrics.cache_requests.inc(endpoint=endpoint, result=cache)
+    last_callback = metrics.pop_last_callback()
+    if last_callback is not None:
+        # Всё, что Dash делает вокруг колбэка: разбор запроса и JSON-сериализация ответа
+        name, seconds = last_callback
+        metrics.phase_seconds.observe(max(elapsed - seconds, 0.0), callback=name, phase="serialize")
+    if reporter_registry is not None:
+        metrics.reporters_cached_bytes.set(reporter_registry.cached_bytes)
+    metrics.registry.flush()
+    return response
+
+
+@server.route("/metrics")
+def serve_metrics():
+    return flask.Response(metrics.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Выгрузка раздела данных: /download/<раздел>.csv или .parquet (exports.py).
+# Параметры: from/to - годы (для разделов с колонкой year); n с from/to - рейтинг
+# по кубу, как на графиках; reporter - страна в режиме нескольких стран.
+# /download/partner_trade.csv?country=... - ряд страны-партнёра (partner_shards)
+PARTNER_EXPORT = "partner_trade"
+
+
+@server.route("/download/<section>.<fmt>")
+def download_section(section, fmt):
+    request = flask.request
+    if fmt not in exports.FORMATS:
+        flask.abort(404)
+    if fmt == "parquet" and not exports.parquet_available():
+        return flask.Response("Для выгрузки в Parquet нужен пакет pyarrow", status=501, mimetype="text/plain")
+    first = request.args.get("from", type=int)
+    last = request.args.get("to", type=int)
+    n = request.args.get("n", type=int)
+    reporter = request.args.get("reporter")
+    snapshot = current_snapshot(f"/{reporter}" if reporter else None)
+    version = snapshot.version
+
+    if section == PARTNER_EXPORT and partner_shards is not None:
+        country = request.args.get("country", "")
+        if country not in partner_shards:
+            flask.abort(404)
+        columns, rows = exports.section_columns(partner_shards.series(country))
+        version = f"{snapshot.version}-{partner_shards.version}"
+    elif n is not None and cube_file is not None and section in RANKING_SECTIONS:
+        cube = cube_file.current
+        first = cube.first_year if first is None else first
+        last = cube.last_year if last is None else last
+        columns, rows = exports.section_columns(ranking_sections(cube, max(n, 1), first, last)[section])
+        # Рейтинг зависит от куба, а не только от данных: ETag должен меняться и с ним
+        version = f"{snapshot.version}-{cube.version}"
+    elif section in snapshot.data:
+        columns, rows = exports.section_columns(snapshot.data[section])
+    else:
+        flask.abort(404)
+    columns, rows = exports.filter_years(columns, rows, first, last)
+    return exports.export_response(request, columns, rows, fmt, section, version,
+                                   request.args.to_dict())
+
+
+def warm_up():
+    """Выполняет ленивую инициализацию Dash заранее (в мастере при preload_app)."""
+    client = server.test_client()
+    for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+        client.get(path)
+    if reporter_registry is not None:
+        # Популярные страны собираются в мастере и достаются воркерам через fork
+        reporter_registry.warm(REPORTERS_WARM)
+    else:
+        # Запросы выше запустили наблюдатель за данными; в мастере он не нужен,
+        # воркеры запустят собственный после fork
+        data_manager.stop()
+    # Мастер сам запросы не обслуживает: в сумме по процессам его версия и
+    # служебные запросы прогрева не нужны, а замеры построения фигур остаются
+    # в его файле метрик
+    for metric in (metrics.data_version, metrics.request_seconds, metrics.response_bytes,
+                   metrics.cache_requests):
+        metric.clear()
+    metrics.registry.flush(force=True)
+
+
+if RENDER_MODE == "batch":
+    # Один запрос на всю страницу: dummy input первого графика запускает
+    # колбэк при загрузке, а выходы покрывают все графики сразу
+    @app.callback(
+        [Output(graph_id, "figure") for graph_id in GRAPH_IDS],
+        Input(GRAPH_IDS[0], "id")
     )
-    
-    return fig
-
-# Callback для ТОП-10 товарных групп по импорту
-@app.callback(
-    Output("top-commodities-import-chart", "figure"),
-    Input("top-commodities-import-chart", "id") # Dummy input
-)
-def update_top_commodities_import(dummy_input):
-    df = pd.DataFrame(data["top_import_commodities"])
-    df["value_bln"] = df["primaryValue"] / 1_000_000_000
-    
-    # Сокращаем длинные названия товарных групп
-    df["short_name"] = df["commodity_name"].apply(lambda x: (x[:35] + "...") if len(x) > 35 else x)
-    
-    fig = go.Figure(go.Bar(
-        x=df["value_bln"],
-        y=df["short_name"],
-        orientation="h",
-        marker_color="rgba(0,123,255,0.8)",  # Bootstrap primary blue
-        text=[fmt_ru(val) for val in df["value_bln"]],
-        textposition="inside",
-        textfont=dict(color="white", size=10),
-        hovertemplate="%{customdata}<br>Объём: %{text}<extra></extra>",
-        customdata=df["commodity_name"]
-    ))
-    
-    fig.update_layout(
-        title="ТОП-10 товарных групп по импорту",
-        xaxis_title="Объём (млрд USD)",
-        yaxis_title="Товарная группа",
-        height=500,
-        margin=dict(l=200),
-        font=dict(family="Arial", size=10),
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    @metrics.instrument("update_all_figures")
+    def update_all_figures(dummy_input):
+        figures = data_manager.current.figures
+        return [figures.figure(graph_id) for graph_id in GRAPH_IDS]
+
+elif RENDER_MODE == "callbacks":
+    def _register_figure_callback(graph_id):
+        @app.callback(
+            Output(graph_id, "figure"),
+            Input(graph_id, "id") # Dummy input
+        )
+        @metrics.instrument(f"update_figure:{graph_id}")
+        def update_figure(dummy_input):
+            return data_manager.current.figures.figure(graph_id)
+
+    for graph_id in GRAPH_IDS:
+        _register_figure_callback(graph_id)
+
+elif RENDER_MODE == "progressive":
+    # Фигура графика ниже первого экрана; обычно отвечает serve_precompressed
+    def _register_lazy_callback(graph_id):
+        @app.callback(
+            Output(graph_id, "figure"),
+            Input(f"{graph_id}-visible", "data"),
+            prevent_initial_call=True
+        )
+        @metrics.instrument(f"load_lazy_figure:{graph_id}")
+        def load_lazy_figure(visible):
+            return data_manager.current.figures.figure(graph_id)
+
+    for graph_id in LAZY_GRAPHS:
+        _register_lazy_callback(graph_id)
+
+elif RENDER_MODE == "clientside":
+    # Все графики строит браузер из dcc.Store, запроса к серверу нет
+    app.clientside_callback(
+        ClientsideFunction(namespace="dashboard", function_name="figures"),
+        [Output(graph_id, "figure") for graph_id in GRAPH_IDS],
+        Input(STORE_ID, "data")
     )
-    
-    return fig
 
-# Callback для экономических секторов
-@app.callback(
-    Output("economic-sectors-chart", "figure"),
-    Input("economic-sectors-chart", "id") # Dummy input
-)
-def update_economic_sectors(dummy_input):
-    df = pd.DataFrame(data["economic_sectors"])
-
-    # Переводим значения в млрд и считаем доли
-    df["X_bln"] = df["X"] / 1_000_000_000
-    df["M_bln"] = df["M"] / 1_000_000_000
-    total_export = df["X_bln"].sum()
-    total_import = df["M_bln"].sum()
-    df["export_pct"] = df["X_bln"] / total_export * 100
-    df["import_pct"] = df["M_bln"] / total_import * 100
-
-    # Сокращаем названия секторов
-    df["short_sector"] = df["sector"].apply(lambda x: (x[:25] + "...") if len(x) > 25 else x)
-
-    fig = make_subplots(rows=1, cols=2, specs=[[{"type": "domain"}, {"type": "domain"}]],
-                        subplot_titles=("Доля экспорта по секторам", "Доля импорта по секторам"))
-
-    fig.add_trace(go.Pie(
-        labels=df["short_sector"],
-        values=df["export_pct"],
-        hole=0.4,
-        name="Экспорт",
-        hovertemplate="%{label}<br>%{value:.1f}%<extra></extra>"
-    ), row=1, col=1)
-
-    fig.add_trace(go.Pie(
-        labels=df["short_sector"],
-        values=df["import_pct"],
-        hole=0.4,
-        name="Импорт",
-        hovertemplate="%{label}<br>%{value:.1f}%<extra></extra>"
-    ), row=1, col=2)
-
-    fig.update_layout(
-        height=500,
-        title_text="Распределение экспорта и импорта по секторам",
-        showlegend=False,
-        font=dict(family="Arial", size=10),
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)"
-    )
 
-    return fig
+# В режиме нескольких стран колбэки страницы узнают страну по пути
+PAGE_STATE = [State("url", "pathname")] if reporter_registry is not None else []
 
-# Callback для географии торговли
-@app.callback(
-    Output("trade-geography-chart", "figure"),
-    Input("trade-geography-chart", "id") # Dummy input
-)
-def update_trade_geography(dummy_input):
-    df = pd.DataFrame(data["trade_geography"])
-
-    # Исключаем неизвестные регионы
-    df_filtered = df[df["world_part"] != "Неизвестно"].copy()
-    df_filtered["export_pct"] = df_filtered["export_share"] * 100
-    df_filtered["import_pct"] = df_filtered["import_share"] * 100
-    df_filtered["X_bln"] = df_filtered["X"] / 1_000_000_000
-    df_filtered["M_bln"] = df_filtered["M"] / 1_000_000_000
-    
-    fig = go.Figure()
-    
-    # Экспорт
-    fig.add_trace(go.Bar(
-        x=df_filtered["world_part"],
-        y=df_filtered["export_pct"],
-        name="Экспорт",
-        marker_color="#27ae60",
-        text=[f"{val:.1f}%" for val in df_filtered["export_pct"]],
-        textposition="inside",
-        hovertemplate="%{x}<br>Экспорт: %{customdata}<br>Доля: %{text}<extra></extra>",
-        customdata=[fmt_ru(val) for val in df_filtered["X_bln"]]
-    ))
-    
-    # Импорт
-    fig.add_trace(go.Bar(
-        x=df_filtered["world_part"],
-        y=df_filtered["import_pct"],
-        name="Импорт",
-        marker_color="#e74c3c",
-        text=[f"{val:.1f}%" for val in df_filtered["import_pct"]],
-        textposition="inside",
-        hovertemplate="%{x}<br>Импорт: %{customdata}<br>Доля: %{text}<extra></extra>",
-        customdata=[fmt_ru(val) for val in df_filtered["M_bln"]]
-    ))
-    
-    fig.update_layout(
-        title="Доля торговли по регионам мира",
-        xaxis_title="Регион",
-        yaxis_title="Доля в торговле (%)",
-        barmode="group",
-        height=400,
-        font=dict(family="Arial", size=12),
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
-    )
-    
-    return fig
 
-# Callback для ТОП-10 стран-партнёров
-@app.callback(
-    Output("top-countries-chart", "figure"),
-    Input("top-countries-chart", "id") # Dummy input
-)
-def update_top_countries(dummy_input):
-    df_all = pd.DataFrame(data["top_partner_countries"])
-    germany_row = df_all[df_all["country_name"] == "Германия"].iloc[0]
-    turnover_bln = germany_row["turnover_bln"]
-    export_bln = germany_row.get("export_bln", germany_row["X"] / 1_000_000_000)
-    import_bln = germany_row.get("import_bln", germany_row["M"] / 1_000_000_000)
-    df = df_all
-
-    # Use the pre-calculated balance_bln and turnover_bln from data_preparation.py
-    colors = ["#27ae60" if bal >= 0 else "#e74c3c" for bal in df["balance_bln"]]
-    
-    fig = go.Figure(go.Bar(
-        x=df["country_name"],
-        y=df["turnover_bln"],
-        marker_color=colors,
-        text=[fmt_ru(val) for val in df["turnover_bln"]],
-        textposition="outside",
-        hovertemplate="%{x}<br>Общий объём торговли: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val) for val in df["turnover_bln"]]
-    ))
-    
-    fig.update_layout(
-        title="ТОП-10 стран-партнёров по общему объёму торговли",
-        xaxis_title="Страна",
-        yaxis_title="Объём торговли (млрд USD)",
-        height=400,
-        font=dict(family="Arial", size=10),
-        xaxis_tickangle=-45,
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+if reporter_registry is not None:
+    # Страница страны; обычно отвечает serve_precompressed готовыми байтами
+    @app.callback(
+        Output("reporter-page", "children"),
+        Input("url", "pathname")
     )
-    
-    return fig
-
-# Callback для торговли с Россией
-@app.callback(
-    Output("russia-trade-chart", "figure"),
-    Input("russia-trade-chart", "id") # Dummy input
-)
-def update_russia_trade(dummy_input):
-    df = pd.DataFrame(data["russia_trade_dynamics"])
-    
-    if df.empty:
-        # Если нет данных по России, показываем пустой график
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Нет данных по торговле с Россией",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16, color="gray")
-        )
-        fig.update_layout(
-            title="Торговля с Россией (5 лет)",
-            height=400,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-            paper_bgcolor="rgba(0,0,0,0)" # Transparent background
-        )
-        return fig
-
-    df["year"] = df["year"].astype(int) # Ensure years are integers
-    df["X_mln"] = df["X"] / 1_000_000  # Convert to millions
-    df["M_mln"] = df["M"] / 1_000_000
-    df["balance_mln"] = df["balance"] / 1_000_000 if "balance" in df.columns else (df["X"] - df["M"]) / 1_000_000
-
-    fig = go.Figure()
-    
-    # Экспорт
-    fig.add_trace(go.Scatter(
-        x=df["year"],
-        y=df["X_mln"],
-        mode="lines+markers",
-        name="Экспорт",
-        line=dict(color="#27ae60", width=3),
-        marker=dict(size=6),
-        hovertemplate="Год: %{x}<br>Экспорт: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val / 1_000) for val in df["X_mln"]] # Convert to billions for fmt_ru
-    ))
-    
-    # Импорт
-    fig.add_trace(go.Scatter(
-        x=df["year"],
-        y=df["M_mln"],
-        mode="lines+markers",
-        name="Импорт",
-        line=dict(color="#e74c3c", width=3),
-        marker=dict(size=6),
-        hovertemplate="Год: %{x}<br>Импорт: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val / 1_000) for val in df["M_mln"]] # Convert to billions for fmt_ru
-    ))
-    
-    # Сальдо
-    fig.add_trace(go.Scatter(
-        x=df["year"],
-        y=df["balance_mln"],
-        mode="lines+markers",
-        name="Сальдо",
-        line=dict(color="#3498db", width=3),
-        marker=dict(size=6),
-        hovertemplate="Год: %{x}<br>Сальдо: %{customdata}<extra></extra>",
-        customdata=[fmt_ru(val / 1_000) for val in df["balance_mln"]]
-    ))
-
-    fig.update_layout(
-        title="Торговля с Россией (5 лет)",
-        xaxis_title="Год",
-        yaxis_title="Объём торговли (млн USD)",
-        hovermode="x unified",
-        legend=dict(x=0.02, y=0.98),
-        height=400,
-        font=dict(family="Arial", size=12),
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    @metrics.instrument("render_reporter_page")
+    def render_reporter_page(pathname):
+        return current_snapshot(pathname, visit=True).layout
+
+    @app.callback(
+        Output("url", "pathname"),
+        Input("reporter-select", "value"),
+        prevent_initial_call=True
     )
-    
-    return fig
-
-# Callback для изменений структуры торговли
-@app.callback(
-    Output("structure-changes-chart", "figure"),
-    Input("structure-changes-chart", "id") # Dummy input
-)
-def update_structure_changes(dummy_input):
-    df = pd.DataFrame(data["declining_commodities"])
-    
-    if df.empty:
-        # Если нет данных, показываем пустой график
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Недостаточно данных для анализа изменений структуры",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16, color="gray")
-        )
-        fig.update_layout(
-            title="Изменения структуры экспорта (10 лет)",
-            height=400,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-            paper_bgcolor="rgba(0,0,0,0)" # Transparent background
-        )
-        return fig
-    
-    df["change_bln"] = df["change"] / 1_000_000_000
-    
-    # Сокращаем названия товарных групп
-    df["short_name"] = df["commodity_name"].apply(lambda x: (x[:25] + "...") if len(x) > 25 else x)
-    
-    fig = go.Figure(go.Bar(
-        x=df["change_bln"],
-        y=df["short_name"],
-        orientation="h",
-        marker_color="#e74c3c",
-        text=[fmt_ru(val) for val in df["change_bln"]],
-        textposition="inside",
-        textfont=dict(color="white", size=10),
-        hovertemplate="%{customdata}<br>Изменение: %{text}<extra></extra>",
-        customdata=df["commodity_name"]
-    ))
-    
-    fig.update_layout(
-        title="Товарные группы с наибольшим снижением объёмов торговли",
-        xaxis_title="Изменение объёма (млрд USD)",
-        yaxis_title="Товарная группа",
-        height=400,
-        margin=dict(l=200),
-        font=dict(family="Arial", size=10),
-        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
-        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    @metrics.instrument("select_reporter")
+    def select_reporter(reporter):
+        return f"/{reporter}"
+
+
+if RENDER_MODE == "clientside":
+    # Слайдер лет и карточка партнёра пересчитываются в браузере по тем же данным
+    app.clientside_callback(
+        ClientsideFunction(namespace="dashboard", function_name="tradeDynamics"),
+        Output("trade-dynamics-chart", "figure", allow_duplicate=True),
+        [Output(value_id, "children") for value_id, _, _ in KPI_CARDS],
+        Input("year-range", "value"),
+        State(STORE_ID, "data"),
+        prevent_initial_call=True
     )
-    
-    return fig
-
-# Callback для топ-5 прироста экспорта
-@app.callback(
-    Output("top-growth-export-chart", "figure"),
-    Input("top-growth-export-chart", "id") # Dummy input
-)
-def update_top_growth_export(dummy_input):
-    df = pd.DataFrame(data["export_growth"])
-    
-    if df.empty:
-        # Если нет данных, показываем пустой график
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Нет данных по приросту экспорта",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16, color="gray")
-        )
-        fig.update_layout(
-            title="Топ-5 прироста по экспорту (2021→2023)",
-            height=400,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)"
-        )
-        return fig
-    
-    # Сокращаем названия товарных групп
-    df["short_name"] = df["commodity_name"].apply(lambda x: (x[:35] + "...") if len(x) > 35 else x)
-    
-    fig = go.Figure(go.Bar(
-        x=df["delta"],
-        y=df["short_name"],
-        orientation="h",
-        marker_color="#28a745",  # Зеленый цвет для экспорта
-        text=[fmt_ru(val) for val in df["delta"]],
-        textposition="inside",
-        textfont=dict(color="white", size=10),
-        hovertemplate="%{customdata}<br>Прирост: %{text}<extra></extra>",
-        customdata=df["commodity_name"]
-    ))
-    
-    fig.update_layout(
-        title="Топ-5 прироста по экспорту (2021→2023)",
-        xaxis_title="Прирост объёма (млрд USD)",
-        yaxis_title="Товарная группа",
-        height=400,
-        margin=dict(l=200),
-        font=dict(family="Arial", size=10),
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    app.clientside_callback(
+        ClientsideFunction(namespace="dashboard", function_name="partnerCard"),
+        Output("partner-title", "children"),
+        [Output(value_id, "children") for value_id, _, _ in PARTNER_FIELDS],
+        Input("partner-select", "value"),
+        State(STORE_ID, "data"),
+        prevent_initial_call=True
     )
-    
-    return fig
 
-# Callback для топ-5 прироста импорта
-@app.callback(
-    Output("top-growth-import-chart", "figure"),
-    Input("top-growth-import-chart", "id") # Dummy input
-)
-def update_top_growth_import(dummy_input):
-    df = pd.DataFrame(data["import_growth"])
-    
-    if df.empty:
-        # Если нет данных, показываем пустой график
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Нет данных по приросту импорта",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16, color="gray")
+else:
+    # Диапазон лет для динамики торговли: срез готовой фигуры и итоги по префиксным суммам
+    @app.callback(
+        Output("trade-dynamics-chart", "figure", allow_duplicate=True),
+        [Output(value_id, "children") for value_id, _, _ in KPI_CARDS],
+        Input("year-range", "value"),
+        *PAGE_STATE,
+        prevent_initial_call=True
+    )
+    @metrics.instrument("update_trade_dynamics")
+    def update_trade_dynamics(year_range, *page):
+        snapshot = current_snapshot(*page)
+        start_year, end_year = year_range
+        figure = snapshot.figures.figure("trade-dynamics-chart")
+        series = snapshot.series.get("trade-dynamics-chart")
+        if series is not None:
+            # В прореженной фигуре индексы точек не совпадают с индексами лет
+            figure = series.figure(figure, start_year, end_year)
+        else:
+            start, stop = snapshot.trade_totals.window(start_year, end_year)
+            figure = slice_figure(figure, start, stop)
+        return [figure, *kpi_values(snapshot.trade_totals.totals(start_year, end_year))]
+
+    # Смена ключевого партнёра: готовые строки карточки из индекса по стране
+    @app.callback(
+        Output("partner-title", "children"),
+        [Output(value_id, "children") for value_id, _, _ in PARTNER_FIELDS],
+        Input("partner-select", "value"),
+        *PAGE_STATE,
+        prevent_initial_call=True
+    )
+    @metrics.instrument("update_partner_card")
+    def update_partner_card(country, *page):
+        card = current_snapshot(*page).partners.card(country)
+        if card is None:
+            return [f"Ключевой партнёр — {country}", *["—" for _ in PARTNER_FIELDS]]
+        return [f"Ключевой партнёр — {country}", *[card[key] for _, _, key in PARTNER_FIELDS]]
+
+
+    # Зум прореженного графика: relayoutData фильтруется в браузере, и на сервер
+    # уходит только новый диапазон оси x (null - сброс к обзору). autosize при
+    # первой отрисовке и зум графиков без прореживания запросов не порождают.
+    ZOOM_FILTER = """
+    function (relayout, figure) {
+        var noUpdate = window.dash_clientside.no_update;
+        if (!relayout || !figure || !figure.data.length || figure.data[0].type !== "scattergl") {
+            return noUpdate;
+        }
+        if (relayout["xaxis.autorange"]) {
+            return null;
+        }
+        if (relayout["xaxis.range[0]"] !== undefined) {
+            return [relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]];
+        }
+        return relayout["xaxis.range"] || noUpdate;
+    }
+    """
+
+    def _register_zoom_callback(graph_id):
+        app.clientside_callback(
+            ZOOM_FILTER,
+            Output(f"{graph_id}-window", "data"),
+            Input(graph_id, "relayoutData"),
+            State(graph_id, "figure"),
+            prevent_initial_call=True
         )
-        fig.update_layout(
-            title="Топ-5 прироста по импорту (2021→2023)",
-            height=400,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False),
-            plot_bgcolor="rgba(0,0,0,0)",
-            paper_bgcolor="rgba(0,0,0,0)"
+
+        @app.callback(
+            Output(graph_id, "figure", allow_duplicate=True),
+            Input(f"{graph_id}-window", "data"),
+            *PAGE_STATE,
+            prevent_initial_call=True
         )
-        return fig
-    
-    # Сокращаем названия товарных групп
-    df["short_name"] = df["commodity_name"].apply(lambda x: (x[:35] + "...") if len(x) > 35 else x)
-    
-    fig = go.Figure(go.Bar(
-        x=df["delta"],
-        y=df["short_name"],
-        orientation="h",
-        marker_color="#ff5733",  # Красно-оранжевый цвет для импорта
-        text=[fmt_ru(val) for val in df["delta"]],
-        textposition="inside",
-        textfont=dict(color="white", size=10),
-        hovertemplate="%{customdata}<br>Прирост: %{text}<extra></extra>",
-        customdata=df["commodity_name"]
-    ))
-    
-    fig.update_layout(
-        title="Топ-5 прироста по импорту (2021→2023)",
-        xaxis_title="Прирост объёма (млрд USD)",
-        yaxis_title="Товарная группа",
-        height=400,
-        margin=dict(l=200),
-        font=dict(family="Arial", size=10),
-        plot_bgcolor="rgba(0,0,0,0)",
-        paper_bgcolor="rgba(0,0,0,0)",
-        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
-        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+        @metrics.instrument(f"zoom_series:{graph_id}")
+        def zoom_series(window, *page):
+            snapshot = current_snapshot(*page)
+            series = snapshot.series.get(graph_id)
+            if series is None:
+                return dash.no_update
+            x0, x1 = window if window else (None, None)
+            return series.figure(snapshot.figures.figure(graph_id), x0, x1)
+
+    for graph_id in ZOOM_SERIES:
+        _register_zoom_callback(graph_id)
+
+
+if cube_file is not None:
+    @app.callback(
+        [Output(graph_id, "figure", allow_duplicate=True) for graph_id in RANKING_TITLES],
+        Input("ranking-n", "value"),
+        Input("ranking-years", "value"),
+        prevent_initial_call=True
     )
-    
-    return fig
+    @metrics.instrument("update_rankings")
+    def update_rankings(n, year_range):
+        first, last = year_range
+        sections = TradeData(ranking_sections(cube_file.current, n, first, last))
+        windows = ranking_windows(n, first, last)
+        # Столбцы подставляются в готовые фигуры снимка, без сборки go.Figure
+        figures = data_manager.current.figures
+        return [refill_ranking(figures.figure(graph_id), graph_id, sections, title.format(**windows))
+                for graph_id, title in RANKING_TITLES.items()]
+
+
+if partner_shards is not None:
+    @app.callback(
+        Output("russia-trade-chart", "figure", allow_duplicate=True),
+        Output("bilateral-title", "children"),
+        Input("bilateral-partner", "value"),
+        prevent_initial_call=True
+    )
+    @metrics.instrument("update_bilateral_trade")
+    def update_bilateral_trade(country):
+        # Очищенный список или страна, пропавшая из рядов: график остаётся прежним
+        if not country or country not in partner_shards:
+            return dash.no_update, dash.no_update
+        # Ряд страны читается с диска при первом обращении и остаётся в LRU-кэше
+        series = partner_shards.series(country)
+        title = f"Торговля: {REPORTER_NAME} — {country} ({BILATERAL_YEARS} лет)"
+        fig = build_bilateral_trade(table(series[-BILATERAL_YEARS:], "russia_trade_dynamics"), title=title,
+                                    empty_text=f"Нет данных по торговле: {country}")
+        return fig, title
+
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8050))
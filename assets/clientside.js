@@ -0,0 +1,295 @@
+// Построение фигур в браузере для DASH_RENDER_MODE=clientside (см. clientside.py).
+// Повторяет figures.py и formatting.py: те же трассы, подписи и оформление,
+// но из компактных колонок dcc.Store, без запросов к серверу.
+(function () {
+    var BLN = 1000000000;
+    var MLN = 1000000;
+    var TRANSPARENT = "rgba(0,0,0,0)";
+    var GRID = "rgba(0,0,0,0.05)";
+
+    // fmt_ru: сумма в млрд USD -> "1 234.5 млрд USD" или "12.3 млн USD"
+    function fmtRu(v) {
+        if (v === null || v === undefined || isNaN(v)) {
+            return "";
+        }
+        var abs = Math.abs(v);
+        var sign = v < 0 ? "-" : "";
+        if (abs >= 1) {
+            return sign + group(abs.toFixed(1)) + " млрд USD";
+        }
+        return sign + group((abs * 1000).toFixed(1)) + " млн USD";
+    }
+
+    function group(text) {
+        var parts = text.split(".");
+        parts[0] = parts[0].replace(/\B(?=(\d{3})+(?!\d))/g, ",");
+        return parts.join(".").replace(/,/g, " ");
+    }
+
+    function shorten(name, width) {
+        return name.length > width ? name.slice(0, width) + "..." : name;
+    }
+
+    function scale(values, divisor) {
+        return values.map(function (v) { return v / divisor; });
+    }
+
+    // Раздел из dcc.Store: колонка -> массив, строковые колонки раскодированы
+    function section(store, name) {
+        var raw = store.sections[name];
+        var table = {rows: raw.rows};
+        Object.keys(raw.columns).forEach(function (column) {
+            var values = raw.columns[column];
+            if (raw.text.indexOf(column) >= 0) {
+                values = values.map(function (code) { return store.strings[code]; });
+            }
+            table[column] = values;
+        });
+        return table;
+    }
+
+    function layout(store, options) {
+        var result = {template: store.template, plot_bgcolor: TRANSPARENT, paper_bgcolor: TRANSPARENT};
+        Object.keys(options).forEach(function (key) { result[key] = options[key]; });
+        return result;
+    }
+
+    function emptyFigure(store, title, text) {
+        return {data: [], layout: layout(store, {
+            annotations: [{text: text, xref: "paper", yref: "paper", x: 0.5, y: 0.5,
+                           showarrow: false, font: {size: 16, color: "gray"}}],
+            title: {text: title}, height: 400, xaxis: {visible: false}, yaxis: {visible: false}
+        })};
+    }
+
+    function line(name, color, x, y, labels, label) {
+        return {
+            customdata: labels, hovertemplate: "Год: %{x}<br>" + label + ": %{customdata}<extra></extra>",
+            line: {color: color, width: 3}, marker: {size: 6}, mode: "lines+markers",
+            name: name, x: x, y: y, type: "scatter"
+        };
+    }
+
+    // Срез строк [start, stop) всех колонок раздела
+    function slice(table, start, stop) {
+        var result = {rows: Math.max(stop - start, 0)};
+        Object.keys(table).forEach(function (column) {
+            if (column !== "rows") {
+                result[column] = table[column].slice(start, stop);
+            }
+        });
+        return result;
+    }
+
+    function tradeDynamics(store, table) {
+        var x = scale(table.X, BLN), m = scale(table.M, BLN), balance = scale(table.balance, BLN);
+        var saldo = line("Сальдо", "#3498db", table.year, balance, balance.map(fmtRu), "Сальдо");
+        saldo.yaxis = "y2";
+        return {data: [
+            line("Экспорт", "#27ae60", table.year, x, x.map(fmtRu), "Экспорт"),
+            line("Импорт", "#e74c3c", table.year, m, m.map(fmtRu), "Импорт"),
+            saldo
+        ], layout: layout(store, {
+            yaxis: {title: {text: "Объём торговли (млрд USD)"}, side: "left", tickformat: ".1f", gridcolor: GRID},
+            yaxis2: {title: {text: "Торговое сальдо (млрд USD)"}, side: "right", overlaying: "y",
+                     tickformat: ".1f", gridcolor: GRID},
+            legend: {x: 0.02, y: 0.98}, font: {family: "Arial", size: 12},
+            title: {text: "Динамика экспорта, импорта и торгового сальдо"}, xaxis: {title: {text: "Год"}},
+            hovermode: "x unified", height: 400
+        })};
+    }
+
+    // Горизонтальные столбцы по товарным группам (ТОП, снижение, прирост)
+    function commodityBars(store, table, values, options) {
+        var labels = values.map(fmtRu);
+        return {data: [{
+            customdata: table.commodity_name, hovertemplate: "%{customdata}<br>" + options.label + ": %{text}<extra></extra>",
+            marker: {color: options.color}, orientation: "h", text: labels,
+            textfont: {color: "white", size: 10}, textposition: "inside", x: values,
+            y: table.commodity_name.map(function (name) { return shorten(name, options.width); }), type: "bar"
+        }], layout: layout(store, {
+            margin: {l: 200}, font: {family: "Arial", size: 10},
+            xaxis: {title: {text: options.xTitle}, gridcolor: GRID},
+            yaxis: {title: {text: "Товарная группа"}, gridcolor: GRID},
+            title: {text: options.title}, height: options.height
+        })};
+    }
+
+    function topCommodities(store, table, color, title) {
+        return commodityBars(store, table, scale(table.primaryValue, BLN), {
+            label: "Объём", color: color, width: 35, xTitle: "Объём (млрд USD)", title: title, height: 500
+        });
+    }
+
+    function sum(values) {
+        return values.reduce(function (total, v) { return total + v; }, 0);
+    }
+
+    function economicSectors(store, table) {
+        var x = scale(table.X, BLN), m = scale(table.M, BLN);
+        var totalX = sum(x), totalM = sum(m);
+        var labels = table.sector.map(function (name) { return shorten(name, 25); });
+        function pie(name, values, domain) {
+            return {hole: 0.4, hovertemplate: "%{label}<br>%{value:.1f}%<extra></extra>", labels: labels,
+                    name: name, values: values, type: "pie", domain: {x: domain, y: [0.0, 1.0]}};
+        }
+        function subtitle(text, x) {
+            return {font: {size: 16}, showarrow: false, text: text, x: x, xanchor: "center", xref: "paper",
+                    y: 1.0, yanchor: "bottom", yref: "paper"};
+        }
+        return {data: [
+            pie("Экспорт", x.map(function (v) { return v / totalX * 100; }), [0.0, 0.45]),
+            pie("Импорт", m.map(function (v) { return v / totalM * 100; }), [0.55, 1.0])
+        ], layout: layout(store, {
+            annotations: [subtitle("Доля экспорта по секторам", 0.225), subtitle("Доля импорта по секторам", 0.775)],
+            title: {text: "Распределение экспорта и импорта по секторам"},
+            font: {family: "Arial", size: 10}, height: 500, showlegend: false
+        })};
+    }
+
+    function tradeGeography(store, table) {
+        var rows = [];
+        table.world_part.forEach(function (name, i) {
+            if (name !== "Неизвестно") {
+                rows.push(i);
+            }
+        });
+        var regions = rows.map(function (i) { return table.world_part[i]; });
+        function bar(name, color, share, values, label) {
+            var pct = rows.map(function (i) { return share[i] * 100; });
+            return {
+                customdata: rows.map(function (i) { return fmtRu(values[i] / BLN); }),
+                hovertemplate: "%{x}<br>" + label + ": %{customdata}<br>Доля: %{text}<extra></extra>",
+                marker: {color: color}, name: name,
+                text: pct.map(function (v) { return v.toFixed(1) + "%"; }),
+                textposition: "inside", x: regions, y: pct, type: "bar"
+            };
+        }
+        return {data: [
+            bar("Экспорт", "#27ae60", table.export_share, table.X, "Экспорт"),
+            bar("Импорт", "#e74c3c", table.import_share, table.M, "Импорт")
+        ], layout: layout(store, {
+            font: {family: "Arial", size: 12}, xaxis: {title: {text: "Регион"}, gridcolor: GRID},
+            yaxis: {title: {text: "Доля в торговле (%)"}, gridcolor: GRID},
+            title: {text: "Доля торговли по регионам мира"}, barmode: "group", height: 400
+        })};
+    }
+
+    function topCountries(store, table) {
+        var labels = table.turnover_bln.map(fmtRu);
+        return {data: [{
+            customdata: labels, hovertemplate: "%{x}<br>Общий объём торговли: %{customdata}<extra></extra>",
+            marker: {color: table.balance_bln.map(function (v) { return v >= 0 ? "#27ae60" : "#e74c3c"; })},
+            text: labels, textposition: "outside", x: table.country_name, y: table.turnover_bln, type: "bar"
+        }], layout: layout(store, {
+            font: {family: "Arial", size: 10},
+            xaxis: {title: {text: "Страна"}, tickangle: -45, gridcolor: GRID},
+            yaxis: {title: {text: "Объём торговли (млрд USD)"}, gridcolor: GRID},
+            title: {text: "ТОП-10 стран-партнёров по общему объёму торговли"}, height: 400
+        })};
+    }
+
+    function russiaTrade(store, table) {
+        var title = "Торговля с Россией (5 лет)";
+        if (!table.rows) {
+            return emptyFigure(store, title, "Нет данных по торговле с Россией");
+        }
+        var x = scale(table.X, MLN), m = scale(table.M, MLN), balance = scale(table.balance, MLN);
+        function labels(values) {
+            return values.map(function (v) { return fmtRu(v / 1000); });
+        }
+        return {data: [
+            line("Экспорт", "#27ae60", table.year, x, labels(x), "Экспорт"),
+            line("Импорт", "#e74c3c", table.year, m, labels(m), "Импорт"),
+            line("Сальдо", "#3498db", table.year, balance, labels(balance), "Сальдо")
+        ], layout: layout(store, {
+            legend: {x: 0.02, y: 0.98}, font: {family: "Arial", size: 12},
+            xaxis: {title: {text: "Год"}, gridcolor: GRID},
+            yaxis: {title: {text: "Объём торговли (млн USD)"}, gridcolor: GRID},
+            title: {text: title}, hovermode: "x unified", height: 400
+        })};
+    }
+
+    function structureChanges(store, table) {
+        if (!table.rows) {
+            return emptyFigure(store, "Изменения структуры экспорта (10 лет)",
+                               "Недостаточно данных для анализа изменений структуры");
+        }
+        return commodityBars(store, table, scale(table.change, BLN), {
+            label: "Изменение", color: "#e74c3c", width: 25, xTitle: "Изменение объёма (млрд USD)",
+            title: "Товарные группы с наибольшим снижением объёмов торговли", height: 400
+        });
+    }
+
+    function growth(store, table, title, emptyText, color) {
+        if (!table.rows) {
+            return emptyFigure(store, title, emptyText);
+        }
+        return commodityBars(store, table, table.delta, {
+            label: "Прирост", color: color, width: 35, xTitle: "Прирост объёма (млрд USD)", title: title, height: 400
+        });
+    }
+
+    // Порядок совпадает с figures.FIGURE_BUILDERS (и выходами колбэка в app.py)
+    var BUILDERS = [
+        function (s) { return tradeDynamics(s, section(s, "trade_dynamics")); },
+        function (s) { return topCommodities(s, section(s, "top_export_commodities"), "#27ae60", "ТОП-10 товарных групп по экспорту"); },
+        function (s) { return topCommodities(s, section(s, "top_import_commodities"), "rgba(0,123,255,0.8)", "ТОП-10 товарных групп по импорту"); },
+        function (s) { return economicSectors(s, section(s, "economic_sectors")); },
+        function (s) { return tradeGeography(s, section(s, "trade_geography")); },
+        function (s) { return topCountries(s, section(s, "top_partner_countries")); },
+        function (s) { return russiaTrade(s, section(s, "russia_trade_dynamics")); },
+        function (s) { return structureChanges(s, section(s, "declining_commodities")); },
+        function (s) { return growth(s, section(s, "export_growth"), "Топ-5 прироста по экспорту (2021→2023)", "Нет данных по приросту экспорта", "#28a745"); },
+        function (s) { return growth(s, section(s, "import_growth"), "Топ-5 прироста по импорту (2021→2023)", "Нет данных по приросту импорта", "#ff5733"); }
+    ];
+
+    // Итоги за диапазон лет, как trade_totals.TradeTotals.totals
+    function totals(table, first, last) {
+        var rows = [];
+        table.year.forEach(function (year, i) {
+            if (year >= first && year <= last) {
+                rows.push(i);
+            }
+        });
+        rows.sort(function (a, b) { return table.year[a] - table.year[b]; });
+        var result = {cagr: null};
+        ["X", "M", "balance"].forEach(function (key) {
+            result[key] = sum(rows.map(function (i) { return table[key][i]; }));
+        });
+        var periods = rows.length - 1;
+        if (periods > 0 && table.X[rows[0]] > 0) {
+            result.cagr = Math.pow(table.X[rows[rows.length - 1]] / table.X[rows[0]], 1 / periods) - 1;
+        }
+        return {rows: rows, values: result};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            figures: function (store) {
+                return BUILDERS.map(function (build) { return build(store); });
+            },
+
+            tradeDynamics: function (yearRange, store) {
+                var table = section(store, "trade_dynamics");
+                var result = totals(table, yearRange[0], yearRange[1]);
+                var rows = result.rows;
+                var figure = tradeDynamics(store, slice(table, rows.length ? rows[0] : 0,
+                                                        rows.length ? rows[rows.length - 1] + 1 : 0));
+                var v = result.values;
+                return [figure, fmtRu(v.X / BLN), fmtRu(v.M / BLN), fmtRu(v.balance / BLN),
+                        v.cagr === null ? "—" : (v.cagr * 100).toFixed(1) + "%"];
+            },
+
+            partnerCard: function (country, store) {
+                var table = section(store, "top_partner_countries");
+                var title = "Ключевой партнёр — " + country;
+                var i = table.rows ? table.country_name.indexOf(country) : -1;
+                if (i < 0) {
+                    return [title, "—", "—", "—"];
+                }
+                return [title, fmtRu(table.turnover_bln[i]), fmtRu(table.X[i] / BLN), fmtRu(table.M[i] / BLN)];
+            }
+        }
+    });
+})();
@@ -0,0 +1,60 @@
+// Ленивая загрузка графиков для DASH_RENDER_MODE=progressive (см. app.py).
+// Контейнер графика ниже первого экрана помечен data-lazy="<id графика>";
+// когда он подходит к области видимости, в dcc.Store "<id>-visible" пишется
+// true, и серверный колбэк присылает фигуру вместо заглушки.
+(function () {
+    // Загрузка начинается чуть раньше, чем график покажется на экране
+    var MARGIN = "200px";
+
+    function load(element) {
+        window.dash_clientside.set_props(element.getAttribute("data-lazy") + "-visible", {data: true});
+    }
+
+    var observer = null;
+    if ("IntersectionObserver" in window) {
+        observer = new IntersectionObserver(function (entries) {
+            entries.forEach(function (entry) {
+                if (entry.isIntersecting) {
+                    observer.unobserve(entry.target);
+                    load(entry.target);
+                }
+            });
+        }, {rootMargin: MARGIN});
+    }
+
+    function watch(element) {
+        if (element.lazyObserved) {
+            return;
+        }
+        element.lazyObserved = true;
+        // Без IntersectionObserver графики загружаются сразу
+        if (observer) {
+            observer.observe(element);
+        } else {
+            load(element);
+        }
+    }
+
+    function scan(root) {
+        if (root.matches && root.matches("[data-lazy]")) {
+            watch(root);
+        }
+        if (root.querySelectorAll) {
+            root.querySelectorAll("[data-lazy]").forEach(watch);
+        }
+    }
+
+    // Dash рисует макет уже после загрузки скрипта, поэтому контейнеры ищутся
+    // в добавленных узлах; перерисовки Plotly внутри графиков не вызывают
+    // обход всего документа
+    new MutationObserver(function (mutations) {
+        mutations.forEach(function (mutation) {
+            mutation.addedNodes.forEach(function (node) {
+                if (node.nodeType === Node.ELEMENT_NODE) {
+                    scan(node);
+                }
+            });
+        });
+    }).observe(document.documentElement, {childList: true, subtree: true});
+    scan(document);
+})();
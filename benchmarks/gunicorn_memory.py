@@ -0,0 +1,102 @@
+"""Память воркеров и время старта gunicorn с preload_app и без него.
+
+Запускает gunicorn с gunicorn.conf.py, ждёт первого успешного ответа на /,
+прогоняет несколько визитов и снимает память мастера и воркеров из
+/proc/<pid>/smaps_rollup (только Linux). RSS считает общие страницы в каждом
+процессе, поэтому для оценки реального расхода смотрите на PSS и USS
+(Private_Clean + Private_Dirty).
+
+Запуск из корня репозитория:
+    python -m benchmarks.gunicorn_memory [--workers 2] [--json report.json]
+"""
+import argparse
+import json
+import os
+import time
+import urllib.request
+
+from benchmarks.server import start_gunicorn, stop
+
+
+def memory_kb(pid):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": values.get("Rss", 0),
+        "pss": values.get("Pss", 0),
+        "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0),
+    }
+
+
+def children(pid):
+    result = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Поле ppid идёт после имени процесса в скобках
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == pid:
+            result.append(int(entry))
+    return sorted(result)
+
+
+def measure(preload, workers, visits):
+    proc, base, startup = start_gunicorn({
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+    })
+    try:
+        # Ждём, пока поднимутся все воркеры, и даём каждому поработать
+        deadline = time.time() + 60
+        while len(children(proc.pid)) < workers and time.time() < deadline:
+            time.sleep(0.1)
+        for _ in range(visits):
+            for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+                urllib.request.urlopen(base + path, timeout=10).read()
+
+        workers_mem = [memory_kb(pid) for pid in children(proc.pid)]
+        return {
+            "preload": preload,
+            "workers": workers,
+            "startup_s": startup,
+            "master": memory_kb(proc.pid),
+            "worker_memory": workers_mem,
+            "total_pss_kb": memory_kb(proc.pid)["pss"] + sum(m["pss"] for m in workers_mem),
+        }
+    finally:
+        stop(proc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--visits", type=int, default=20)
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    args = parser.parse_args()
+
+    results = [measure(preload, args.workers, args.visits) for preload in (False, True)]
+
+    for r in results:
+        label = "preload" if r["preload"] else "без preload"
+        print(f"{label}: старт до первого ответа {r['startup_s']:.2f} с, "
+              f"суммарный PSS {r['total_pss_kb'] / 1024:.1f} МБ")
+        for i, m in enumerate(r["worker_memory"]):
+            print(f"  воркер {i}: RSS {m['rss'] / 1024:.1f} МБ, "
+                  f"PSS {m['pss'] / 1024:.1f} МБ, USS {m['uss'] / 1024:.1f} МБ")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
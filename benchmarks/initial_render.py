@@ -0,0 +1,76 @@
+"""Сравнение режимов первичной отрисовки (DASH_RENDER_MODE).
+
+Каждый режим запускается в отдельном процессе, чтобы импорт app.py
+и регистрация колбэков не влияли друг на друга. Для каждого режима
+считается число запросов, которое делает один посетитель, объём ответов
+и время до полной отрисовки (все графики получили фигуры) на стороне сервера.
+
+Запуск из корня репозитория:
+    python -m benchmarks.initial_render [--visits 50] [--json report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def run_child(visits):
+    import app
+    from benchmarks.visitor import visit
+
+    client = app.server.test_client()
+    visit(client)  # прогрев
+
+    paint_times = []
+    for _ in range(visits):
+        start = time.perf_counter()
+        timings = visit(client)
+        paint_times.append(time.perf_counter() - start)
+    assert all(status == 200 for _, status, _, _ in timings), timings
+
+    print(json.dumps({
+        "mode": app.RENDER_MODE,
+        "requests": len(timings),
+        "callback_requests": sum(1 for t in timings if t[0] == "/_dash-update-component"),
+        "bytes": sum(t[2] for t in timings),
+        "first_paint_ms_median": statistics.median(paint_times) * 1000,
+        "first_paint_ms_max": max(paint_times) * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--visits", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", default=["callbacks", "batch", "layout", "clientside", "progressive"])
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.visits)
+        return
+
+    results = []
+    for mode in args.modes:
+        env = dict(os.environ, DASH_RENDER_MODE=mode)
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.initial_render", "--child", "--visits", str(args.visits)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'режим':<12} {'запросов':>9} {'колбэков':>9} {'байт':>10} {'медиана, мс':>12} {'макс, мс':>9}")
+    for r in results:
+        print(f"{r['mode']:<12} {r['requests']:>9} {r['callback_requests']:>9} {r['bytes']:>10} "
+              f"{r['first_paint_ms_median']:>12.2f} {r['first_paint_ms_max']:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
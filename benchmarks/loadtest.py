@@ -0,0 +1,224 @@
+"""Нагрузочный тест: N одновременных посетителей против gunicorn.
+
+Каждый посетитель в цикле открывает дашборд так же, как браузер: /,
+/_dash-layout, /_dash-dependencies и все колбэки, срабатывающие при загрузке
+(см. benchmarks.visitor). Соединение держится keep-alive, ответы принимаются
+сжатыми, как у браузера. Для каждой конфигурации воркеров/потоков сервер
+запускается командой из Procfile; итог - пропускная способность и p50/p95/p99
+задержки по каждому эндпоинту.
+
+Запуск из корня репозитория:
+    python -m benchmarks.loadtest --configs 1x4 2x4 --visitors 20 --duration 15
+    python -m benchmarks.loadtest --in-process --visitors 10
+    python -m benchmarks.loadtest --url http://127.0.0.1:8050 --visitors 10
+
+Конфигурация WxT - W процессов gunicorn по T потоков. Клиенты работают в
+потоках этого же процесса; если сам клиент упирается в CPU, запустите
+несколько копий теста параллельно.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+import numpy as np
+
+from benchmarks.server import free_port, start_gunicorn, stop
+from benchmarks.visitor import visit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class HttpResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+
+class HttpClient:
+    """Минимальный клиент с интерфейсом Flask test client поверх keep-alive соединения."""
+
+    def __init__(self, base):
+        url = urllib.parse.urlsplit(base)
+        self.host, self.port = url.hostname, url.port or 80
+        self.accept_encoding = "br, gzip" if brotli else "gzip"
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        headers = {"Accept-Encoding": self.accept_encoding}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Сервер закрыл keep-alive соединение - переподключаемся один раз
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        encoding = response.getheader("Content-Encoding")
+        if encoding == "gzip":
+            data = gzip.decompress(data)
+        elif encoding == "br":
+            data = brotli.decompress(data)
+        return HttpResponse(response.status, data)
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    def post(self, path, json=None):
+        return self.request("POST", path, body=_dumps(json))
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+def _dumps(payload):
+    return json.dumps(payload).encode("utf-8")
+
+
+def run_load(base, visitors, duration):
+    latencies = defaultdict(list)
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    visits = [0]
+
+    def worker():
+        client = HttpClient(base)
+        local = defaultdict(list)
+        done = 0
+        try:
+            while time.monotonic() < deadline:
+                for endpoint, status, _, seconds in visit(client):
+                    local[endpoint].append(seconds)
+                    if status >= 400:
+                        errors.append((endpoint, status))
+                done += 1
+        # Обрыв соединения, таймаут или битый ответ сервера: ошибка посетителя
+        # попадает в отчёт, а не роняет поток нагрузки
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            errors.append(("visit", repr(exc)))
+        finally:
+            client.close()
+        with lock:
+            visits[0] += done
+            for endpoint, values in local.items():
+                latencies[endpoint].extend(values)
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(visitors)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    endpoints = {}
+    for endpoint, values in latencies.items():
+        ms = np.array(values) * 1000
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+        }
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "visitors": visitors,
+        "duration_s": elapsed,
+        "visits": visits[0],
+        "requests": total,
+        "requests_per_s": total / elapsed,
+        "visits_per_s": visits[0] / elapsed,
+        "errors": errors[:20],
+        "error_count": len(errors),
+        "endpoints": endpoints,
+    }
+
+
+def serve_in_process():
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    port = free_port()
+    server = make_server("127.0.0.1", port, app.server, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+def print_result(label, result):
+    print(f"{label}: {result['visitors']} посетителей, {result['visits_per_s']:.1f} визитов/с, "
+          f"{result['requests_per_s']:.1f} запросов/с, ошибок {result['error_count']}")
+    for endpoint, r in sorted(result["endpoints"].items()):
+        print(f"  {endpoint:<26} {r['requests']:>7}  p50 {r['p50_ms']:>7.2f}  "
+              f"p95 {r['p95_ms']:>7.2f}  p99 {r['p99_ms']:>7.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--configs", nargs="+", default=["1x4"],
+                        help="конфигурации gunicorn WxT: воркеры x потоки")
+    parser.add_argument("--visitors", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на конфигурацию")
+    parser.add_argument("--render-mode", help="DASH_RENDER_MODE для сервера")
+    parser.add_argument("--in-process", action="store_true",
+                        help="поднять приложение в этом процессе (werkzeug, потоки) вместо gunicorn")
+    parser.add_argument("--url", help="нагружать уже запущенный сервер")
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    args = parser.parse_args()
+
+    results = []
+    if args.url:
+        result = run_load(args.url, args.visitors, args.duration)
+        print_result(args.url, result)
+        results.append({"target": args.url, **result})
+    elif args.in_process:
+        server, base = serve_in_process()
+        try:
+            result = run_load(base, args.visitors, args.duration)
+        finally:
+            server.shutdown()
+        print_result("in-process", result)
+        results.append({"target": "in-process", **result})
+    else:
+        for config in args.configs:
+            workers, threads = config.split("x")
+            env = {"WEB_CONCURRENCY": workers, "GUNICORN_THREADS": threads}
+            if args.render_mode:
+                env["DASH_RENDER_MODE"] = args.render_mode
+            proc, base, _ = start_gunicorn(env)
+            try:
+                result = run_load(base, args.visitors, args.duration)
+            finally:
+                stop(proc)
+            print_result(f"gunicorn {config}", result)
+            results.append({"target": f"gunicorn {config}", "workers": int(workers),
+                            "threads": int(threads), **result})
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Длинные ряды: полная SVG-фигура против прореженной Scattergl и зум по пирамиде.
+
+Для каждой длины ряда строит синтетическую динамику торговли и замеряет
+построение и JSON графика динамики без прореживания (как до downsampling.py)
+и с ним, сборку пирамиды уровней и ответ на зум в окна разной ширины.
+
+Запуск из корня репозитория:
+    python -m benchmarks.long_series [--points 1000 10000 100000] [--json report.json]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import plotly.io as pio
+
+import figures
+from datamodel import table
+from downsampling import SeriesPyramid
+from figures import ZOOM_SERIES, build_trade_dynamics
+
+
+def series(points, seed=0):
+    rng = np.random.default_rng(seed)
+    walk = np.cumsum(rng.normal(0, 1e8, size=(points, 2)), axis=0) + 3e10
+    return [{"year": 1000 + i, "X": float(x), "M": float(m)} for i, (x, m) in enumerate(walk)]
+
+
+def build(data, webgl_points):
+    # Порог подменяется только на время замера, чтобы получить прежнюю полную фигуру
+    saved, figures.WEBGL_POINTS = figures.WEBGL_POINTS, webgl_points
+    try:
+        start = time.perf_counter()
+        body = pio.to_json(build_trade_dynamics(data), validate=False)
+        return {"ms": 1000 * (time.perf_counter() - start), "bytes": len(body.encode("utf-8"))}
+    finally:
+        figures.WEBGL_POINTS = saved
+
+
+def measure(points, repeats=5):
+    data = {"trade_dynamics": table(series(points), "trade_dynamics")}
+    full = build(data, points)
+    downsampled = build(data, figures.WEBGL_POINTS)
+
+    section, columns, unit = ZOOM_SERIES["trade-dynamics-chart"]
+    model = data[section]
+    start = time.perf_counter()
+    pyramid = SeriesPyramid(model["year"], [model[column] for column in columns], unit)
+    pyramid_ms = 1000 * (time.perf_counter() - start)
+
+    base = json.loads(pio.to_json(build_trade_dynamics(data), validate=False))
+    zoom = {}
+    for fraction in (1, 0.1, 0.01):
+        # Окно доли fraction ряда по центру; при fraction == 1 - весь ряд
+        width = max(int(points * fraction), 1)
+        x0 = 1000 + (points - width) // 2
+        x1 = x0 + width - 1
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            figure = pyramid.figure(base, x0, x1)
+            timings.append(time.perf_counter() - start)
+        zoom[str(fraction)] = {"ms": 1000 * min(timings), "points": len(figure["data"][0]["x"])}
+    return {"points": points, "full": full, "downsampled": downsampled, "pyramid_ms": pyramid_ms, "zoom": zoom}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    args = parser.parse_args()
+
+    # Первое построение фигуры plotly заметно дольше остальных (импорт валидаторов)
+    build({"trade_dynamics": table(series(10), "trade_dynamics")}, 10)
+    report = []
+    for points in args.points:
+        result = measure(points)
+        report.append(result)
+        full, downsampled = result["full"], result["downsampled"]
+        print(f"{points} точек: полная фигура {full['ms']:.1f} мс, {full['bytes'] / 1024:.0f} КБ; "
+              f"прореженная {downsampled['ms']:.1f} мс, {downsampled['bytes'] / 1024:.0f} КБ; "
+              f"пирамида {result['pyramid_ms']:.1f} мс")
+        for fraction, zoom in result["zoom"].items():
+            print(f"  зум {float(fraction):.0%} ряда: {zoom['ms']:.1f} мс, {zoom['points']} точек в трассе")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
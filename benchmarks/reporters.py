@@ -0,0 +1,128 @@
+"""Память одного процесса на много стран против отдельной копии на страну.
+
+Готовит каталог DASHBOARD_REPORTERS из --reporters стран (первая - исходный
+dashboard_data.json, остальные - синтетические), запускает gunicorn в режиме
+нескольких стран и открывает страницу каждой страны. Затем запускает обычный
+дашборд одной страны с тем же числом воркеров. Суммарный PSS первого
+сравнивается с PSS второго, умноженным на число стран, - столько стоили бы
+отдельные развёртывания. Замер памяти - как в gunicorn_memory (только Linux).
+
+Запуск из корня репозитория:
+    python -m benchmarks.reporters [--reporters 50] [--workers 2] [--json report.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.gunicorn_memory import children, memory_kb
+from benchmarks.server import start_gunicorn, stop
+from benchmarks.synthetic import generate
+
+
+def prepare(root, count, data_path="dashboard_data.json"):
+    with open(data_path, encoding="utf-8") as f:
+        base = json.load(f)
+    index = {}
+    for i in range(count):
+        reporter = f"r{i:03d}"
+        os.makedirs(os.path.join(root, reporter), exist_ok=True)
+        data = base if i == 0 else generate(base, 1, seed=i)
+        with open(os.path.join(root, reporter, "dashboard_data.json"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        index[reporter] = {"name": f"Страна {i + 1}", "genitive": f"страны {i + 1}"}
+    with open(os.path.join(root, "reporters.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    return list(index)
+
+
+def open_page(base, reporter):
+    # Тот же запрос, что отправляет браузер при открытии /<страна>
+    body = json.dumps({
+        "output": "reporter-page.children",
+        "outputs": {"id": "reporter-page", "property": "children"},
+        "inputs": [{"id": "url", "property": "pathname", "value": f"/{reporter}"}],
+        "changedPropIds": ["url.pathname"],
+    }).encode("utf-8")
+    request = urllib.request.Request(base + "/_dash-update-component", data=body,
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    urllib.request.urlopen(request, timeout=60).read()
+    return time.perf_counter() - start
+
+
+def total_pss_kb(proc, workers):
+    deadline = time.time() + 60
+    while len(children(proc.pid)) < workers and time.time() < deadline:
+        time.sleep(0.1)
+    return memory_kb(proc.pid)["pss"] + sum(memory_kb(pid)["pss"] for pid in children(proc.pid))
+
+
+def measure_multi(root, reporters, workers, warm, budget_mb):
+    proc, base, startup = start_gunicorn({
+        "WEB_CONCURRENCY": str(workers),
+        "DASHBOARD_REPORTERS": root,
+        "REPORTERS_WARM": str(warm),
+        "REPORTERS_MEMORY_MB": str(budget_mb),
+    })
+    try:
+        # Каждую страницу открываем по разу на воркер: холодные сборки и ответы из кэша
+        cold, hot = [], []
+        for reporter in reporters:
+            timings = sorted(open_page(base, reporter) for _ in range(workers * 2))
+            cold.append(timings[-1])
+            hot.append(timings[0])
+        return {
+            "startup_s": startup,
+            "total_pss_kb": total_pss_kb(proc, workers),
+            "page_cold_ms": 1000 * sum(cold) / len(cold),
+            "page_hot_ms": 1000 * sum(hot) / len(hot),
+        }
+    finally:
+        stop(proc)
+
+
+def measure_single(data_path, workers):
+    proc, base, startup = start_gunicorn({"WEB_CONCURRENCY": str(workers), "DASHBOARD_DATA": data_path})
+    try:
+        for _ in range(workers * 2):
+            for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+                urllib.request.urlopen(base + path, timeout=10).read()
+        return {"startup_s": startup, "total_pss_kb": total_pss_kb(proc, workers)}
+    finally:
+        stop(proc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reporters", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--warm", type=int, default=5, help="REPORTERS_WARM")
+    parser.add_argument("--budget-mb", type=float, default=512, help="REPORTERS_MEMORY_MB")
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="dash-reporters-") as root:
+        reporters = prepare(root, args.reporters)
+        multi = measure_multi(root, reporters, args.workers, args.warm, args.budget_mb)
+        single = measure_single(os.path.join(root, reporters[0], "dashboard_data.json"), args.workers)
+
+    copies_kb = single["total_pss_kb"] * args.reporters
+    report = {"reporters": args.reporters, "workers": args.workers, "multi": multi, "single": single,
+              "copies_pss_kb": copies_kb}
+    print(f"одна страна: суммарный PSS {single['total_pss_kb'] / 1024:.1f} МБ, "
+          f"{args.reporters} копий - {copies_kb / 1024:.1f} МБ")
+    print(f"{args.reporters} стран в одном сервере: суммарный PSS {multi['total_pss_kb'] / 1024:.1f} МБ "
+          f"({copies_kb / multi['total_pss_kb']:.1f}x меньше), старт {multi['startup_s']:.2f} с")
+    print(f"страница страны: первая сборка {multi['page_cold_ms']:.1f} мс, "
+          f"из кэша {multi['page_hot_ms']:.1f} мс")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Запуск дашборда под gunicorn для бенчмарков (та же команда, что в Procfile)."""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+GUNICORN_COMMAND = ["-m", "gunicorn", "-c", "gunicorn.conf.py", "app:server"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(env=None, path="/", timeout=120):
+    """Запускает gunicorn и ждёт первого успешного ответа на path.
+
+    Возвращает (процесс, базовый URL, секунды от запуска процесса до ответа).
+    """
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), DATA_RELOAD_INTERVAL="0", **(env or {}))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, *GUNICORN_COMMAND], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while True:
+        if proc.poll() is not None:
+            raise RuntimeError("gunicorn завершился при старте")
+        if time.monotonic() > deadline:
+            stop(proc)
+            raise RuntimeError("gunicorn не ответил за отведённое время")
+        try:
+            urllib.request.urlopen(base + path, timeout=1).read()
+            break
+        except OSError:
+            time.sleep(0.01)
+    return proc, base, time.perf_counter() - start
+
+
+def stop(proc):
+    proc.terminate()
+    proc.wait(timeout=30)
@@ -0,0 +1,72 @@
+"""Холодный старт: время импорта app.py и время до первого обслуженного запроса.
+
+1. `python -X importtime -c "import app"` - суммарное время импорта и самые
+   тяжёлые прямые импорты app.py (всё, что в них не попало, - работа самого
+   модуля: загрузка данных, построение фигур, сериализация).
+2. Команда из Procfile (gunicorn -c gunicorn.conf.py app:server) с одним
+   воркером - время от запуска процесса до первого ответа /_dash-layout.
+
+Запуск из корня репозитория:
+    python -m benchmarks.startup [--runs 3] [--json report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks.server import start_gunicorn, stop
+
+
+def import_times():
+    env = dict(os.environ, DATA_RELOAD_INTERVAL="0")
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            env=env, check=True, capture_output=True, text=True).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append({"module": name.strip(), "depth": depth,
+                        "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    app_entry = next(e for e in entries if e["module"] == "app")
+    # Прямые импорты app.py стоят перед ним в выводе с глубиной 1
+    direct = [e for e in entries if e["depth"] == 1]
+    return app_entry, sorted(direct, key=lambda e: e["cumulative_ms"], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    args = parser.parse_args()
+
+    app_entry, direct = import_times()
+    print(f"import app: {app_entry['cumulative_ms']:.0f} мс, "
+          f"из них работа самого модуля {app_entry['self_ms']:.0f} мс")
+    for e in direct[:args.top]:
+        print(f"  {e['module']:<30} {e['cumulative_ms']:>8.0f} мс")
+
+    first_response = []
+    for _ in range(args.runs):
+        proc, _, seconds = start_gunicorn({"WEB_CONCURRENCY": "1"}, path="/_dash-layout")
+        stop(proc)
+        first_response.append(seconds)
+    print(f"gunicorn: от запуска до первого ответа медиана {statistics.median(first_response):.2f} с "
+          f"(min {min(first_response):.2f}, max {max(first_response):.2f})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "import_app_ms": app_entry["cumulative_ms"],
+                "app_module_self_ms": app_entry["self_ms"],
+                "direct_imports": direct,
+                "first_response_s": first_response,
+            }, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
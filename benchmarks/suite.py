@@ -0,0 +1,159 @@
+"""Набор бенчмарков дашборда с машиночитаемым отчётом.
+
+Для каждого масштаба данных (1 - реальный dashboard_data.json, N - синтетика
+из benchmarks.synthetic) в отдельном процессе измеряются:
+
+- время import app (холодный старт со сборкой всех фигур) и пиковый RSS;
+- каждый график отдельно: разбор раздела в таблицу (datamodel), построение фигуры,
+  кодирование в JSON, размер ответа без сжатия, в gzip и brotli;
+- запросы через Flask test client: /, /_dash-layout, /_dash-dependencies и
+  интерактивные колбэки (диапазон лет, смена партнёра).
+
+Сеть не нужна. Отчёт пишется в JSON вместе с текущим коммитом, чтобы
+сравнивать результаты между коммитами.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite --scales 1 10 100 --json bench.json
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate
+
+
+def timeit(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000}
+
+
+def dash_body(dependencies, input_id, value):
+    dep = next(d for d in dependencies if d["inputs"][0]["id"] == input_id)
+    outputs = []
+    for part in dep["output"][2:-2].split("..."):
+        component_id, prop = part.rsplit(".", 1)
+        outputs.append({"id": component_id, "property": prop.split("@", 1)[0]})
+    return {"output": dep["output"], "outputs": outputs, "state": [],
+            "inputs": [{"id": input_id, "property": "value", "value": value}],
+            "changedPropIds": [f"{input_id}.value"]}
+
+
+def run_child(repeat):
+    start = time.perf_counter()
+    import app
+    import_s = time.perf_counter() - start
+
+    import plotly.io as pio
+    from datamodel import table
+    from figures import FIGURE_BUILDERS, FIGURE_SECTIONS
+    from responses import brotli
+
+    snapshot = app.data_manager.current
+    data = snapshot.data
+    model = snapshot.model
+
+    figures = {}
+    for graph_id, builder in FIGURE_BUILDERS.items():
+        section = FIGURE_SECTIONS[graph_id]
+        fig = builder(model)
+        body = pio.to_json(fig, validate=False).encode("utf-8")
+        figures[graph_id] = {
+            "rows": model[section].rows,
+            "table": timeit(lambda: table(data[section], section), repeat),
+            "figure": timeit(lambda: builder(model), repeat),
+            "json_encode": timeit(lambda: pio.to_json(fig, validate=False), repeat),
+            "bytes": len(body),
+            "gzip_bytes": len(gzip.compress(body, 9)),
+            "br_bytes": len(brotli.compress(body, quality=10)) if brotli else None,
+        }
+
+    client = app.server.test_client()
+    endpoints = {path: timeit(lambda: client.get(path), repeat)
+                 for path in ("/", "/_dash-layout", "/_dash-dependencies")}
+    dependencies = json.loads(client.get("/_dash-dependencies").data)
+    totals = snapshot.trade_totals
+    year_body = dash_body(dependencies, "year-range", [totals.first_year, totals.last_year])
+    partner_body = dash_body(dependencies, "partner-select", snapshot.partners.default)
+    callbacks = {
+        "update_trade_dynamics": timeit(
+            lambda: client.post("/_dash-update-component", json=year_body), repeat),
+        "update_partner_card": timeit(
+            lambda: client.post("/_dash-update-component", json=partner_body), repeat),
+        "trade_totals": timeit(lambda: totals.totals(totals.first_year, totals.last_year), repeat),
+    }
+
+    print(json.dumps({
+        "import_app_s": import_s,
+        # ru_maxrss в Linux - в килобайтах
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "figures": figures,
+        "endpoints": endpoints,
+        "callbacks": callbacks,
+    }))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="куда сохранить отчёт в формате JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.repeat)
+        return
+
+    with open("dashboard_data.json", encoding="utf-8") as f:
+        base = json.load(f)
+
+    report = {"commit": git_commit(), "python": platform.python_version(), "scales": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = "dashboard_data.json"
+            if scale != 1:
+                path = os.path.join(tmp, f"dashboard_x{scale}.json")
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(generate(base, scale), f, ensure_ascii=False)
+            env = dict(os.environ, DASHBOARD_DATA=path, DATA_RELOAD_INTERVAL="0")
+            out = subprocess.run([sys.executable, "-m", "benchmarks.suite", "--child",
+                                  "--repeat", str(args.repeat)],
+                                 env=env, check=True, capture_output=True, text=True).stdout
+            report["scales"][scale] = result = json.loads(out.strip().splitlines()[-1])
+
+            print(f"x{scale}: import app {result['import_app_s']:.2f} с, пиковый RSS {result['peak_rss_mb']:.0f} МБ")
+            print(f"  {'график':<30} {'строк':>6} {'таблица':>10} {'фигура':>8} {'JSON':>8} {'байт':>9} {'gzip':>8}")
+            for graph_id, r in result["figures"].items():
+                print(f"  {graph_id:<30} {r['rows']:>6} {r['table']['median_ms']:>10.2f} "
+                      f"{r['figure']['median_ms']:>8.2f} {r['json_encode']['median_ms']:>8.2f} "
+                      f"{r['bytes']:>9} {r['gzip_bytes']:>8}")
+            for name, r in {**result["endpoints"], **result["callbacks"]}.items():
+                print(f"  {name:<30} {r['median_ms']:>8.3f} мс")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
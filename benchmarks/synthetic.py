@@ -0,0 +1,114 @@
+"""Генератор синтетических данных в формате dashboard_data.json.
+
+Берёт реальный файл за основу и масштабирует его: больше лет в рядах,
+больше стран-партнёров, товарных групп и секторов. Значения - случайные,
+но правдоподобного порядка, генератор детерминирован (seed).
+
+Запуск из корня репозитория:
+    python -m benchmarks.synthetic --scale 10 -o /tmp/dashboard_x10.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+
+def _names(base, count, prefix):
+    names = list(base)
+    for i in range(len(names), count):
+        names.append(f"{prefix} {i + 1}")
+    return names[:count]
+
+
+def _yearly(rng, start_year, years, level):
+    # Случайное блуждание вокруг level, без отрицательных значений
+    steps = rng.normal(1.02, 0.08, size=(years, 2)).clip(0.5, 1.5)
+    values = level * np.cumprod(steps, axis=0)
+    return [
+        {"year": start_year + i, "M": float(m), "X": float(x), "balance": float(x - m)}
+        for i, (m, x) in enumerate(values)
+    ]
+
+
+def generate(base, scale, seed=0):
+    """Возвращает данные, где все ряды и рейтинги длиннее исходных в scale раз."""
+    rng = np.random.default_rng(seed)
+    data = {}
+
+    years = len(base["trade_dynamics"]) * scale
+    last_year = max(row["year"] for row in base["trade_dynamics"])
+    data["trade_dynamics"] = _yearly(rng, last_year - years + 1, years, 3e10)
+    russia_years = len(base["russia_trade_dynamics"]) * scale
+    data["russia_trade_dynamics"] = _yearly(rng, last_year - russia_years + 1, russia_years, 5e9)
+
+    def ranked(key, name_key, value_key, prefix):
+        names = _names([row[name_key] for row in base[key]], len(base[key]) * scale, prefix)
+        values = np.sort(rng.lognormal(23, 1, size=len(names)))[::-1]
+        return [{name_key: name, value_key: float(v)} for name, v in zip(names, values)]
+
+    data["top_export_commodities"] = ranked("top_export_commodities", "commodity_name",
+                                            "primaryValue", "Товарная группа")
+    data["top_import_commodities"] = ranked("top_import_commodities", "commodity_name",
+                                            "primaryValue", "Товарная группа")
+
+    def shares(key, name_key, prefix):
+        names = _names([row[name_key] for row in base[key]], len(base[key]) * scale, prefix)
+        flows = rng.lognormal(22, 1.5, size=(len(names), 2))
+        totals = flows.sum(axis=0)
+        return [
+            {name_key: name, "M": float(m), "X": float(x),
+             "export_share": float(x / totals[1]), "import_share": float(m / totals[0])}
+            for name, (m, x) in zip(names, flows)
+        ]
+
+    data["economic_sectors"] = shares("economic_sectors", "sector", "Сектор")
+    data["trade_geography"] = shares("trade_geography", "world_part", "Регион")
+
+    partners = _names([row["country_name"] for row in base["top_partner_countries"]],
+                      len(base["top_partner_countries"]) * scale, "Страна")
+    flows = np.sort(rng.lognormal(23, 1, size=(len(partners), 2)), axis=0)[::-1]
+    data["top_partner_countries"] = [
+        {"country_name": name, "M": float(m), "X": float(x), "balance": float(x - m),
+         "turnover": float(x + m), "balance_bln": float(x - m) / 1e9, "turnover_bln": float(x + m) / 1e9}
+        for name, (m, x) in zip(partners, flows)
+    ]
+
+    def declining(key, name_key, prefix):
+        names = _names([row[name_key] for row in base[key]], len(base[key]) * scale, prefix)
+        first = rng.lognormal(23, 1, size=len(names))
+        second = first * rng.uniform(0.3, 0.95, size=len(names))
+        return [
+            {name_key: name, "first_half": float(a), "second_half": float(b), "change": float(b - a)}
+            for name, a, b in zip(names, first, second)
+        ]
+
+    data["declining_commodities"] = declining("declining_commodities", "commodity_name", "Товарная группа")
+    data["declining_partners"] = declining("declining_partners", "country_name", "Страна")
+
+    def growth(key):
+        names = _names([row["commodity_name"] for row in base[key]], len(base[key]) * scale,
+                       "Товарная группа")
+        deltas = np.sort(rng.lognormal(0, 1, size=len(names)))[::-1]
+        return [{"commodity_name": name, "delta": float(d)} for name, d in zip(names, deltas)]
+
+    data["export_growth"] = growth("export_growth")
+    data["import_growth"] = growth("import_growth")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base", default="dashboard_data.json")
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(generate(base, args.scale, args.seed), f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
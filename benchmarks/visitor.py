@@ -0,0 +1,78 @@
+"""Имитация одного посетителя дашборда.
+
+Повторяет то, что делает dash-renderer в браузере при открытии страницы:
+загружает /, /_dash-layout, /_dash-dependencies и отправляет POST
+/_dash-update-component для каждого колбэка, который срабатывает при загрузке.
+"""
+import json
+import time
+
+
+def find_component_props(node, component_id):
+    # Обход JSON-дерева макета в поисках компонента с нужным id
+    if isinstance(node, list):
+        for child in node:
+            found = find_component_props(child, component_id)
+            if found is not None:
+                return found
+        return None
+    if not isinstance(node, dict):
+        return None
+    props = node.get("props", {})
+    if props.get("id") == component_id:
+        return props
+    return find_component_props(props.get("children"), component_id)
+
+
+def _split_output(output):
+    # "..a.figure...b.figure.." -> [("a", "figure"), ("b", "figure")];
+    # суффикс "@<hash>" у выходов с allow_duplicate к имени свойства не относится
+    parts = output[2:-2].split("...") if output.startswith("..") else [output]
+    outputs = []
+    for part in parts:
+        component_id, prop = part.rsplit(".", 1)
+        outputs.append((component_id, prop.split("@", 1)[0]))
+    return outputs, output.startswith("..")
+
+
+def initial_callback_bodies(layout, dependencies):
+    bodies = []
+    for dep in dependencies:
+        if dep.get("prevent_initial_call") or dep.get("clientside_function"):
+            continue
+        outputs, multi = _split_output(dep["output"])
+        inputs = []
+        for item in dep["inputs"]:
+            props = find_component_props(layout, item["id"]) or {}
+            inputs.append({"id": item["id"], "property": item["property"],
+                           "value": props.get(item["property"])})
+        output_specs = [{"id": cid, "property": prop} for cid, prop in outputs]
+        bodies.append({
+            "output": dep["output"],
+            "outputs": output_specs if multi else output_specs[0],
+            "inputs": inputs,
+            "state": [],
+            "changedPropIds": [],
+        })
+    return bodies
+
+
+def visit(client):
+    """Загружает дашборд целиком, возвращает список (endpoint, status, bytes, seconds)."""
+    timings = []
+
+    def timed(endpoint, call):
+        start = time.perf_counter()
+        response = call()
+        timings.append((endpoint, response.status_code, len(response.data),
+                        time.perf_counter() - start))
+        return response
+
+    timed("/", lambda: client.get("/"))
+    layout = json.loads(timed("/_dash-layout", lambda: client.get("/_dash-layout")).data)
+    dependencies = json.loads(timed("/_dash-dependencies",
+                                    lambda: client.get("/_dash-dependencies")).data)
+    for body in initial_callback_bodies(layout, dependencies):
+        timed("/_dash-update-component",
+              lambda body=body: client.post("/_dash-update-component", json=body))
+    return timings
@@ -0,0 +1,48 @@
+"""Данные для режима DASH_RENDER_MODE=clientside.
+
+Сервер один раз кладёт в макет (dcc.Store) компактные колонки разделов, а
+фигуры, подписи и пересчёты по слайдеру и карточке партнёра строит
+assets/clientside.js в браузере. Строки передаются кодами в общей таблице
+строк модели (datamodel.StringTable), поэтому названия, повторяющиеся в
+нескольких разделах, приходят один раз.
+
+Формат:
+
+    {"template": <шаблон plotly>,
+     "strings": [...],
+     "sections": {раздел: {"rows": n, "columns": {колонка: [...]}, "text": [строковые колонки]}}}
+"""
+
+STORE_ID = "dashboard-data"
+
+# Колонки, из которых браузер строит фигуры раздела; производные (млрд USD,
+# доли, сокращённые названия) он считает сам
+CLIENT_COLUMNS = {
+    "trade_dynamics": ("year", "X", "M", "balance"),
+    "russia_trade_dynamics": ("year", "X", "M", "balance"),
+    "top_export_commodities": ("commodity_name", "primaryValue"),
+    "top_import_commodities": ("commodity_name", "primaryValue"),
+    "economic_sectors": ("sector", "X", "M"),
+    "trade_geography": ("world_part", "X", "M", "export_share", "import_share"),
+    "top_partner_countries": ("country_name", "X", "M", "turnover_bln", "balance_bln"),
+    "declining_commodities": ("commodity_name", "change"),
+    "export_growth": ("commodity_name", "delta"),
+    "import_growth": ("commodity_name", "delta"),
+}
+
+
+def client_data(model, template):
+    """Содержимое dcc.Store для модели datamodel.TradeData."""
+    sections = {}
+    for name, columns in CLIENT_COLUMNS.items():
+        table = model[name]
+        section = {"rows": table.rows, "columns": {}, "text": []}
+        if not table.empty:
+            for column in columns:
+                if column in table.string_columns:
+                    section["columns"][column] = table.codes(column).tolist()
+                    section["text"].append(column)
+                else:
+                    section["columns"][column] = table[column].tolist()
+        sections[name] = section
+    return {"template": template, "strings": model.strings.values, "sections": sections}
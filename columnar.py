@@ -0,0 +1,192 @@
+"""Колоночное хранилище данных дашборда (NumPy .npy, memory-mapped).
+
+Каждый раздел dashboard_data.json хранится отдельным каталогом, каждая
+колонка - отдельным .npy файлом. Файлы открываются через np.load(mmap_mode="r"),
+так что массивы не копируются в память процесса, а разделы читаются только
+при первом обращении. Воркеры gunicorn делят одни и те же страницы page cache.
+
+Раскладка на диске:
+
+    <root>/manifest.json          - текущая версия и схема разделов
+    <root>/<version>/<section>/<column>.npy
+
+manifest.json переписывается атомарно последним, поэтому читатель всегда
+видит либо старую, либо новую версию целиком. JSON остаётся форматом
+импорта/экспорта:
+
+    python columnar.py export dashboard_data.json data/columnar
+    python columnar.py import data/columnar dashboard_data.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+# Сколько прошлых версий оставлять на диске: их ещё могут читать
+# процессы, не успевшие перечитать манифест
+KEEP_VERSIONS = 2
+
+
+def _column_array(values):
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, str) for v in present):
+        return np.array(["" if v is None else v for v in values], dtype=np.str_)
+    if present and all(isinstance(v, bool) for v in present) and len(present) == len(values):
+        return np.array(values, dtype=np.bool_)
+    if present and all(isinstance(v, int) and not isinstance(v, bool) for v in present) \
+            and len(present) == len(values):
+        return np.array(values, dtype=np.int64)
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def records_to_columns(records):
+    columns = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+    return {key: _column_array([record.get(key) for record in records]) for key in columns}
+
+
+def export_columnar(data, root):
+    """Записывает dict разделов (списков записей) в колоночный формат, возвращает версию."""
+    raw = json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    version = hashlib.sha256(raw).hexdigest()[:12]
+    version_dir = os.path.join(root, version)
+    tmp_dir = version_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    sections = {}
+    for name, records in data.items():
+        section_dir = os.path.join(tmp_dir, name)
+        os.makedirs(section_dir)
+        columns = records_to_columns(records)
+        for column, values in columns.items():
+            np.save(os.path.join(section_dir, f"{column}.npy"), values, allow_pickle=False)
+        sections[name] = {"rows": len(records),
+                          "columns": {column: values.dtype.str for column, values in columns.items()}}
+
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.replace(tmp_dir, version_dir)
+
+    manifest_tmp = os.path.join(root, MANIFEST + ".tmp")
+    with open(manifest_tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "sections": sections}, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_tmp, os.path.join(root, MANIFEST))
+
+    _prune_versions(root, version)
+    return version
+
+
+def _prune_versions(root, current):
+    versions = [entry for entry in os.listdir(root)
+                if entry != current and os.path.isdir(os.path.join(root, entry))]
+    versions.sort(key=lambda entry: os.path.getmtime(os.path.join(root, entry)), reverse=True)
+    for entry in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def is_columnar(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST))
+
+
+class ColumnarSection(Mapping):
+    """Раздел данных: колонка -> массив NumPy (memory-mapped, только чтение)."""
+
+    def __init__(self, directory, rows, columns):
+        self.directory = directory
+        self.rows = rows
+        self._dtypes = columns
+        self._arrays = {}
+
+    def __getitem__(self, column):
+        if column not in self._dtypes:
+            raise KeyError(column)
+        array = self._arrays.get(column)
+        if array is None:
+            array = np.load(os.path.join(self.directory, f"{column}.npy"), mmap_mode="r")
+            self._arrays[column] = array
+        return array
+
+    def __iter__(self):
+        return iter(self._dtypes)
+
+    def __len__(self):
+        return len(self._dtypes)
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({column: self[column] for column in self}, copy=False)
+
+    def records(self):
+        columns = {column: self[column].tolist() for column in self}
+        return [{column: values[i] for column, values in columns.items()} for i in range(self.rows)]
+
+
+class ColumnarStore(Mapping):
+    """Набор разделов одной версии; каждый раздел открывается при первом обращении."""
+
+    def __init__(self, root):
+        self.root = root
+        with open(os.path.join(root, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.version = manifest["version"]
+        self._manifest = manifest["sections"]
+        self._sections = {}
+
+    def __getitem__(self, name):
+        section = self._sections.get(name)
+        if section is None:
+            meta = self._manifest[name]
+            section = ColumnarSection(os.path.join(self.root, self.version, name),
+                                      meta["rows"], meta["columns"])
+            self._sections[name] = section
+        return section
+
+    def __iter__(self):
+        return iter(self._manifest)
+
+    def __len__(self):
+        return len(self._manifest)
+
+    def to_json_data(self):
+        return {name: self[name].records() for name in self}
+
+
+def records(section):
+    """Записи раздела независимо от формата хранения (список dict или колонки)."""
+    if isinstance(section, ColumnarSection):
+        return section.records()
+    return section
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Конвертация dashboard_data.json <-> колоночный формат")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="JSON -> колоночный каталог")
+    export.add_argument("json_path")
+    export.add_argument("root")
+    to_json = sub.add_parser("import", help="колоночный каталог -> JSON")
+    to_json.add_argument("root")
+    to_json.add_argument("json_path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        with open(args.json_path, encoding="utf-8") as f:
+            data = json.load(f)
+        os.makedirs(args.root, exist_ok=True)
+        print(export_columnar(data, args.root))
+    else:
+        data = ColumnarStore(args.root).to_json_data()
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Версионированные данные дашборда с горячей перезагрузкой.
+
+DataManager держит текущий снимок (DataSnapshot) и в фоновом потоке следит
+за dashboard_data.json. Новая версия читается, проверяется и полностью
+собирается (фигуры, макет) в фоне, после чего ссылка на снимок заменяется
+одним присваиванием. Запрос, который уже взял снимок, дорабатывает со старой
+версией, следующий получает новую, перезапуск воркеров не нужен.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from columnar import MANIFEST, ColumnarSection, ColumnarStore, is_columnar
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_SECTIONS = (
+    "trade_dynamics",
+    "top_export_commodities",
+    "top_import_commodities",
+    "economic_sectors",
+    "trade_geography",
+    "top_partner_countries",
+    "russia_trade_dynamics",
+    "declining_commodities",
+    "declining_partners",
+    "export_growth",
+    "import_growth",
+)
+
+# Колонки, без которых не строятся фигуры и производные колонки (datamodel.py)
+REQUIRED_COLUMNS = {
+    "trade_dynamics": ("year", "X", "M"),
+    "top_export_commodities": ("commodity_name", "primaryValue"),
+    "top_import_commodities": ("commodity_name", "primaryValue"),
+    "economic_sectors": ("sector", "X", "M"),
+    "trade_geography": ("world_part", "X", "M", "export_share", "import_share"),
+    "top_partner_countries": ("country_name", "X", "M"),
+    "russia_trade_dynamics": ("year", "X", "M"),
+    "declining_commodities": ("commodity_name", "change"),
+    "export_growth": ("commodity_name", "delta"),
+    "import_growth": ("commodity_name", "delta"),
+}
+# Разделы, у графиков которых нет варианта «нет данных»
+NON_EMPTY_SECTIONS = (
+    "trade_dynamics",
+    "top_export_commodities",
+    "top_import_commodities",
+    "economic_sectors",
+    "trade_geography",
+    "top_partner_countries",
+)
+
+
+class DataSnapshot:
+    """Неизменяемый набор: данные одной версии и всё, что из них построено."""
+
+    def __init__(self, version, data, figures, layout=None, responses=None, trade_totals=None,
+                 partners=None, model=None, series=None):
+        self.version = version
+        self.data = data
+        # Разделы, разобранные в массивы с производными колонками (datamodel.TradeData)
+        self.model = model
+        self.figures = figures
+        self.layout = layout
+        # Префиксные суммы динамики торговли (trade_totals.TradeTotals)
+        self.trade_totals = trade_totals
+        # Индекс карточек стран-партнёров (partners.PartnerIndex)
+        self.partners = partners
+        # Уровни прореживания длинных рядов по id графика (downsampling.SeriesPyramid)
+        self.series = series if series is not None else {}
+        # Готовые сжатые ответы (responses.PrecompressedResponse) по ключу запроса
+        self.responses = responses if responses is not None else {}
+
+
+def validate_data(data):
+    if not isinstance(data, (dict, ColumnarStore)):
+        raise ValueError("Корень dashboard_data.json должен быть объектом")
+    for section in REQUIRED_SECTIONS:
+        if section not in data:
+            raise ValueError(f"В данных нет раздела {section!r}")
+        section_data = data[section]
+        if not isinstance(section_data, (list, ColumnarSection)):
+            raise ValueError(f"Раздел {section!r} должен быть списком записей")
+        if isinstance(section_data, ColumnarSection):
+            rows, columns = section_data.rows, set(section_data)
+        else:
+            if not all(isinstance(record, dict) for record in section_data):
+                raise ValueError(f"Записи раздела {section!r} должны быть объектами")
+            rows, columns = len(section_data), set().union(*section_data)
+        if not rows:
+            if section in NON_EMPTY_SECTIONS:
+                raise ValueError(f"Раздел {section!r} пуст")
+            continue
+        missing = [column for column in REQUIRED_COLUMNS.get(section, ()) if column not in columns]
+        if missing:
+            raise ValueError(f"В разделе {section!r} нет колонок {missing}")
+
+
+def data_version(raw):
+    # Версия - короткий хэш содержимого файла, а не mtime:
+    # повторная запись тех же данных не вызывает пересборку
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+
+class DataManager:
+    def __init__(self, path, build, interval=10.0):
+        """build(data, version) -> DataSnapshot собирает всё, что зависит от данных.
+
+        path - файл dashboard_data.json или каталог колоночного хранилища
+        (см. columnar.py); у каталога отслеживается manifest.json.
+        """
+        self.path = path
+        self.build = build
+        self.interval = interval
+        self._columnar = is_columnar(path)
+        self._watched = os.path.join(path, MANIFEST) if self._columnar else path
+        self._mtime = os.stat(self._watched).st_mtime_ns
+        # mtime записи файла, которую не удалось загрузить (повторно не разбирается)
+        self._skipped_mtime = None
+        self._snapshot = self._load()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @property
+    def current(self):
+        return self._snapshot
+
+    def _load(self):
+        current = getattr(self, "_snapshot", None)
+        if self._columnar:
+            # Разделы колоночного хранилища открываются лениво, при обращении
+            data = ColumnarStore(self.path)
+            version = data.version
+            if current is not None and version == current.version:
+                return current
+        else:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            version = data_version(raw)
+            if current is not None and version == current.version:
+                return current
+            data = json.loads(raw)
+        validate_data(data)
+        return self.build(data, version)
+
+    def check(self):
+        """Одна проверка файла. Возвращает True, если версия сменилась."""
+        try:
+            mtime = os.stat(self._watched).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime or mtime == self._skipped_mtime:
+            return False
+
+        previous = self._snapshot
+        try:
+            snapshot = self._load()
+        except OSError as exc:
+            # Файл пропал или подменяется прямо сейчас: попробуем на следующей проверке
+            logger.warning("Не удалось прочитать %s: %s", self.path, exc)
+            return False
+        except ValueError as exc:
+            # Недописанный или некорректный файл: продолжаем отдавать старую версию,
+            # а эту запись файла больше не разбираем - следующая запись сменит mtime
+            logger.warning("Не удалось загрузить %s: %s", self.path, exc)
+            self._skipped_mtime = mtime
+            return False
+        except Exception:
+            # Данные прошли проверку, но снимок не собрался: это тоже не повод
+            # останавливать наблюдатель или отвечать 500 вместо старой версии
+            logger.exception("Не удалось собрать снимок из %s", self.path)
+            self._skipped_mtime = mtime
+            return False
+        self._mtime = mtime
+        if snapshot is previous:
+            return False
+
+        self._snapshot = snapshot  # атомарная замена ссылки
+        logger.info("Данные обновлены: версия %s -> %s", previous.version, snapshot.version)
+        return True
+
+    def _watch(self, stop):
+        while not stop.wait(self.interval):
+            self.check()
+
+    def _running(self):
+        return (self._pid == os.getpid() and self._thread.is_alive()
+                and not self._stop.is_set())
+
+    def start(self):
+        """Запускает наблюдение за файлом в текущем процессе.
+
+        Потоки не переживают fork, поэтому проверка по pid позволяет вызывать
+        метод в каждом воркере (например, перед каждым запросом).
+        """
+        if self.interval <= 0 or self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            # У каждого потока своё событие остановки: старый поток, если он
+            # ещё не вышел из ожидания, не будет случайно «воскрешён»
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._watch, args=(self._stop,),
+                                            name="data-watcher", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,353 @@
+"""Подготовка dashboard_data.json из сырых записей внешней торговли.
+
+Вход - выгрузки в формате UN Comtrade (CSV, в том числе .csv.gz, или Parquet)
+с колонками refYear, flowCode, partnerCode, cmdCode, primaryValue и, по
+желанию, partnerDesc/cmdDesc; поддерживаются и названия колонок старых
+выгрузок (Year, Trade Flow Code, ...). Файлы читаются кусками по CHUNK_ROWS
+строк, каждый кусок сразу сворачивается в суммы по (год, поток, партнёр,
+группа ТН ВЭД из двух знаков) - TradeCube. Этот куб ограничен числом лет,
+стран и групп, а не размером входа, поэтому многогигабайтные выгрузки на
+уровне HS6 обрабатываются на одной машине. Все разделы дашборда затем
+считаются из куба группировками pandas.
+
+Русские названия товарных групп и стран, отрасль и часть света берутся из
+справочников (CSV):
+
+    --commodities: hs2, commodity_name, sector
+    --partners:    partner_code, country_name, world_part
+
+Без справочника используются описания из самих записей, а отрасль и часть
+света получают значение "Неизвестно".
+
+Запуск из корня репозитория:
+    python data_preparation.py raw/finland_*.csv.gz -o dashboard_data.json \\
+        --commodities ref/hs2_ru.csv --partners ref/partners_ru.csv
+
+Результат проверяется так же, как при загрузке в DataManager, и
+записывается атомарно: запущенный дашборд подхватит его горячей перезагрузкой.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+import pandas as pd
+
+from data_manager import validate_data
+from olap import GROWTH_TOP_N, GROWTH_YEARS, PARTNER_YEARS, STRUCTURE_YEARS, TOP_N, TradeOlapCube
+from partner_shards import write_shards
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 500_000
+# Сколько строк частичных сумм копить до повторной свёртки
+COMPACT_ROWS = 2_000_000
+
+# Названия колонок выгрузок -> внутренние
+COLUMNS = {
+    "refYear": "year",
+    "flowCode": "flow",
+    "partnerCode": "partner",
+    "partnerDesc": "partner_desc",
+    "cmdCode": "cmd",
+    "cmdDesc": "cmd_desc",
+    "primaryValue": "value",
+    # Старый формат выгрузок Comtrade
+    "Year": "year",
+    "Trade Flow Code": "flow",
+    "Partner Code": "partner",
+    "Partner": "partner_desc",
+    "Commodity Code": "cmd",
+    "Commodity": "cmd_desc",
+    "Trade Value (US$)": "value",
+}
+REQUIRED_COLUMNS = ("year", "flow", "partner", "cmd", "value")
+# В полных выгрузках строки дополнительно разбиты по второму партнёру,
+# таможенному режиму и виду транспорта; берём только итоговые строки
+TOTAL_ROWS = {"partner2Code": "0", "customsCode": "C00", "motCode": "0"}
+CODE_COLUMNS = ("partner", "cmd", "flow", *TOTAL_ROWS)
+# Экспорт/импорт; в старом формате поток кодируется числом
+FLOWS = {"X": "X", "M": "M", "2": "X", "1": "M"}
+WORLD = "0"
+RUSSIA = "643"
+UNKNOWN = "Неизвестно"
+
+RUSSIA_YEARS = 5
+
+
+def read_chunks(path, chunksize=CHUNK_ROWS, sep=","):
+    """Куски сырых записей с внутренними названиями колонок."""
+    if path.endswith((".parquet", ".pq")):
+        chunks = _read_parquet(path, chunksize)
+    else:
+        wanted = set(COLUMNS) | set(TOTAL_ROWS)
+        chunks = pd.read_csv(path, sep=sep, chunksize=chunksize, usecols=lambda c: c in wanted,
+                             dtype={c: str for c in (*COLUMNS, *TOTAL_ROWS) if COLUMNS.get(c, c) in CODE_COLUMNS})
+    for chunk in chunks:
+        yield chunk.rename(columns=COLUMNS)
+
+
+def _read_parquet(path, chunksize):
+    # pyarrow нужен только для Parquet, поэтому импортируется здесь
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    wanted = set(COLUMNS) | set(TOTAL_ROWS)
+    columns = [name for name in parquet.schema_arrow.names if name in wanted]
+    for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+        chunk = batch.to_pandas()
+        for column in chunk.columns:
+            if COLUMNS.get(column, column) in CODE_COLUMNS:
+                chunk[column] = chunk[column].astype(str)
+        yield chunk
+
+
+class TradeCube:
+    """Суммы стоимости по (year, flow, partner, hs2), накапливаемые по кускам."""
+
+    def __init__(self, hs_digits=None):
+        # Длина кода ТН ВЭД в записях; при None определяется по первому куску
+        self.hs_digits = hs_digits
+        self.partner_names = {}
+        self.commodity_names = {}
+        self._parts = []
+        self._rows = 0
+
+    def add(self, chunk):
+        missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"В записях нет колонок {missing}")
+        for column, total in TOTAL_ROWS.items():
+            if column in chunk.columns:
+                chunk = chunk[chunk[column] == total]
+
+        chunk = chunk.assign(flow=chunk["flow"].map(FLOWS), cmd=chunk["cmd"].str.strip(),
+                             partner=chunk["partner"].str.strip())
+        numeric = chunk["cmd"].str.isdigit()
+        if self.hs_digits is None and numeric.any():
+            self.hs_digits = int(chunk.loc[numeric, "cmd"].str.len().max())
+        # Строки итогов (TOTAL, группы другого уровня) и "Мир" дали бы двойной счёт
+        chunk = chunk[numeric & (chunk["cmd"].str.len() == self.hs_digits)
+                      & chunk["flow"].notna() & (chunk["partner"] != WORLD)]
+        if chunk.empty:
+            return
+
+        hs2 = chunk["cmd"].str[:2]
+        if "partner_desc" in chunk.columns:
+            names = chunk[["partner", "partner_desc"]].drop_duplicates("partner")
+            self.partner_names.update(zip(names["partner"], names["partner_desc"]))
+        if "cmd_desc" in chunk.columns and self.hs_digits == 2:
+            names = chunk[["cmd", "cmd_desc"]].drop_duplicates("cmd")
+            self.commodity_names.update(zip(names["cmd"], names["cmd_desc"]))
+
+        part = (chunk.assign(hs2=hs2, year=chunk["year"].astype(int),
+                             value=pd.to_numeric(chunk["value"], errors="coerce"))
+                .groupby(["year", "flow", "partner", "hs2"], sort=False)["value"].sum())
+        self._parts.append(part)
+        self._rows += len(part)
+        if self._rows > COMPACT_ROWS:
+            self._compact()
+
+    def _compact(self):
+        if len(self._parts) > 1:
+            self._parts = [pd.concat(self._parts).groupby(level=[0, 1, 2, 3], sort=False).sum()]
+            self._rows = len(self._parts[0])
+
+    def frame(self):
+        """Куб одной таблицей: year, flow, partner, hs2, value."""
+        self._compact()
+        if not self._parts:
+            raise ValueError("Во входных файлах нет подходящих записей")
+        return self._parts[0].reset_index()
+
+
+def load_reference(path, key, columns):
+    """Справочник CSV: код -> dict(колонка: значение), коды читаются строками."""
+    if path is None:
+        return pd.DataFrame(columns=columns, index=pd.Index([], name=key))
+    table = pd.read_csv(path, dtype={key: str})
+    for column in columns:
+        if column not in table.columns:
+            table[column] = UNKNOWN
+    return table.set_index(key)[columns]
+
+
+def _flows(df, by):
+    """Суммы импорта и экспорта (колонки M и X) по ключу by."""
+    table = df.pivot_table(index=by, columns="flow", values="value", aggfunc="sum", fill_value=0.0)
+    return table.reindex(columns=["M", "X"], fill_value=0.0).astype(float)
+
+
+def _records(table, index_name):
+    return table.rename_axis(index_name).reset_index().to_dict("records")
+
+
+def _yearly(df):
+    table = _flows(df, "year")
+    table["balance"] = table["X"] - table["M"]
+    return _records(table, "year")
+
+
+def _shares(df, by):
+    table = _flows(df, by)
+    table["export_share"] = table["X"] / table["X"].sum()
+    table["import_share"] = table["M"] / table["M"].sum()
+    return _records(table.sort_index(), by)
+
+
+def _top(df, flow, n):
+    values = df[df["flow"] == flow].groupby("commodity_name")["value"].sum().nlargest(n)
+    return _records(values.to_frame("primaryValue"), "commodity_name")
+
+
+def _declining(df, by, last_year, n):
+    # Оборот за первую и вторую половины окна STRUCTURE_YEARS лет
+    window = df[df["year"] > last_year - STRUCTURE_YEARS]
+    second = window["year"] > last_year - STRUCTURE_YEARS // 2
+    table = pd.DataFrame({
+        "first_half": window[~second].groupby(by)["value"].sum(),
+        "second_half": window[second].groupby(by)["value"].sum(),
+    }).fillna(0.0)
+    table["change"] = table["second_half"] - table["first_half"]
+    return _records(table[table["change"] < 0].nsmallest(n, "change"), by)
+
+
+def _growth(df, flow, last_year, n):
+    # Прирост в млрд USD между last_year - GROWTH_YEARS и last_year
+    flow_df = df[df["flow"] == flow]
+    last = flow_df[flow_df["year"] == last_year].groupby("commodity_name")["value"].sum()
+    base = flow_df[flow_df["year"] == last_year - GROWTH_YEARS].groupby("commodity_name")["value"].sum()
+    delta = last.sub(base, fill_value=0.0) / 1_000_000_000
+    return _records(delta[delta > 0].nlargest(n).to_frame("delta"), "commodity_name")
+
+
+def _top_partners(df, last_year):
+    recent = df[df["year"] > last_year - PARTNER_YEARS]
+    table = _flows(recent, "country_name")
+    table["balance"] = table["X"] - table["M"]
+    table["turnover"] = table["X"] + table["M"]
+    table["balance_bln"] = table["balance"] / 1_000_000_000
+    table["turnover_bln"] = table["turnover"] / 1_000_000_000
+    return _records(table.nlargest(TOP_N, "turnover"), "country_name")
+
+
+def _russia(df, last_year):
+    russia = df[(df["partner"] == RUSSIA) & (df["year"] > last_year - RUSSIA_YEARS)]
+    return _yearly(russia) if not russia.empty else []
+
+
+# Раздел -> (от каких данных зависит, функция(df, last_year)):
+# "yearly" - только итоги по годам, "all" - суммы за все годы без разбивки
+# по годам, число - столько последних лет (см. aggregate_store.py)
+SECTIONS = {
+    "trade_dynamics": ("yearly", lambda df, last_year: _yearly(df)),
+    "top_export_commodities": ("all", lambda df, last_year: _top(df, "X", TOP_N)),
+    "top_import_commodities": ("all", lambda df, last_year: _top(df, "M", TOP_N)),
+    "economic_sectors": ("all", lambda df, last_year: _shares(df, "sector")),
+    "trade_geography": ("all", lambda df, last_year: _shares(df, "world_part")),
+    "top_partner_countries": (PARTNER_YEARS, _top_partners),
+    "russia_trade_dynamics": (RUSSIA_YEARS, _russia),
+    "declining_commodities": (STRUCTURE_YEARS,
+                              lambda df, last_year: _declining(df, "commodity_name", last_year, TOP_N)),
+    "declining_partners": (STRUCTURE_YEARS,
+                           lambda df, last_year: _declining(df, "country_name", last_year, TOP_N)),
+    "export_growth": (GROWTH_YEARS + 1, lambda df, last_year: _growth(df, "X", last_year, GROWTH_TOP_N)),
+    "import_growth": (GROWTH_YEARS + 1, lambda df, last_year: _growth(df, "M", last_year, GROWTH_TOP_N)),
+}
+
+
+def attach_names(cube, commodities=None, partners=None, commodity_names=None, partner_names=None):
+    """Куб с колонками commodity_name, sector, country_name и world_part из справочников."""
+    commodities = commodities if commodities is not None else load_reference(None, "hs2", ["commodity_name", "sector"])
+    partners = partners if partners is not None else load_reference(None, "partner_code", ["country_name", "world_part"])
+
+    df = cube.copy()
+    fallback = pd.Series(commodity_names or {}, dtype=object)
+    df["commodity_name"] = (df["hs2"].map(commodities["commodity_name"])
+                            .fillna(df["hs2"].map(fallback)).fillna("Группа " + df["hs2"]))
+    df["sector"] = df["hs2"].map(commodities["sector"]).fillna(UNKNOWN)
+    fallback = pd.Series(partner_names or {}, dtype=object)
+    df["country_name"] = (df["partner"].map(partners["country_name"])
+                          .fillna(df["partner"].map(fallback)).fillna(UNKNOWN))
+    df["world_part"] = df["partner"].map(partners["world_part"]).fillna(UNKNOWN)
+    return df
+
+
+def build_sections(cube, commodities=None, partners=None, commodity_names=None, partner_names=None):
+    """Все разделы dashboard_data.json из куба TradeCube.frame()."""
+    df = attach_names(cube, commodities, partners, commodity_names, partner_names)
+    last_year = int(df["year"].max())
+    return {name: build(df, last_year) for name, (_, build) in SECTIONS.items()}
+
+
+def partner_series(df):
+    """Ряды year/M/X/balance по каждой стране: {страна: записи}."""
+    table = _flows(df, ["country_name", "year"])
+    table["balance"] = table["X"] - table["M"]
+    return {country: _records(rows.droplevel("country_name"), "year")
+            for country, rows in table.groupby(level="country_name")}
+
+
+def write_json(data, path):
+    validate_data(data)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сборка dashboard_data.json из сырых записей Comtrade")
+    parser.add_argument("inputs", nargs="+", help="CSV (.csv, .csv.gz) или Parquet файлы")
+    parser.add_argument("-o", "--output", default="dashboard_data.json")
+    parser.add_argument("--commodities", help="справочник hs2, commodity_name, sector")
+    parser.add_argument("--partners", help="справочник partner_code, country_name, world_part")
+    parser.add_argument("--hs-digits", type=int, help="уровень кодов ТН ВЭД во входе (по умолчанию - по первому куску)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--sep", default=",", help="разделитель CSV")
+    parser.add_argument("--cube", help="куда записать куб olap.TradeOlapCube (.npz) для интерактивных рейтингов")
+    parser.add_argument("--partner-shards", help="каталог для рядов по отдельным странам (partner_shards.py)")
+    parser.add_argument("--store", help="каталог aggregate_store: входные годы добавляются к уже "
+                                         "накопленным, пересчитываются только затронутые разделы")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    cube = TradeCube(args.hs_digits)
+    for path in args.inputs:
+        rows = 0
+        for chunk in read_chunks(path, args.chunk_rows, args.sep):
+            rows += len(chunk)
+            cube.add(chunk)
+        logger.info("%s: %d записей", path, rows)
+
+    commodities = load_reference(args.commodities, "hs2", ["commodity_name", "sector"])
+    partners = load_reference(args.partners, "partner_code", ["country_name", "world_part"])
+    if args.store:
+        # aggregate_store сам импортирует этот модуль, поэтому импорт здесь
+        from aggregate_store import AggregateStore
+
+        store = AggregateStore(args.store)
+        changed = store.update(cube.frame(), cube.commodity_names, cube.partner_names)
+        logger.info("Обновлены годы: %s", changed or "нет")
+        data = store.sections(commodities, partners)
+        names = store.manifest["names"]
+        commodity_names, partner_names = names["commodities"], names["partners"]
+        frame = store.frame() if args.cube or args.partner_shards else None
+    else:
+        frame, commodity_names, partner_names = cube.frame(), cube.commodity_names, cube.partner_names
+        data = build_sections(frame, commodities, partners, commodity_names, partner_names)
+    write_json(data, args.output)
+    logger.info("Записан %s", args.output)
+    if args.cube or args.partner_shards:
+        named = attach_names(frame, commodities, partners, commodity_names, partner_names)
+    if args.cube:
+        TradeOlapCube.from_frame(named).save(args.cube)
+        logger.info("Записан %s", args.cube)
+    if args.partner_shards:
+        write_shards(partner_series(named), args.partner_shards)
+        logger.info("Записаны ряды по странам в %s", args.partner_shards)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Типизированная модель данных дашборда на массивах NumPy.
+
+Каждый раздел dashboard_data.json (список записей или раздел колоночного
+хранилища) разбирается один раз на версию данных в Table: числа - float64
+(годы - int64), строки - коды в общей для всех разделов таблице строк
+StringTable. Производные колонки (перевод в млрд/млн USD, доли в процентах,
+сокращённые названия) считаются сразу при разборе, так что построение фигур
+и колбэки только читают готовые колонки - без DataFrame и .apply.
+"""
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+
+import metrics
+from columnar import ColumnarSection, records_to_columns
+
+BLN = 1_000_000_000
+MLN = 1_000_000
+UNKNOWN_REGION = "Неизвестно"
+
+
+class StringTable:
+    """Интернированные строки: каждая уникальная строка хранится один раз."""
+
+    def __init__(self):
+        self._codes = {}
+        self._values = []
+        self._array = np.empty(0, dtype=object)
+        self._truncated = {}
+
+    def encode(self, values):
+        """Коды строк массива values; строки, которых ещё нет, добавляются."""
+        unique, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        codes = np.array([self._intern(value) for value in unique.tolist()], dtype=np.int32)
+        return codes[inverse].reshape(-1)
+
+    def _intern(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+        return code
+
+    def decode(self, codes):
+        if len(self._array) != len(self._values):
+            self._array = np.array(self._values, dtype=object)
+        return self._array[codes]
+
+    def truncate(self, codes, width):
+        """Коды сокращённых до width символов строк ("..." в конце у длинных)."""
+        memo = self._truncated.setdefault(width, {})
+        unique, inverse = np.unique(codes, return_inverse=True)
+        result = []
+        for code in unique.tolist():
+            if code not in memo:
+                value = self._values[code]
+                memo[code] = self._intern((value[:width] + "...") if len(value) > width else value)
+            result.append(memo[code])
+        return np.array(result, dtype=np.int32)[inverse].reshape(-1)
+
+    @property
+    def values(self):
+        return list(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+class Table(Mapping):
+    """Раздел данных: колонка -> массив. Строковые колонки отдаются декодированными."""
+
+    def __init__(self, columns, strings, rows):
+        self.strings = strings
+        self.rows = rows
+        self._columns = {}
+        self._string_columns = set()
+        for name, values in columns.items():
+            if values.dtype.kind in "US":
+                self.set_strings(name, strings.encode(values))
+            # copy=False: колонки колоночного хранилища нужного типа остаются
+            # memory-map и не копируются в память процесса
+            elif values.dtype.kind in "iu":
+                self.set(name, values.astype(np.int64, copy=False))
+            else:
+                self.set(name, values.astype(np.float64, copy=False))
+
+    def set(self, name, values):
+        self._columns[name] = np.asarray(values)
+        self._string_columns.discard(name)
+
+    def set_strings(self, name, codes):
+        self._columns[name] = codes
+        self._string_columns.add(name)
+
+    def codes(self, name):
+        return self._columns[name]
+
+    @property
+    def string_columns(self):
+        return set(self._string_columns)
+
+    def __getitem__(self, name):
+        values = self._columns[name]
+        if name in self._string_columns:
+            return self.strings.decode(values)
+        return values
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    def reorder(self, index):
+        """Переставляет строки всех колонок в порядке index (колонки - копии)."""
+        for name, values in self._columns.items():
+            self._columns[name] = values[index]
+
+    def filter(self, mask):
+        """Новая таблица из строк, где mask истинна (колонки - копии срезов)."""
+        table = Table({}, self.strings, int(np.count_nonzero(mask)))
+        for name, values in self._columns.items():
+            table._columns[name] = values[mask]
+        table._string_columns = set(self._string_columns)
+        return table
+
+
+# Производные колонки по разделам: считаются один раз при разборе
+
+def _yearly(table, unit, divisor):
+    table.set("year", table["year"].astype(np.int64, copy=False))
+    # Ряды по годам дальше режутся searchsorted (слайдер лет, зум, префиксные
+    # суммы), поэтому строки всегда идут по возрастанию года
+    if np.any(np.diff(table["year"]) < 0):
+        table.reorder(np.argsort(table["year"], kind="stable"))
+    if "balance" not in table:
+        table.set("balance", table["X"] - table["M"])
+    for column in ("X", "M", "balance"):
+        table.set(f"{column}_{unit}", table[column] / divisor)
+
+
+def _short(table, column, width, name="short_name"):
+    table.set_strings(name, table.strings.truncate(table.codes(column), width))
+
+
+def _ranked(table):
+    table.set("value_bln", table["primaryValue"] / BLN)
+    _short(table, "commodity_name", 35)
+
+
+def _sectors(table):
+    table.set("X_bln", table["X"] / BLN)
+    table.set("M_bln", table["M"] / BLN)
+    table.set("export_pct", table["X_bln"] / table["X_bln"].sum() * 100)
+    table.set("import_pct", table["M_bln"] / table["M_bln"].sum() * 100)
+    _short(table, "sector", 25, "short_sector")
+
+
+def _geography(table):
+    table.set("export_pct", table["export_share"] * 100)
+    table.set("import_pct", table["import_share"] * 100)
+    table.set("X_bln", table["X"] / BLN)
+    table.set("M_bln", table["M"] / BLN)
+    table.set("known", table["world_part"] != UNKNOWN_REGION)
+
+
+def _partners(table):
+    # Колонки, уже посчитанные в data_preparation.py, не пересчитываются
+    derived = {
+        "balance_bln": lambda: (table["X"] - table["M"]) / BLN,
+        "turnover_bln": lambda: (table["X"] + table["M"]) / BLN,
+        "export_bln": lambda: table["X"] / BLN,
+        "import_bln": lambda: table["M"] / BLN,
+    }
+    for name, compute in derived.items():
+        if name not in table:
+            table.set(name, compute())
+
+
+def _declining(table):
+    table.set("change_bln", table["change"] / BLN)
+    _short(table, "commodity_name", 25)
+
+
+def _growth(table):
+    _short(table, "commodity_name", 35)
+
+
+DERIVED = {
+    "trade_dynamics": lambda table: _yearly(table, "bln", BLN),
+    "russia_trade_dynamics": lambda table: _yearly(table, "mln", MLN),
+    "top_export_commodities": _ranked,
+    "top_import_commodities": _ranked,
+    "economic_sectors": _sectors,
+    "trade_geography": _geography,
+    "top_partner_countries": _partners,
+    "declining_commodities": _declining,
+    "export_growth": _growth,
+    "import_growth": _growth,
+}
+
+
+@metrics.phase("table")
+def table(section, kind, strings=None):
+    """Table из раздела (список записей или ColumnarSection) с производными колонками
+    раздела kind (например, ряд по одной стране разбирается как "russia_trade_dynamics")."""
+    if isinstance(section, ColumnarSection):
+        columns = {column: np.asarray(section[column]) for column in section}
+        rows = section.rows
+    else:
+        columns = records_to_columns(section)
+        rows = len(section)
+    result = Table(columns, strings if strings is not None else StringTable(), rows)
+    if rows and kind in DERIVED:
+        DERIVED[kind](result)
+    return result
+
+
+class TradeData(Mapping):
+    """Все разделы одной версии данных с общей таблицей строк.
+
+    Раздел разбирается при первом обращении: разделы без графиков (например,
+    declining_partners) колоночного хранилища так и не читаются с диска.
+    """
+
+    def __init__(self, data):
+        self.strings = StringTable()
+        self._data = data
+        self._tables = {}
+        # Разбор пополняет общую таблицу строк, поэтому разделы разбираются по одному
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        result = self._tables.get(name)
+        if result is None:
+            with self._lock:
+                result = self._tables.get(name)
+                if result is None:
+                    result = self._tables[name] = table(self._data[name], name, self.strings)
+        return result
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,91 @@
+"""Прореживание длинных рядов для графиков динамики.
+
+Ряд длиннее WEBGL_POINTS точек рисуется через Scattergl и прореживается
+методом min-max: ряд делится на корзины с равным числом точек, и из каждой
+остаются минимум и максимум, так что пики и провалы не теряются. В отличие
+от LTTB, где выбор точки зависит от предыдущей корзины, min-max целиком
+считается операциями NumPy.
+
+SeriesPyramid строит уровни один раз на версию данных: WEBGL_POINTS,
+2 x WEBGL_POINTS, 4 x ... точек на весь ряд. Для окна, выбранного зумом,
+берётся самый грубый уровень, на котором в окне не меньше WEBGL_POINTS
+точек, а если в окне точек и так немного - исходные точки без прореживания.
+"""
+import numpy as np
+
+from formatting import fmt_ru_array
+
+WEBGL_POINTS = 1000
+
+
+def minmax_indices(y, points=WEBGL_POINTS):
+    """Индексы примерно points точек ряда y (по возрастанию), с первой и последней."""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= points:
+        return np.arange(n)
+    buckets = max(points // 2, 1)
+    size = -(-n // buckets)
+    low = np.full(buckets * size, np.inf)
+    high = np.full(buckets * size, -np.inf)
+    present = ~np.isnan(y)
+    low[:n][present] = y[present]
+    high[:n][present] = y[present]
+    start = np.arange(buckets) * size
+    index = np.concatenate((
+        [0, n - 1],
+        start + low.reshape(buckets, size).argmin(axis=1),
+        start + high.reshape(buckets, size).argmax(axis=1),
+    ))
+    # Корзины из одного паддинга (в конце ряда) дают индексы за его пределами
+    return np.unique(index[index < n])
+
+
+class SeriesPyramid:
+    """Уровни прореживания для нескольких рядов с общей осью x (по возрастанию)."""
+
+    def __init__(self, x, ys, unit="bln", points=WEBGL_POINTS):
+        self.x = np.asarray(x)
+        if np.any(np.diff(self.x) < 0):
+            # Окна зума ищутся searchsorted по x
+            raise ValueError("Ось x ряда должна идти по возрастанию")
+        self.ys = [np.asarray(y, dtype=np.float64) for y in ys]
+        self.unit = unit
+        self.points = points
+        # levels[трасса] - от грубого уровня к подробному
+        self.levels = []
+        for y in self.ys:
+            levels = []
+            resolution = points
+            while resolution < len(y):
+                levels.append(minmax_indices(y, resolution))
+                resolution *= 2
+            self.levels.append(levels)
+
+    def indices(self, trace, x0=None, x1=None):
+        """Индексы точек трассы trace для окна [x0, x1] (None - весь ряд)."""
+        start = 0 if x0 is None else int(np.searchsorted(self.x, x0, side="left"))
+        stop = len(self.x) if x1 is None else int(np.searchsorted(self.x, x1, side="right"))
+        # По точке за краями окна, чтобы линия не обрывалась на границе
+        start, stop = max(start - 1, 0), min(stop + 1, len(self.x))
+        if stop - start <= 2 * self.points:
+            return np.arange(start, stop)
+        for level in self.levels[trace]:
+            inside = level[(level >= start) & (level < stop)]
+            if len(inside) >= self.points:
+                return inside
+        return np.arange(start, stop)
+
+    def figure(self, base, x0=None, x1=None):
+        """Копия фигуры base (dict) с точками окна [x0, x1] вместо обзорных."""
+        traces = []
+        for i, trace in enumerate(base["data"]):
+            index = self.indices(i, x0, x1)
+            y = self.ys[i][index]
+            traces.append(dict(trace, x=self.x[index].tolist(), y=y.tolist(),
+                               customdata=fmt_ru_array(y, self.unit)))
+        layout = base["layout"]
+        if x0 is not None and x1 is not None:
+            # Диапазон зума сохраняется, иначе plotly вернёт автомасштаб по новым данным
+            layout = dict(layout, xaxis=dict(layout.get("xaxis", {}), range=[x0, x1], autorange=False))
+        return {"data": traces, "layout": layout}
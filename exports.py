@@ -0,0 +1,135 @@
+"""Выгрузка разделов данных дашборда в CSV и Parquet.
+
+Ответ собирается генератором порциями по CHUNK_ROWS строк и уходит клиенту
+chunked-передачей: в памяти одновременно лежит одна порция, а не весь файл,
+а под gthread выгрузка занимает поток, а не весь воркер. Колонки колоночного
+хранилища - memory-map, поэтому порция читается с диска только при отправке.
+
+ETag выгрузки - версия данных и параметры запроса: если версия не менялась,
+повторный запрос с If-None-Match получает 304 без чтения данных.
+"""
+import csv
+import hashlib
+import importlib.util
+import io
+
+import flask
+import numpy as np
+
+from columnar import ColumnarSection, records_to_columns
+
+CHUNK_ROWS = 10_000
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def parquet_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def section_columns(section):
+    """Колонки раздела (список записей или ColumnarSection): имя -> массив, число строк."""
+    if isinstance(section, ColumnarSection):
+        return {column: section[column] for column in section}, section.rows
+    return records_to_columns(section), len(section)
+
+
+def filter_years(columns, rows, first=None, last=None):
+    """Строки с годом в [first, last]; раздел без колонки year не фильтруется."""
+    if "year" not in columns or (first is None and last is None):
+        return columns, rows
+    years = np.asarray(columns["year"])
+    mask = np.ones(rows, dtype=bool)
+    if first is not None:
+        mask &= years >= first
+    if last is not None:
+        mask &= years <= last
+    return {column: np.asarray(values)[mask] for column, values in columns.items()}, int(mask.sum())
+
+
+def _csv_values(values):
+    # Пропуски (NaN) в CSV - пустые ячейки
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        return ["" if value != value else value for value in values.tolist()]
+    return values.tolist()
+
+
+def csv_chunks(columns, rows, chunk_rows=CHUNK_ROWS):
+    names = list(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    # Хотя бы одна итерация: у пустого раздела остаётся строка заголовка
+    for start in range(0, max(rows, 1), chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        writer.writerows(zip(*(_csv_values(columns[name][start:stop]) for name in names)))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+class _Sink(io.RawIOBase):
+    """Файл для ParquetWriter, который отдаёт записанное порциями.
+
+    Позиция считается от начала файла: по ней pyarrow пишет смещения
+    row group в футер, поэтому обнулять её при выдаче порции нельзя.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def parquet_chunks(columns, rows, chunk_rows=CHUNK_ROWS):
+    # pyarrow нужен только для Parquet, поэтому импортируется здесь
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _Sink()
+    writer = None
+    # Каждая порция - отдельная row group, её байты уходят клиенту сразу
+    for start in range(0, max(rows, 1), chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        batch = pa.table({name: pa.array(np.asarray(values[start:stop]), from_pandas=True)
+                          for name, values in columns.items()})
+        if writer is None:
+            writer = pq.ParquetWriter(sink, batch.schema)
+        writer.write_table(batch)
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def export_response(request, columns, rows, fmt, filename, version, params):
+    """Потоковый ответ с выгрузкой колонок или 304, если версия данных не менялась."""
+    key = repr((filename, fmt, sorted(params.items()))).encode("utf-8")
+    etag = f"{version}-{hashlib.sha256(key).hexdigest()[:12]}"
+    if request.if_none_match.contains(etag):
+        response = flask.Response(status=304)
+    else:
+        chunks = csv_chunks(columns, rows) if fmt == "csv" else parquet_chunks(columns, rows)
+        response = flask.Response(chunks, mimetype=FORMATS[fmt])
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
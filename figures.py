@@ -0,0 +1,627 @@
+import plotly.graph_objects as go
+import plotly.io as pio
+import json
+import time
+
+import metrics
+from downsampling import WEBGL_POINTS, minmax_indices
+from formatting import fmt_ru_array
+
+
+# Трасса ряда по годам: до WEBGL_POINTS точек - обычный Scatter (SVG),
+# длиннее - Scattergl с прореженными min-max точками; подробные точки
+# при зуме отдаёт SeriesPyramid (downsampling.py)
+def series_trace(x, y, unit="bln", **kwargs):
+    if len(y) <= WEBGL_POINTS:
+        return go.Scatter(x=x, y=y, customdata=fmt_ru_array(y, unit), **kwargs)
+    index = minmax_indices(y)
+    y = y[index]
+    return go.Scattergl(x=x[index], y=y, customdata=fmt_ru_array(y, unit), **kwargs)
+
+
+# Фигура для динамики торговли
+def build_trade_dynamics(data):
+    # Годы и значения в млрд USD уже посчитаны в datamodel.TradeData
+    df = data["trade_dynamics"]
+    
+    fig = go.Figure()
+    
+    # Экспорт
+    fig.add_trace(series_trace(
+        df["year"],
+        df["X_bln"],
+        "bln",
+        mode="lines+markers",
+        name="Экспорт",
+        line=dict(color="#27ae60", width=3),
+        marker=dict(size=6),
+        hovertemplate="Год: %{x}<br>Экспорт: %{customdata}<extra></extra>"
+    ))
+    
+    # Импорт
+    fig.add_trace(series_trace(
+        df["year"],
+        df["M_bln"],
+        "bln",
+        mode="lines+markers",
+        name="Импорт",
+        line=dict(color="#e74c3c", width=3),
+        marker=dict(size=6),
+        hovertemplate="Год: %{x}<br>Импорт: %{customdata}<extra></extra>"
+    ))
+    
+    # Сальдо на второй оси
+    fig.add_trace(series_trace(
+        df["year"],
+        df["balance_bln"],
+        "bln",
+        mode="lines+markers",
+        name="Сальдо",
+        line=dict(color="#3498db", width=3),
+        marker=dict(size=6),
+        yaxis="y2",
+        hovertemplate="Год: %{x}<br>Сальдо: %{customdata}<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        title="Динамика экспорта, импорта и торгового сальдо",
+        xaxis_title="Год",
+        yaxis=dict(
+            title="Объём торговли (млрд USD)",
+            side="left",
+            tickformat=".1f", # Format for billion USD
+            gridcolor="rgba(0,0,0,0.05)"
+        ),
+        yaxis2=dict(
+            title="Торговое сальдо (млрд USD)",
+            side="right",
+            overlaying="y",
+            tickformat=".1f", # Format for billion USD
+            gridcolor="rgba(0,0,0,0.05)"
+        ),
+        hovermode="x unified",
+        legend=dict(x=0.02, y=0.98),
+        height=400,
+        font=dict(family="Arial", size=12),
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)" # Transparent background
+    )
+    
+    return fig
+
+# Фигура для ТОП-10 товарных групп по экспорту
+def build_top_commodities_export(data):
+    # value_bln и сокращённые названия (short_name) готовы в datamodel.TradeData
+    df = data["top_export_commodities"]
+    
+    fig = go.Figure(go.Bar(
+        x=df["value_bln"],
+        y=df["short_name"],
+        orientation="h",
+        marker_color="#27ae60",
+        text=fmt_ru_array(df["value_bln"]),
+        textposition="inside",
+        textfont=dict(color="white", size=10),
+        hovertemplate="%{customdata}<br>Объём: %{text}<extra></extra>",
+        customdata=df["commodity_name"]
+    ))
+    
+    fig.update_layout(
+        title="ТОП-10 товарных групп по экспорту",
+        xaxis_title="Объём (млрд USD)",
+        yaxis_title="Товарная группа",
+        height=500,
+        margin=dict(l=200),
+        font=dict(family="Arial", size=10),
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для ТОП-10 товарных групп по импорту
+def build_top_commodities_import(data):
+    # value_bln и сокращённые названия (short_name) готовы в datamodel.TradeData
+    df = data["top_import_commodities"]
+    
+    fig = go.Figure(go.Bar(
+        x=df["value_bln"],
+        y=df["short_name"],
+        orientation="h",
+        marker_color="rgba(0,123,255,0.8)",  # Bootstrap primary blue
+        text=fmt_ru_array(df["value_bln"]),
+        textposition="inside",
+        textfont=dict(color="white", size=10),
+        hovertemplate="%{customdata}<br>Объём: %{text}<extra></extra>",
+        customdata=df["commodity_name"]
+    ))
+    
+    fig.update_layout(
+        title="ТОП-10 товарных групп по импорту",
+        xaxis_title="Объём (млрд USD)",
+        yaxis_title="Товарная группа",
+        height=500,
+        margin=dict(l=200),
+        font=dict(family="Arial", size=10),
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для экономических секторов
+def build_economic_sectors(data):
+    # plotly.subplots нужен только этому графику, импортируем по месту
+    from plotly.subplots import make_subplots
+
+    # Доли секторов в процентах и сокращённые названия готовы в datamodel.TradeData
+    df = data["economic_sectors"]
+
+    fig = make_subplots(rows=1, cols=2, specs=[[{"type": "domain"}, {"type": "domain"}]],
+                        subplot_titles=("Доля экспорта по секторам", "Доля импорта по секторам"))
+
+    fig.add_trace(go.Pie(
+        labels=df["short_sector"],
+        values=df["export_pct"],
+        hole=0.4,
+        name="Экспорт",
+        hovertemplate="%{label}<br>%{value:.1f}%<extra></extra>"
+    ), row=1, col=1)
+
+    fig.add_trace(go.Pie(
+        labels=df["short_sector"],
+        values=df["import_pct"],
+        hole=0.4,
+        name="Импорт",
+        hovertemplate="%{label}<br>%{value:.1f}%<extra></extra>"
+    ), row=1, col=2)
+
+    fig.update_layout(
+        height=500,
+        title_text="Распределение экспорта и импорта по секторам",
+        showlegend=False,
+        font=dict(family="Arial", size=10),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)"
+    )
+
+    return fig
+
+# Фигура для географии торговли
+def build_trade_geography(data):
+    df = data["trade_geography"]
+
+    # Исключаем неизвестные регионы
+    df_filtered = df.filter(df["known"])
+    
+    fig = go.Figure()
+    
+    # Экспорт
+    fig.add_trace(go.Bar(
+        x=df_filtered["world_part"],
+        y=df_filtered["export_pct"],
+        name="Экспорт",
+        marker_color="#27ae60",
+        text=[f"{val:.1f}%" for val in df_filtered["export_pct"]],
+        textposition="inside",
+        hovertemplate="%{x}<br>Экспорт: %{customdata}<br>Доля: %{text}<extra></extra>",
+        customdata=fmt_ru_array(df_filtered["X_bln"])
+    ))
+    
+    # Импорт
+    fig.add_trace(go.Bar(
+        x=df_filtered["world_part"],
+        y=df_filtered["import_pct"],
+        name="Импорт",
+        marker_color="#e74c3c",
+        text=[f"{val:.1f}%" for val in df_filtered["import_pct"]],
+        textposition="inside",
+        hovertemplate="%{x}<br>Импорт: %{customdata}<br>Доля: %{text}<extra></extra>",
+        customdata=fmt_ru_array(df_filtered["M_bln"])
+    ))
+    
+    fig.update_layout(
+        title="Доля торговли по регионам мира",
+        xaxis_title="Регион",
+        yaxis_title="Доля в торговле (%)",
+        barmode="group",
+        height=400,
+        font=dict(family="Arial", size=12),
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для ТОП-10 стран-партнёров
+def build_top_countries(data):
+    df = data["top_partner_countries"]
+
+    # Use the pre-calculated balance_bln and turnover_bln from data_preparation.py
+    colors = ["#27ae60" if bal >= 0 else "#e74c3c" for bal in df["balance_bln"]]
+    turnover_labels = fmt_ru_array(df["turnover_bln"])
+    
+    fig = go.Figure(go.Bar(
+        x=df["country_name"],
+        y=df["turnover_bln"],
+        marker_color=colors,
+        text=turnover_labels,
+        textposition="outside",
+        hovertemplate="%{x}<br>Общий объём торговли: %{customdata}<extra></extra>",
+        customdata=turnover_labels
+    ))
+    
+    fig.update_layout(
+        title="ТОП-10 стран-партнёров по общему объёму торговли",
+        xaxis_title="Страна",
+        yaxis_title="Объём торговли (млрд USD)",
+        height=400,
+        font=dict(family="Arial", size=10),
+        xaxis_tickangle=-45,
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для двусторонней торговли с одной страной по годам; section - таблица
+# раздела russia_trade_dynamics (datamodel.table) с рядами в млн USD
+def build_bilateral_trade(section, title="Торговля с Россией (5 лет)", empty_text="Нет данных по торговле с Россией"):
+    df = section
+    
+    if df.empty:
+        # Если нет данных по стране, показываем пустой график
+        fig = go.Figure()
+        fig.add_annotation(
+            text=empty_text,
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=16, color="gray")
+        )
+        fig.update_layout(
+            title=title,
+            height=400,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+            paper_bgcolor="rgba(0,0,0,0)" # Transparent background
+        )
+        return fig
+
+    fig = go.Figure()
+    
+    # Экспорт
+    fig.add_trace(series_trace(
+        df["year"],
+        df["X_mln"],
+        "mln",
+        mode="lines+markers",
+        name="Экспорт",
+        line=dict(color="#27ae60", width=3),
+        marker=dict(size=6),
+        hovertemplate="Год: %{x}<br>Экспорт: %{customdata}<extra></extra>"
+    ))
+    
+    # Импорт
+    fig.add_trace(series_trace(
+        df["year"],
+        df["M_mln"],
+        "mln",
+        mode="lines+markers",
+        name="Импорт",
+        line=dict(color="#e74c3c", width=3),
+        marker=dict(size=6),
+        hovertemplate="Год: %{x}<br>Импорт: %{customdata}<extra></extra>"
+    ))
+    
+    # Сальдо
+    fig.add_trace(series_trace(
+        df["year"],
+        df["balance_mln"],
+        "mln",
+        mode="lines+markers",
+        name="Сальдо",
+        line=dict(color="#3498db", width=3),
+        marker=dict(size=6),
+        hovertemplate="Год: %{x}<br>Сальдо: %{customdata}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Год",
+        yaxis_title="Объём торговли (млн USD)",
+        hovermode="x unified",
+        legend=dict(x=0.02, y=0.98),
+        height=400,
+        font=dict(family="Arial", size=12),
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для торговли с Россией
+def build_russia_trade(data):
+    return build_bilateral_trade(data["russia_trade_dynamics"])
+
+# Фигура для изменений структуры торговли
+def build_structure_changes(data):
+    df = data["declining_commodities"]
+    
+    if df.empty:
+        # Если нет данных, показываем пустой график
+        fig = go.Figure()
+        fig.add_annotation(
+            text="Недостаточно данных для анализа изменений структуры",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=16, color="gray")
+        )
+        fig.update_layout(
+            title="Изменения структуры экспорта (10 лет)",
+            height=400,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+            paper_bgcolor="rgba(0,0,0,0)" # Transparent background
+        )
+        return fig
+    
+    fig = go.Figure(go.Bar(
+        x=df["change_bln"],
+        y=df["short_name"],
+        orientation="h",
+        marker_color="#e74c3c",
+        text=fmt_ru_array(df["change_bln"]),
+        textposition="inside",
+        textfont=dict(color="white", size=10),
+        hovertemplate="%{customdata}<br>Изменение: %{text}<extra></extra>",
+        customdata=df["commodity_name"]
+    ))
+    
+    fig.update_layout(
+        title="Товарные группы с наибольшим снижением объёмов торговли",
+        xaxis_title="Изменение объёма (млрд USD)",
+        yaxis_title="Товарная группа",
+        height=400,
+        margin=dict(l=200),
+        font=dict(family="Arial", size=10),
+        plot_bgcolor="rgba(0,0,0,0)", # Transparent background
+        paper_bgcolor="rgba(0,0,0,0)", # Transparent background
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для топ-5 прироста экспорта
+def build_top_growth_export(data):
+    df = data["export_growth"]
+    
+    if df.empty:
+        # Если нет данных, показываем пустой график
+        fig = go.Figure()
+        fig.add_annotation(
+            text="Нет данных по приросту экспорта",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=16, color="gray")
+        )
+        fig.update_layout(
+            title="Топ-5 прироста по экспорту (2021→2023)",
+            height=400,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)"
+        )
+        return fig
+    
+    fig = go.Figure(go.Bar(
+        x=df["delta"],
+        y=df["short_name"],
+        orientation="h",
+        marker_color="#28a745",  # Зеленый цвет для экспорта
+        text=fmt_ru_array(df["delta"]),
+        textposition="inside",
+        textfont=dict(color="white", size=10),
+        hovertemplate="%{customdata}<br>Прирост: %{text}<extra></extra>",
+        customdata=df["commodity_name"]
+    ))
+    
+    fig.update_layout(
+        title="Топ-5 прироста по экспорту (2021→2023)",
+        xaxis_title="Прирост объёма (млрд USD)",
+        yaxis_title="Товарная группа",
+        height=400,
+        margin=dict(l=200),
+        font=dict(family="Arial", size=10),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+# Фигура для топ-5 прироста импорта
+def build_top_growth_import(data):
+    df = data["import_growth"]
+    
+    if df.empty:
+        # Если нет данных, показываем пустой график
+        fig = go.Figure()
+        fig.add_annotation(
+            text="Нет данных по приросту импорта",
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            showarrow=False,
+            font=dict(size=16, color="gray")
+        )
+        fig.update_layout(
+            title="Топ-5 прироста по импорту (2021→2023)",
+            height=400,
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            plot_bgcolor="rgba(0,0,0,0)",
+            paper_bgcolor="rgba(0,0,0,0)"
+        )
+        return fig
+    
+    fig = go.Figure(go.Bar(
+        x=df["delta"],
+        y=df["short_name"],
+        orientation="h",
+        marker_color="#ff5733",  # Красно-оранжевый цвет для импорта
+        text=fmt_ru_array(df["delta"]),
+        textposition="inside",
+        textfont=dict(color="white", size=10),
+        hovertemplate="%{customdata}<br>Прирост: %{text}<extra></extra>",
+        customdata=df["commodity_name"]
+    ))
+    
+    fig.update_layout(
+        title="Топ-5 прироста по импорту (2021→2023)",
+        xaxis_title="Прирост объёма (млрд USD)",
+        yaxis_title="Товарная группа",
+        height=400,
+        margin=dict(l=200),
+        font=dict(family="Arial", size=10),
+        plot_bgcolor="rgba(0,0,0,0)",
+        paper_bgcolor="rgba(0,0,0,0)",
+        xaxis=dict(gridcolor="rgba(0,0,0,0.05)"),
+        yaxis=dict(gridcolor="rgba(0,0,0,0.05)")
+    )
+    
+    return fig
+
+
+# Фрагмент готовой фигуры-ряда по индексам точек [start, stop):
+# новые списки только у x/y/customdata, остальное разделяется с оригиналом
+def slice_figure(figure, start, stop):
+    traces = []
+    for trace in figure["data"]:
+        trace = dict(trace)
+        for key in ("x", "y", "customdata"):
+            if key in trace:
+                trace[key] = trace[key][start:stop]
+        traces.append(trace)
+    return {"data": traces, "layout": figure["layout"]}
+
+
+# Графики-рейтинги: раздел, колонка значений и колонка подписей столбцов
+RANKING_BARS = {
+    "top-commodities-export-chart": ("top_export_commodities", "value_bln", "short_name"),
+    "top-commodities-import-chart": ("top_import_commodities", "value_bln", "short_name"),
+    "top-countries-chart": ("top_partner_countries", "turnover_bln", "country_name"),
+    "structure-changes-chart": ("declining_commodities", "change_bln", "short_name"),
+    "top-growth-export-chart": ("export_growth", "delta", "short_name"),
+    "top-growth-import-chart": ("import_growth", "delta", "short_name"),
+}
+
+
+# Готовая фигура-рейтинг (dict из FigureRegistry) со столбцами из data и
+# заголовком title: меняются только x/y/text/customdata, go.Figure не строится.
+# Пустой рейтинг или заглушка вместо столбцов строятся заново через FIGURE_BUILDERS
+def refill_ranking(figure, graph_id, data, title):
+    section, value_column, label_column = RANKING_BARS[graph_id]
+    df = data[section]
+    if df.empty or not figure["data"] or figure["data"][0].get("type") != "bar":
+        fig = FIGURE_BUILDERS[graph_id](data)
+        fig.update_layout(title=title)
+        return fig
+    values = df[value_column]
+    labels = fmt_ru_array(values)
+    trace = dict(figure["data"][0], text=labels)
+    if trace.get("orientation") == "h":
+        trace["x"], trace["y"] = values.tolist(), df[label_column].tolist()
+    else:
+        trace["x"], trace["y"] = df[label_column].tolist(), values.tolist()
+    if graph_id == "top-countries-chart":
+        # Как в build_top_countries: сумма в подсказке и цвет по знаку сальдо
+        trace["customdata"] = labels
+        trace["marker"] = dict(trace.get("marker", {}),
+                               color=["#27ae60" if bal >= 0 else "#e74c3c" for bal in df["balance_bln"]])
+    else:
+        trace["customdata"] = df["commodity_name"].tolist()
+    layout = figure["layout"]
+    return {"data": [trace], "layout": dict(layout, title=dict(layout.get("title", {}), text=title))}
+
+
+# Реестр фигур: id графика в макете -> функция построения
+FIGURE_BUILDERS = {
+    "trade-dynamics-chart": build_trade_dynamics,
+    "top-commodities-export-chart": build_top_commodities_export,
+    "top-commodities-import-chart": build_top_commodities_import,
+    "economic-sectors-chart": build_economic_sectors,
+    "trade-geography-chart": build_trade_geography,
+    "top-countries-chart": build_top_countries,
+    "russia-trade-chart": build_russia_trade,
+    "structure-changes-chart": build_structure_changes,
+    "top-growth-export-chart": build_top_growth_export,
+    "top-growth-import-chart": build_top_growth_import,
+}
+
+
+# Раздел dashboard_data.json, из которого строится каждый график
+FIGURE_SECTIONS = {
+    "trade-dynamics-chart": "trade_dynamics",
+    "top-commodities-export-chart": "top_export_commodities",
+    "top-commodities-import-chart": "top_import_commodities",
+    "economic-sectors-chart": "economic_sectors",
+    "trade-geography-chart": "trade_geography",
+    "top-countries-chart": "top_partner_countries",
+    "russia-trade-chart": "russia_trade_dynamics",
+    "structure-changes-chart": "declining_commodities",
+    "top-growth-export-chart": "export_growth",
+    "top-growth-import-chart": "import_growth",
+}
+
+
+# Графики-ряды, которые при длинном ряде прореживаются: раздел, колонки трасс
+# (в порядке трасс фигуры) и единицы подписей
+ZOOM_SERIES = {
+    "trade-dynamics-chart": ("trade_dynamics", ("X_bln", "M_bln", "balance_bln"), "bln"),
+    "russia-trade-chart": ("russia_trade_dynamics", ("X_mln", "M_mln", "balance_mln"), "mln"),
+}
+
+
+class FigureRegistry:
+    """Все фигуры дашборда, построенные один раз для набора данных
+    (datamodel.TradeData).
+
+    Хранит сериализованный JSON фигур и словари, которые передаются прямо
+    в dcc.Graph без повторного построения; сами go.Figure после
+    сериализации не держатся.
+    """
+
+    def __init__(self, data):
+        self.json = {}
+        self._dicts = {}
+        for graph_id, builder in FIGURE_BUILDERS.items():
+            with metrics.track_phases(builder.__name__) as phases:
+                fig = builder(data)
+                start = time.perf_counter()
+                self.json[graph_id] = pio.to_json(fig, validate=False)
+                phases["serialize"] = time.perf_counter() - start
+            self._dicts[graph_id] = json.loads(self.json[graph_id])
+
+    def __contains__(self, graph_id):
+        return graph_id in self._dicts
+
+    def figure(self, graph_id):
+        # Простой dict кодируется Dash быстрее, чем go.Figure с валидацией
+        return self._dicts[graph_id]
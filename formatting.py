@@ -0,0 +1,49 @@
+"""Форматирование денежных сумм для подписей графиков.
+
+fmt_ru форматирует одно число, fmt_ru_array - целую колонку: единица
+(млрд или млн USD) и знак выбираются сразу для всего массива, а строка
+числа собирается один раз на каждое уникальное значение.
+"""
+import numpy as np
+
+import metrics
+
+# Во сколько раз исходная единица колонки меньше миллиарда
+UNITS = {"bln": 1, "mln": 1_000, "usd": 1_000_000_000}
+
+
+# Функция для форматирования чисел
+@metrics.phase("format")
+def fmt_ru(v):
+    # None и NaN (NaN не равен сам себе) - пустая подпись
+    if v is None or v != v:
+        return ""
+    abs_v = abs(v)
+    sign = "-" if v < 0 else ""
+    if abs_v >= 1:
+        return f"{sign}{abs_v:,.1f} млрд USD".replace(",", " ")
+    else:
+        return f"{sign}{abs_v*1_000:,.1f} млн USD".replace(",", " ")
+
+
+@metrics.phase("format")
+def fmt_ru_array(values, unit="bln"):
+    """Подписи fmt_ru для колонки values в единицах unit ("bln", "mln" или "usd")."""
+    values = np.asarray(values, dtype=float)
+    if UNITS[unit] != 1:
+        values = values / UNITS[unit]
+    labels = np.full(values.shape, "", dtype=object)
+    present = ~np.isnan(values)
+    if not present.any():
+        return labels.tolist()
+
+    values = values[present]
+    magnitude = np.abs(values)
+    billions = magnitude >= 1
+    scaled = np.where(billions, magnitude, magnitude * 1_000)
+    unique, inverse = np.unique(scaled, return_inverse=True)
+    numbers = np.array([f"{v:,.1f}".replace(",", " ") for v in unique], dtype=object)
+    signs = np.where(values < 0, "-", "").astype(object)
+    units = np.where(billions, " млрд USD", " млн USD").astype(object)
+    labels[present] = signs + numbers[inverse] + units
+    return labels.tolist()
@@ -0,0 +1,95 @@
+# Конфигурация gunicorn для дашборда.
+#
+# preload_app: app.py импортируется один раз в мастере - там читается
+# dashboard_data.json, строятся все фигуры и сериализуется макет. Воркеры
+# получают эти объекты через fork и делят страницы памяти с мастером
+# (copy-on-write), пока не начнут их изменять.
+#
+# Модель воркеров: на запрос приходится только выдача готовых данных,
+# поэтому процессов столько же, сколько доступно ядер, но не больше
+# MAX_WORKERS (WEB_CONCURRENCY задаёт число явно), а параллельность внутри
+# процесса дают потоки gthread (GUNICORN_THREADS). Каждый лишний процесс
+# стоит памяти, поток - почти ничего.
+import gc
+import glob
+import math
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") != "0"
+worker_class = "gthread"
+# Потолок числа воркеров по умолчанию: на большой машине или в контейнере
+# с лимитом памяти процесс на каждое видимое ядро может не поместиться в память
+MAX_WORKERS = 4
+
+
+def available_cpus():
+    """Ядра, доступные процессу: маска affinity и квота CPU cgroup (v2 или v1)."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    quota = period = None
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            pass
+    # "max" (v2) или -1 (v1) - квоты нет
+    if quota not in (None, "max", "-1") and int(period) > 0:
+        cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    return max(cpus, 1)
+
+
+workers = int(os.environ.get("WEB_CONCURRENCY", min(available_cpus(), MAX_WORKERS)))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+timeout = 60
+# Держим соединение открытым, пока браузер догружает ассеты и колбэки
+keepalive = 5
+
+# Каталог, через который воркеры складывают метрики для /metrics (см. metrics.py).
+# Задаётся до импорта app, чтобы его увидели и мастер, и воркеры
+if "METRICS_DIR" in os.environ:
+    for stale in glob.glob(os.path.join(os.environ["METRICS_DIR"], "worker-*.json")):
+        os.remove(stale)
+else:
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="dash-metrics-")
+    # Свой временный каталог удаляется при остановке сервера (on_exit); флаг в
+    # окружении переживает повторное чтение конфигурации при HUP
+    os.environ["METRICS_DIR_TEMPORARY"] = "1"
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    import app
+
+    # Ленивую инициализацию Dash (индекс, список колбэков) выполняем в мастере,
+    # чтобы воркеры получили её готовой
+    app.warm_up()
+    # Переносим все объекты в постоянное поколение: сборщик мусора в воркерах
+    # не будет их обходить и тем самым копировать общие страницы памяти
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+    import metrics
+
+    metrics.registry.reset()
+    metrics.registry.start_flusher()
+    # Потоки не наследуются при fork, наблюдатель за данными нужен в каждом воркере
+    # (в режиме нескольких стран файлы проверяются при обращении, потока нет)
+    if app.data_manager is not None:
+        app.data_manager.start()
+
+
+def on_exit(server):
+    if os.environ.get("METRICS_DIR_TEMPORARY") == "1":
+        shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
@@ -0,0 +1,293 @@
+"""Лёгкие метрики в формате Prometheus с агрегацией по воркерам gunicorn.
+
+Каждый процесс копит счётчики и гистограммы у себя в памяти и не чаще раза
+в FLUSH_INTERVAL секунд сбрасывает их в METRICS_DIR/worker-<pid>.json.
+Запрос /metrics, на какой бы воркер он ни попал, складывает файлы всех
+процессов (включая уже завершившиеся - счётчики монотонны) и отдаёт сумму.
+Без METRICS_DIR виден только текущий процесс.
+
+Фазы (построение DataFrame, форматирование чисел, фигура, сериализация)
+замеряются только внутри активного track_phases(): вне его обёртка phase()
+стоит одной проверки thread-local.
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get("METRICS_DIR")
+FLUSH_INTERVAL = 1.0
+
+# Границы корзин в секундах: от десятков микросекунд до секунд
+TIME_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Metric:
+    def __init__(self, registry, kind, name, help, labelnames, buckets=None):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._registry = registry
+        self.samples = {}
+        registry.metrics[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._registry.lock:
+            self.samples[key] = self.samples.get(key, 0.0) + amount
+
+    def set(self, value, **labels):
+        with self._registry.lock:
+            self.samples[self._key(labels)] = value
+
+    def clear(self):
+        with self._registry.lock:
+            self.samples.clear()
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._registry.lock:
+            sample = self.samples.get(key)
+            if sample is None:
+                sample = self.samples[key] = {"buckets": [0] * (len(self.buckets) + 1),
+                                              "sum": 0.0, "count": 0}
+            sample["buckets"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self._last_flush = 0.0
+        self._flusher_pid = None
+
+    def counter(self, name, help, labelnames=()):
+        return Metric(self, "counter", name, help, tuple(labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return Metric(self, "gauge", name, help, tuple(labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=TIME_BUCKETS):
+        return Metric(self, "histogram", name, help, tuple(labelnames), tuple(buckets))
+
+    def dump(self):
+        with self.lock:
+            return {
+                name: {"samples": [[list(key), dict(value, buckets=list(value["buckets"]))
+                                    if isinstance(value, dict) else value]
+                                   for key, value in metric.samples.items()]}
+                for name, metric in self.metrics.items()
+            }
+
+    def flush(self, force=False):
+        if METRICS_DIR is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        path = os.path.join(METRICS_DIR, f"worker-{os.getpid()}.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.dump(), f)
+        os.replace(tmp, path)
+
+    def start_flusher(self):
+        """Фоновый сброс раз в FLUSH_INTERVAL, чтобы последние запросы воркера
+        попали в /metrics, даже если новых запросов к нему больше не будет."""
+        if METRICS_DIR is None or self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(FLUSH_INTERVAL)
+                self.flush(force=True)
+
+        threading.Thread(target=loop, name="metrics-flusher", daemon=True).start()
+
+    def reset(self):
+        # После fork воркер начинает с нуля: всё, что накопил мастер,
+        # уже лежит в файле мастера и не должно считаться дважды
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.samples.clear()
+        self._last_flush = 0.0
+
+    def _collect(self):
+        """Список (dump, процесс жив) по всем процессам."""
+        if METRICS_DIR is None:
+            return [(self.dump(), True)]
+        self.flush(force=True)
+        dumps = []
+        for entry in os.listdir(METRICS_DIR):
+            if not (entry.startswith("worker-") and entry.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, entry), encoding="utf-8") as f:
+                    dumps.append((json.load(f), _alive(int(entry[len("worker-"):-len(".json")]))))
+            except (OSError, ValueError):
+                continue
+        return dumps
+
+    def render(self):
+        """Текст в формате Prometheus exposition 0.0.4, сумма по всем процессам."""
+        merged = {name: {} for name in self.metrics}
+        for dump, alive in self._collect():
+            for name, entry in dump.items():
+                # Счётчики завершившихся процессов остаются в сумме, gauge - нет
+                if name not in merged or (not alive and self.metrics[name].kind == "gauge"):
+                    continue
+                samples = merged[name]
+                for key, value in entry["samples"]:
+                    key = tuple(key)
+                    if isinstance(value, dict):
+                        total = samples.setdefault(key, {"buckets": [0] * len(value["buckets"]),
+                                                         "sum": 0.0, "count": 0})
+                        total["buckets"] = [a + b for a, b in zip(total["buckets"], value["buckets"])]
+                        total["sum"] += value["sum"]
+                        total["count"] += value["count"]
+                    else:
+                        samples[key] = samples.get(key, 0.0) + value
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(merged[name].items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip((*metric.buckets, "+Inf"), value["buckets"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', _number(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    value = float(value)
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+
+
+registry = Registry()
+
+request_seconds = registry.histogram(
+    "dash_request_seconds", "Длительность HTTP-запроса", ("endpoint", "method", "status"))
+response_bytes = registry.histogram(
+    "dash_response_bytes", "Размер тела ответа в байтах", ("endpoint",), buckets=SIZE_BUCKETS)
+callback_seconds = registry.histogram(
+    "dash_callback_seconds", "Длительность колбэка Dash целиком", ("callback",))
+phase_seconds = registry.histogram(
+    "dash_phase_seconds", "Длительность фазы внутри колбэка или построения фигуры", ("callback", "phase"))
+cache_requests = registry.counter(
+    "dash_response_cache_total", "Обращения к кэшу готовых ответов", ("endpoint", "result"))
+data_version = registry.gauge(
+    "dash_data_version_info", "Версия данных, которую отдаёт процесс (сумма - число процессов)", ("version",))
+data_reloads = registry.counter(
+    "dash_data_reloads_total", "Сколько раз данные были перезагружены")
+reporter_builds = registry.counter(
+    "dash_reporter_builds_total", "Сборки снимков стран в режиме нескольких стран")
+reporter_evictions = registry.counter(
+    "dash_reporter_evictions_total", "Снимки стран, вытесненные из кэша по бюджету памяти")
+reporters_cached_bytes = registry.gauge(
+    "dash_reporters_cached_bytes", "Оценка памяти собранных снимков стран, байт")
+
+
+_scope = threading.local()
+
+
+@contextmanager
+def track_phases(callback):
+    """Собирает фазы, отмеченные phase(), и записывает их в dash_phase_seconds.
+
+    Время, не попавшее ни в одну отмеченную фазу, записывается как фаза "figure".
+    """
+    phases = {}
+    previous = getattr(_scope, "phases", None)
+    _scope.phases = phases
+    start = time.perf_counter()
+    try:
+        yield phases
+    finally:
+        total = time.perf_counter() - start
+        _scope.phases = previous
+        for name, seconds in phases.items():
+            phase_seconds.observe(seconds, callback=callback, phase=name)
+        phase_seconds.observe(max(total - sum(phases.values()), 0.0), callback=callback, phase="figure")
+
+
+def phase(name):
+    """Декоратор: время вызовов функции засчитывается в фазу name активного track_phases()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            phases = getattr(_scope, "phases", None)
+            if phases is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+        return wrapper
+    return decorator
+
+
+def pop_last_callback():
+    """(имя, секунды) последнего колбэка в этом потоке, если он был."""
+    last = getattr(_scope, "last_callback", None)
+    _scope.last_callback = None
+    return last
+
+
+def instrument(callback):
+    """Декоратор колбэка Dash: общая длительность и фазы внутри него."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with track_phases(callback):
+                result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            callback_seconds.observe(elapsed, callback=callback)
+            _scope.last_callback = (callback, elapsed)
+            return result
+        return wrapper
+    return decorator
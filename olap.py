@@ -0,0 +1,180 @@
+"""Куб торговли поток × год × партнёр × товарная группа на NumPy.
+
+Строится data_preparation.py (--cube) из полного набора записей и хранится
+в одном .npz. В памяти держатся префиксные суммы по годам, поэтому сумма за
+любое окно лет - разность двух срезов, а не проход по годам. Для запросов по
+одному измерению (партнёры или товарные группы) префиксные суммы заранее
+свёрнуты по второму измерению, и запрос стоит O(число стран или групп).
+Рейтинги выбираются через np.argpartition, сортируются только n выбранных.
+
+Окно лет везде - пара (первый, последний) включительно.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FLOWS = ("X", "M")
+DIMS = ("partner", "commodity")
+
+# Число позиций и окна лет рейтингов в файле данных (data_preparation.py):
+# партнёры - за последние PARTNER_YEARS лет, снижение - вторая половина
+# окна STRUCTURE_YEARS лет против первой, прирост - последний год против
+# года GROWTH_YEARS лет назад
+TOP_N = 10
+GROWTH_TOP_N = 5
+PARTNER_YEARS = 5
+STRUCTURE_YEARS = 10
+GROWTH_YEARS = 2
+
+
+class TradeOlapCube:
+    def __init__(self, years, partners, commodities, values):
+        self.years = np.asarray(years, dtype=np.int64)
+        self.labels = {"partner": np.asarray(partners, dtype=str), "commodity": np.asarray(commodities, dtype=str)}
+        self._positions = {dim: {name: i for i, name in enumerate(labels)} for dim, labels in self.labels.items()}
+        flows, year_count, partner_count, commodity_count = values.shape
+        cumulative = np.zeros((flows, year_count + 1, partner_count, commodity_count))
+        np.cumsum(values, axis=1, out=cumulative[:, 1:])
+        self._cumulative = cumulative
+        # Те же префиксные суммы, свёрнутые до одного измерения: [поток, год, позиция]
+        self._dim_cumulative = {"partner": cumulative.sum(axis=3), "commodity": cumulative.sum(axis=2)}
+        # Версия файла, из которого загружен куб (задаёт CubeFile)
+        self.version = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Куб из таблицы с колонками year, flow, country_name, commodity_name, value."""
+        # pandas нужен только при подготовке данных, сервер его не импортирует
+        import pandas as pd
+
+        first, last = int(df["year"].min()), int(df["year"].max())
+        years = np.arange(first, last + 1)
+        partner_codes, partners = pd.factorize(df["country_name"], sort=True)
+        commodity_codes, commodities = pd.factorize(df["commodity_name"], sort=True)
+        flow_codes = df["flow"].map({flow: i for i, flow in enumerate(FLOWS)}).to_numpy()
+        shape = (len(FLOWS), len(years), len(partners), len(commodities))
+        flat = np.ravel_multi_index(
+            (flow_codes, df["year"].to_numpy() - first, partner_codes, commodity_codes), shape)
+        values = np.bincount(flat, weights=df["value"].to_numpy(), minlength=np.prod(shape)).reshape(shape)
+        return cls(years, list(partners), list(commodities), values)
+
+    def save(self, path):
+        values = np.diff(self._cumulative, axis=1)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, years=self.years, partners=self.labels["partner"],
+                 commodities=self.labels["commodity"], values=values)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(arrays["years"], arrays["partners"], arrays["commodities"], arrays["values"])
+
+    @property
+    def first_year(self):
+        return int(self.years[0])
+
+    @property
+    def last_year(self):
+        return int(self.years[-1])
+
+    def _bounds(self, years):
+        first, last = years
+        start = int(np.clip(first - self.first_year, 0, len(self.years)))
+        stop = int(np.clip(last - self.first_year + 1, 0, len(self.years)))
+        return start, max(start, stop)
+
+    def _window(self, cumulative, flow, years):
+        start, stop = self._bounds(years)
+        if flow == "turnover":
+            return (cumulative[:, stop] - cumulative[:, start]).sum(axis=0)
+        flow = FLOWS.index(flow)
+        return cumulative[flow, stop] - cumulative[flow, start]
+
+    def window(self, flow, years):
+        """Матрица партнёр × товарная группа: сумма flow ("X", "M" или "turnover") за годы."""
+        return self._window(self._cumulative, flow, years)
+
+    def totals(self, dim, flow, years):
+        """Вектор сумм flow за годы по всем позициям измерения dim."""
+        return self._window(self._dim_cumulative[dim], flow, years)
+
+    def top_n(self, dim, flow, years, n):
+        """n крупнейших позиций dim по сумме flow за годы: список (название, сумма)."""
+        values = self.totals(dim, flow, years)
+        index = _top_indices(values, n, largest=True)
+        return list(zip(self.labels[dim][index].tolist(), values[index].tolist()))
+
+    def delta(self, dim, window_a, window_b, flow="turnover", n=10, largest=True):
+        """n позиций dim с наибольшим ростом (largest) или снижением суммы flow
+        между окнами лет: список (название, сумма в a, сумма в b, изменение)."""
+        before = self.totals(dim, flow, window_a)
+        after = self.totals(dim, flow, window_b)
+        change = after - before
+        index = _top_indices(change, n, largest)
+        # Как в data_preparation: в рейтинг роста попадает только рост, снижения - только снижение
+        index = index[change[index] > 0] if largest else index[change[index] < 0]
+        return list(zip(self.labels[dim][index].tolist(), before[index].tolist(),
+                        after[index].tolist(), change[index].tolist()))
+
+    def flows(self, dim, years, names):
+        """Экспорт и импорт за годы для позиций names: список пар (X, M)."""
+        index = [self._positions[dim][name] for name in names]
+        exports = self.totals(dim, "X", years)[index]
+        imports = self.totals(dim, "M", years)[index]
+        return list(zip(exports.tolist(), imports.tolist()))
+
+
+class CubeFile:
+    """Куб из файла .npz, который перечитывается, когда файл сменился.
+
+    data_preparation.py --cube пишет новый куб атомарной заменой файла, как и
+    данные дашборда; проверка mtime стоит одного stat на запрос рейтинга.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._mtime = None
+        self._cube = None
+        self._lock = threading.Lock()
+        self.current  # первая загрузка сразу, ошибка в файле - ошибка старта
+
+    @property
+    def current(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return self._cube
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self._reload(mtime)
+        return self._cube
+
+    def _reload(self, mtime):
+        try:
+            cube = TradeOlapCube.load(self.path)
+        except (OSError, ValueError, KeyError) as exc:
+            if self._cube is None:
+                raise
+            # Битый файл: остаёмся на прежнем кубе до следующей записи файла
+            logger.warning("Не удалось загрузить куб %s: %s", self.path, exc)
+        else:
+            cube.version = f"{mtime:x}"
+            self._cube = cube
+            if self._mtime is not None:
+                logger.info("Куб %s перечитан", self.path)
+        self._mtime = mtime
+
+
+def _top_indices(values, n, largest):
+    n = min(n, len(values))
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    keys = -values if largest else values
+    index = np.argpartition(keys, n - 1)[:n]
+    return index[np.argsort(keys[index], kind="stable")]
@@ -0,0 +1,109 @@
+"""Ряды торговли по годам для каждой страны-партнёра, по файлу на страну.
+
+data_preparation.py (--partner-shards) пишет в каталог по JSON-файлу на
+страну и index.json со списком стран. Процесс читает файл страны только при
+первом запросе и держит не больше capacity рядов в LRU-кэше, поэтому память
+не растёт, сколько бы разных стран ни открывали пользователи.
+
+Как и в columnar.py, каждая выгрузка пишется в свой подкаталог версии, а
+index.json подменяется атомарно последним. Когда он меняется, индекс
+перечитывается, а кэш сбрасывается.
+"""
+import functools
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+INDEX = "index.json"
+DEFAULT_CAPACITY = 32
+# Сколько версий оставлять: старую ещё могут читать процессы со старым индексом
+KEEP_VERSIONS = 2
+
+
+def write_shards(series, root):
+    """Записывает {страна: записи year/M/X/balance} в каталог root, возвращает версию."""
+    raw = json.dumps(series, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    version = hashlib.sha256(raw).hexdigest()[:12]
+    os.makedirs(os.path.join(root, version), exist_ok=True)
+    files = {}
+    for i, (country, records) in enumerate(sorted(series.items())):
+        name = f"{version}/{i:04d}.json"
+        with open(os.path.join(root, name), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        files[country] = name
+    tmp = os.path.join(root, f"{INDEX}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "files": files}, f, ensure_ascii=False)
+    os.replace(tmp, os.path.join(root, INDEX))
+
+    versions = sorted((entry.path for entry in os.scandir(root) if entry.is_dir() and entry.name != version),
+                      key=os.path.getmtime, reverse=True)
+    for old in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(old, ignore_errors=True)
+    return version
+
+
+class PartnerShards:
+    def __init__(self, root, capacity=DEFAULT_CAPACITY):
+        self.root = root
+        self._lock = threading.Lock()
+        self._index_mtime = None
+        self._files = {}
+        self._version = None
+        self._load = functools.lru_cache(maxsize=capacity)(self._read)
+        self._refresh()
+
+    def _refresh(self):
+        # Индекса нет (ещё не записан или каталог чистят) - остаётся прежний
+        try:
+            mtime = os.stat(os.path.join(self.root, INDEX)).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._index_mtime:
+            return
+        with self._lock:
+            if mtime == self._index_mtime:
+                return
+            try:
+                with open(os.path.join(self.root, INDEX), encoding="utf-8") as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                return
+            self._files = index["files"]
+            self._version = index["version"]
+            self._load.cache_clear()
+            self._index_mtime = mtime
+
+    def _read(self, name):
+        # Файл страны удалён вместе со старой версией - ряд пустой
+        try:
+            with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    @property
+    def countries(self):
+        self._refresh()
+        return list(self._files)
+
+    def __contains__(self, country):
+        self._refresh()
+        return country in self._files
+
+    def series(self, country):
+        """Записи year/M/X/balance по стране; пустой список, если страны нет."""
+        self._refresh()
+        name = self._files.get(country)
+        return [] if name is None else self._load(name)
+
+    @property
+    def version(self):
+        """Версия набора рядов (хэш содержимого из index.json)."""
+        self._refresh()
+        return self._version
+
+    def cache_info(self):
+        return self._load.cache_info()
@@ -0,0 +1,36 @@
+"""Индекс стран-партнёров для карточки «Ключевой партнёр».
+
+Строки карточки форматируются один раз на версию данных и лежат в dict по
+названию страны, поэтому смена партнёра - поиск по ключу без DataFrame.
+"""
+from formatting import fmt_ru_array
+
+DEFAULT_PARTNER = "Германия"
+
+
+class PartnerIndex:
+    def __init__(self, table):
+        """table - раздел top_partner_countries из datamodel.TradeData."""
+        if table.empty:
+            self._cards = {}
+            return
+        self._cards = {
+            country: {"turnover": turnover, "export": export, "import": import_}
+            for country, turnover, export, import_ in zip(
+                table["country_name"].tolist(), fmt_ru_array(table["turnover_bln"]),
+                fmt_ru_array(table["export_bln"]), fmt_ru_array(table["import_bln"]))
+        }
+
+    def __contains__(self, country):
+        return country in self._cards
+
+    @property
+    def countries(self):
+        return list(self._cards)
+
+    @property
+    def default(self):
+        return DEFAULT_PARTNER if DEFAULT_PARTNER in self._cards else next(iter(self._cards), None)
+
+    def card(self, country):
+        return self._cards.get(country)
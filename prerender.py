@@ -0,0 +1,180 @@
+"""Статическая сборка дашборда: HTML, JSON фигур и ассеты без Python на пути запроса.
+
+Загружает данные (dashboard_data.json или колоночный каталог), собирает тот же
+снимок, что и app.py в режиме layout, и пишет в каталог:
+
+    index.html                   - страница из макета Dash (html.* -> HTML)
+    static/<файл>.<хэш>.<расш>   - custom.css, plotly.js, загрузчик фигур и
+                                   JSON каждой фигуры с хэшем содержимого в имени
+    build.json                   - версия данных и список файлов сборки
+
+Файлы в static/ неизменяемы и кэшируются навсегда (Cache-Control: immutable),
+index.html нужно отдавать с no-cache: новая версия данных даёт новые хэши,
+и старые файлы продолжают работать у тех, кто ещё открыл прошлую страницу.
+Слайдеры, списки и остальные элементы управления в статическую страницу не
+попадают - для них остаётся приложение app.py.
+
+    python prerender.py [--data dashboard_data.json] [--out site]
+"""
+import argparse
+import hashlib
+import html as html_escape
+import json
+import os
+import re
+
+import plotly
+
+TITLE = "Дашборд внешней торговли Финляндии"
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+PLOTLY_JS = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+
+# Свойства style, к числам которых React не добавляет "px"
+UNITLESS_STYLES = {"flex", "flexGrow", "flexShrink", "fontWeight", "lineHeight", "opacity", "order", "zIndex"}
+# Свойства компонентов html.*, которые становятся атрибутами тега
+ATTRIBUTES = {"id": "id", "className": "class", "title": "title", "href": "href", "src": "src",
+              "alt": "alt", "target": "target"}
+VOID_TAGS = {"img", "br", "hr", "input"}
+
+# Рисует фигуры из static/ по атрибуту data-figure контейнера графика
+STATIC_LOADER = """document.querySelectorAll("[data-figure]").forEach(function (element) {
+    fetch(element.getAttribute("data-figure"))
+        .then(function (response) { return response.json(); })
+        .then(function (figure) {
+            Plotly.newPlot(element, figure.data, figure.layout, {responsive: true});
+        });
+});
+"""
+
+
+def _style(style):
+    parts = []
+    for key, value in style.items():
+        if isinstance(value, (int, float)) and key not in UNITLESS_STYLES:
+            value = f"{value}px"
+        # marginBottom -> margin-bottom
+        name = re.sub(r"([A-Z])", r"-\1", key).lower()
+        parts.append(f"{name}:{value}")
+    return ";".join(parts)
+
+
+def _attributes(props):
+    attributes = []
+    for key, value in props.items():
+        if key in ATTRIBUTES:
+            name = ATTRIBUTES[key]
+        elif key.startswith(("data-", "aria-")):
+            name = key
+        elif key == "style":
+            name, value = "style", _style(value)
+        else:
+            continue
+        attributes.append(f' {name}="{html_escape.escape(str(value))}"')
+    return "".join(attributes)
+
+
+def render(node, figure_urls):
+    """HTML макета Dash: html.* - теги, dcc.Graph - контейнер фигуры, прочие dcc.* пропускаются."""
+    if node is None:
+        return ""
+    if isinstance(node, (list, tuple)):
+        return "".join(render(child, figure_urls) for child in node)
+    if isinstance(node, (str, int, float)):
+        return html_escape.escape(str(node))
+    component = node.to_plotly_json()
+    props = {key: value for key, value in component["props"].items() if value is not None}
+    if component["namespace"] == "dash_core_components":
+        if component["type"] != "Graph":
+            return ""
+        graph_id = props["id"]
+        height = props.get("figure", {}).get("layout", {}).get("height", 450)
+        return (f'<div id="{html_escape.escape(graph_id)}" data-figure="{figure_urls[graph_id]}"'
+                f' style="height:{height}px"></div>')
+    tag = component["type"].lower()
+    if tag in VOID_TAGS:
+        return f"<{tag}{_attributes(props)}>"
+    return f"<{tag}{_attributes(props)}>{render(props.get('children'), figure_urls)}</{tag}>"
+
+
+class StaticSite:
+    """Каталог сборки; файлы static/ получают хэш содержимого в имени."""
+
+    def __init__(self, root):
+        self.root = root
+        self.files = []
+        os.makedirs(os.path.join(root, "static"), exist_ok=True)
+
+    def add(self, name, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        stem, ext = os.path.splitext(name)
+        path = f"static/{stem}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+        full_path = os.path.join(self.root, path)
+        # Файл с тем же хэшем уже лежит от прошлой сборки - он тот же самый
+        if not os.path.exists(full_path):
+            self._write(full_path, body)
+        self.files.append(path)
+        return path
+
+    def write(self, name, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self._write(os.path.join(self.root, name), body)
+
+    @staticmethod
+    def _write(path, body):
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+
+def build_site(snapshot, root):
+    """Пишет статическую сборку снимка (data_manager.DataSnapshot) в root."""
+    site = StaticSite(root)
+    with open(os.path.join(ASSETS_DIR, "custom.css"), "rb") as f:
+        css = site.add("custom.css", f.read())
+    with open(PLOTLY_JS, "rb") as f:
+        plotly_js = site.add("plotly.min.js", f.read())
+    loader = site.add("static.js", STATIC_LOADER)
+    figure_urls = {graph_id: site.add(f"{graph_id}.json", body)
+                   for graph_id, body in snapshot.figures.json.items()}
+
+    page = (
+        '<!DOCTYPE html>\n<html lang="ru">\n<head>\n<meta charset="utf-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+        f'<meta name="data-version" content="{snapshot.version}">\n'
+        f"<title>{TITLE}</title>\n"
+        f'<link rel="stylesheet" href="{css}">\n'
+        f'<script src="{plotly_js}" defer></script>\n'
+        f'<script src="{loader}" defer></script>\n'
+        f"</head>\n<body>\n{render(snapshot.layout, figure_urls)}\n</body>\n</html>\n"
+    )
+    # index.html и манифест - последними, чтобы они ссылались только на готовые файлы
+    site.write("build.json", json.dumps({"version": snapshot.version, "files": site.files},
+                                        ensure_ascii=False, indent=2))
+    site.write("index.html", page)
+    return site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default="dashboard_data.json", help="JSON или колоночный каталог")
+    parser.add_argument("--out", default="site", help="каталог сборки")
+    args = parser.parse_args()
+
+    # Снимок собирает app.py в режиме layout (фигуры в макете); куб, ряды
+    # партнёров и режим нескольких стран дают только элементы управления
+    os.environ.update({"DASH_RENDER_MODE": "layout", "DASHBOARD_DATA": args.data,
+                       "DATA_RELOAD_INTERVAL": "0", "DASHBOARD_CUBE": "", "DASHBOARD_PARTNER_SHARDS": ""})
+    os.environ.pop("DASHBOARD_REPORTERS", None)
+    import app
+
+    snapshot = app.data_manager.current
+    site = build_site(snapshot, args.out)
+    print(f"версия данных {snapshot.version}: {len(site.files)} файлов в {args.out}/static, "
+          f"{os.path.join(args.out, 'index.html')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Профилирование отдельных запросов по требованию.
+
+Включается переменной окружения DASH_PROFILE_DIR - каталогом для результатов.
+После этого запрос с заголовком X-Dash-Profile: 1 или параметром ?profile=1
+выполняется под cProfile, а статистика сохраняется в
+DASH_PROFILE_DIR/<время>-<pid>-<имя>.pstats:
+
+- POST /_dash-update-component - сам колбэк, имя - id его выхода; кэш
+  готовых ответов (responses.py) для такого запроса пропускается;
+- GET /_dash-layout - полная сборка страницы для текущей версии данных
+  (все фигуры, макет, сжатые ответы), имя - "layout".
+
+Без DASH_PROFILE_DIR заголовок и параметр игнорируются.
+"""
+import cProfile
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.environ.get("DASH_PROFILE_DIR")
+HEADER = "X-Dash-Profile"
+QUERY_PARAM = "profile"
+
+# cProfile перехватывает sys.setprofile, поэтому одновременно профилируется
+# только один запрос на процесс; остальные выполняются как обычно
+_lock = threading.Lock()
+
+
+def requested(request):
+    if PROFILE_DIR is None:
+        return False
+    return request.headers.get(HEADER) == "1" or request.args.get(QUERY_PARAM) == "1"
+
+
+def start():
+    """Запускает профилировщик или возвращает None, если он уже занят."""
+    if not _lock.acquire(blocking=False):
+        logger.warning("Профилировщик уже занят другим запросом, запрос выполнен без профиля")
+        return None
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
+
+
+def finish(profile, name):
+    """Останавливает профилировщик и сохраняет .pstats, возвращает путь к файлу."""
+    profile.disable()
+    _lock.release()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_name = re.sub(r"[^\w.-]+", "_", name).strip("._") or "request"
+    path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{safe_name[:100]}.pstats")
+    profile.dump_stats(path)
+    logger.info("Профиль %s сохранён в %s", name, path)
+    return path
+
+
+@contextmanager
+def profiled(name):
+    profile = start()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            finish(profile, name)
@@ -0,0 +1,177 @@
+"""Несколько стран-декларантов в одном процессе.
+
+Каталог DASHBOARD_REPORTERS устроен так:
+
+    <root>/reporters.json               - {"fin": {"name": "Финляндия", "genitive": "Финляндии"}, ...}
+    <root>/<id>/dashboard_data.json     - данные страны (или колоночный каталог <root>/<id>/columnar)
+
+Первая страна в reporters.json открывается по умолчанию. Снимок страны
+(фигуры, макет, сжатые ответы) собирается при первом запросе и лежит в
+LRU-кэше с бюджетом памяти: при превышении бюджета вытесняются давно не
+открывавшиеся страны. Размер снимка оценивается по сериализованным формам
+(см. estimate_size), поэтому бюджет - приблизительный.
+
+Наблюдающих потоков на каждую страну нет: файл данных страны проверяется
+при обращении к ней, не чаще раза в interval секунд.
+
+Число открытий каждой страны сбрасывается в <root>/popularity/<pid>.json;
+warm() при старте собирает самые популярные страны заранее.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import metrics
+from columnar import is_columnar
+from data_manager import DataManager
+
+logger = logging.getLogger(__name__)
+
+INDEX = "reporters.json"
+POPULARITY_DIR = "popularity"
+POPULARITY_FLUSH_INTERVAL = 60.0
+# Во сколько раз объекты Python (словари фигур, дерево макета, разобранные
+# данные) больше своих сериализованных форм; измерено через tracemalloc
+# на dashboard_data.json
+SIZE_FACTOR = 6
+
+
+def estimate_size(snapshot):
+    """Примерный объём снимка в памяти, байт."""
+    serialized = sum(len(body) for body in snapshot.figures.json.values())
+    compressed = 0
+    for response in snapshot.responses.values():
+        serialized += len(response.body)
+        compressed += sum(len(body) for encoding, body in response.encoded.items()
+                          if encoding is not None and body is not None)
+    return SIZE_FACTOR * serialized + compressed
+
+
+class ReporterRegistry:
+    def __init__(self, root, build, budget_bytes, interval=10.0):
+        """build(data, version, reporter) -> DataSnapshot для страны reporter (id)."""
+        self.root = root
+        self.build = build
+        self.budget_bytes = budget_bytes
+        self.interval = interval
+        with open(os.path.join(root, INDEX), encoding="utf-8") as f:
+            self.reporters = json.load(f)
+        if not self.reporters:
+            raise ValueError(f"В {os.path.join(root, INDEX)} нет ни одной страны")
+        self.default = next(iter(self.reporters))
+        self.popularity = Counter()
+        self._cache = OrderedDict()  # id -> [DataManager, размер, время проверки]
+        self._lock = threading.Lock()
+        self._build_locks = {reporter: threading.Lock() for reporter in self.reporters}
+        self._flushed = time.monotonic()
+
+    def resolve(self, pathname):
+        """id страны по пути страницы ("/swe" -> "swe"), неизвестный путь - страна по умолчанию."""
+        reporter = (pathname or "").strip("/").split("/", 1)[0]
+        return reporter if reporter in self.reporters else self.default
+
+    def data_path(self, reporter):
+        path = os.path.join(self.root, reporter, "columnar")
+        return path if is_columnar(path) else os.path.join(self.root, reporter, "dashboard_data.json")
+
+    def manager(self, reporter, visit=False):
+        """DataManager страны; visit=True - открытие страницы, учитывается в популярности."""
+        if visit:
+            self.popularity[reporter] += 1
+            self._maybe_flush_popularity()
+        with self._lock:
+            entry = self._cache.get(reporter)
+            if entry is not None:
+                self._cache.move_to_end(reporter)
+        if entry is None:
+            entry = self._load(reporter)
+        elif self.interval > 0 and time.monotonic() - entry[2] >= self.interval:
+            entry[2] = time.monotonic()
+            if entry[0].check():
+                entry[1] = estimate_size(entry[0].current)
+                with self._lock:
+                    self._evict()
+        return entry[0]
+
+    def snapshot(self, reporter, visit=False):
+        return self.manager(reporter, visit).current
+
+    def _load(self, reporter):
+        # Одна сборка на страну, даже если её одновременно запросили несколько потоков
+        with self._build_locks[reporter]:
+            with self._lock:
+                entry = self._cache.get(reporter)
+            if entry is not None:
+                return entry
+            start = time.perf_counter()
+            manager = DataManager(self.data_path(reporter),
+                                  lambda data, version: self.build(data, version, reporter), interval=0)
+            entry = [manager, estimate_size(manager.current), time.monotonic()]
+            metrics.reporter_builds.inc()
+            logger.info("Страна %s собрана за %.2f с, ~%.1f МБ", reporter,
+                        time.perf_counter() - start, entry[1] / 1_000_000)
+            with self._lock:
+                self._cache[reporter] = entry
+                self._evict()
+            return entry
+
+    def _evict(self):
+        # Самая свежая страна остаётся, даже если одна не влезает в бюджет
+        while len(self._cache) > 1 and self.cached_bytes > self.budget_bytes:
+            reporter, _ = self._cache.popitem(last=False)
+            metrics.reporter_evictions.inc()
+            logger.info("Страна %s вытеснена из кэша", reporter)
+
+    @property
+    def cached(self):
+        return list(self._cache)
+
+    @property
+    def cached_bytes(self):
+        return sum(entry[1] for entry in self._cache.values())
+
+    def _maybe_flush_popularity(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._flushed < POPULARITY_FLUSH_INTERVAL:
+            return
+        self._flushed = now
+        directory = os.path.join(self.root, POPULARITY_DIR)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{os.getpid()}.json")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(dict(self.popularity), f)
+            os.replace(f"{path}.tmp", path)
+        except OSError as exc:
+            logger.warning("Не удалось сохранить популярность стран: %s", exc)
+
+    def load_popularity(self):
+        """Сумма открытий стран по всем сохранённым файлам (все процессы и запуски)."""
+        total = Counter()
+        directory = os.path.join(self.root, POPULARITY_DIR)
+        if not os.path.isdir(directory):
+            return total
+        for entry in os.listdir(directory):
+            if not entry.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, entry), encoding="utf-8") as f:
+                    total.update(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return total
+
+    def warm(self, count):
+        """Собирает заранее count самых популярных стран (в пределах бюджета)."""
+        popularity = self.load_popularity()
+        order = sorted(self.reporters, key=lambda reporter: -popularity.get(reporter, 0))
+        warmed = []
+        for reporter in order[:count]:
+            self._load(reporter)
+            if reporter not in self._cache:
+                break
+            warmed.append(reporter)
+        return warmed
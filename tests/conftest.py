@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Модули приложения лежат в корне репозитория
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
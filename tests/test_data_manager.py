@@ -0,0 +1,57 @@
+import json
+import os
+
+import pytest
+
+from data_manager import DataManager, validate_data
+
+
+@pytest.fixture
+def data():
+    with open("dashboard_data.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write(path, data, mtime):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    # mtime задаётся явно: две записи подряд могут попасть в один тик часов
+    os.utime(path, ns=(mtime, mtime))
+
+
+def manager(tmp_path, data):
+    import app
+
+    path = tmp_path / "dashboard_data.json"
+    write(path, data, 1_000_000_000)
+    return path, DataManager(str(path), app.build_snapshot, interval=0)
+
+
+def test_validate_rejects_empty_trade_dynamics(data):
+    data["trade_dynamics"] = []
+    with pytest.raises(ValueError, match="trade_dynamics"):
+        validate_data(data)
+
+
+def test_validate_rejects_missing_columns(data):
+    data["top_partner_countries"] = [{"country_name": "Швеция", "X": 1.0}]
+    with pytest.raises(ValueError, match="top_partner_countries"):
+        validate_data(data)
+
+
+def test_broken_file_keeps_previous_snapshot(tmp_path, data):
+    path, dm = manager(tmp_path, data)
+    previous = dm.current
+
+    # Структура верна, но суммы - строки: проверку проходит, сборка снимка падает
+    broken = dict(data, trade_dynamics=[dict(row, X="много") for row in data["trade_dynamics"]])
+    validate_data(broken)
+    write(path, broken, 2_000_000_000)
+    assert dm.check() is False
+    assert dm.current is previous
+    # Та же запись файла повторно не разбирается
+    assert dm.check() is False
+
+    fixed = dict(data, trade_dynamics=data["trade_dynamics"][1:])
+    write(path, fixed, 3_000_000_000)
+    assert dm.check() is True
+    assert dm.current is not previous
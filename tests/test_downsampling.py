@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from downsampling import SeriesPyramid, minmax_indices
+
+POINTS = 100
+
+
+@pytest.fixture(scope="module")
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000, 1000 + 5003)
+    y = np.cumsum(rng.normal(0, 1, len(x)))
+    # Одиночные выбросы и пропуски не должны теряться и ломать корзины
+    y[[17, 2500, 5002]] = [100.0, -100.0, 50.0]
+    y[[40, 41, 3000]] = np.nan
+    return x, y
+
+
+def test_minmax_keeps_bucket_extremes(series):
+    _, y = series
+    for points in (POINTS, 2 * POINTS, 4 * POINTS):
+        index = minmax_indices(y, points)
+        assert index[0] == 0 and index[-1] == len(y) - 1
+        assert np.all(np.diff(index) > 0)
+        size = -(-len(y) // (points // 2))
+        kept = set(index.tolist())
+        for start in range(0, len(y), size):
+            bucket = y[start:start + size]
+            if np.isnan(bucket).all():
+                continue
+            assert start + int(np.nanargmin(bucket)) in kept
+            assert start + int(np.nanargmax(bucket)) in kept
+        assert y[index][~np.isnan(y[index])].min() == np.nanmin(y)
+        assert y[index][~np.isnan(y[index])].max() == np.nanmax(y)
+
+
+def test_short_series_is_not_downsampled():
+    assert minmax_indices(np.arange(POINTS), POINTS).tolist() == list(range(POINTS))
+
+
+def test_pyramid_levels_keep_global_extremes(series):
+    x, y = series
+    pyramid = SeriesPyramid(x, [y, -y], points=POINTS)
+    for trace, values in enumerate(pyramid.ys):
+        assert len(pyramid.levels[trace]) == 6  # 100, 200, ..., 3200 точек на весь ряд
+        for level in pyramid.levels[trace]:
+            assert np.nanmin(values[level]) == np.nanmin(values)
+            assert np.nanmax(values[level]) == np.nanmax(values)
+
+
+def test_zoom_windows(series):
+    x, y = series
+    pyramid = SeriesPyramid(x, [y], points=POINTS)
+    # Весь ряд - самый грубый уровень
+    assert pyramid.indices(0).tolist() == pyramid.levels[0][0].tolist()
+    # Окно не длиннее 2 x POINTS точек - исходные точки плюс по одной за краями
+    index = pyramid.indices(0, 2000, 2000 + 2 * POINTS - 3)
+    assert index.tolist() == list(range(999, 999 + 2 * POINTS))
+    index = pyramid.indices(0, 1000, 1010)
+    assert index.tolist() == list(range(0, 12))
+    # Окно длиннее порога - точки уровня внутри окна, не меньше POINTS
+    index = pyramid.indices(0, 2000, 3500)
+    assert POINTS <= len(index) < 1502
+    assert index.min() >= 999 and index.max() <= 2501
+
+
+def test_figure_window_range(series):
+    x, y = series
+    pyramid = SeriesPyramid(x, [y], unit="mln", points=POINTS)
+    base = {"data": [{"type": "scattergl", "name": "Экспорт"}], "layout": {"xaxis": {"title": "Год"}}}
+    figure = pyramid.figure(base, 2000, 2050)
+    trace = figure["data"][0]
+    assert trace["name"] == "Экспорт" and trace["x"] == x[999:1052].tolist()
+    assert len(trace["customdata"]) == len(trace["y"])
+    assert figure["layout"]["xaxis"] == {"title": "Год", "range": [2000, 2050], "autorange": False}
+    assert pyramid.figure(base)["layout"] is base["layout"]
+
+
+def test_unsorted_x_is_rejected():
+    with pytest.raises(ValueError):
+        SeriesPyramid([2001, 2000, 2002], [[1.0, 2.0, 3.0]])
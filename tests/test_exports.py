@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pytest
+
+import exports
+import metrics
+
+
+def columns():
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1e9, 25)
+    values[[3, 20]] = np.nan
+    return {"year": np.arange(2000, 2025), "country_name": np.array([f"Страна {i}" for i in range(25)], dtype=object),
+            "X": values}
+
+
+def test_csv_chunks_match_csv_writer():
+    data = columns()
+    chunks = list(exports.csv_chunks(data, 25, chunk_rows=10))
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == ["year", "country_name", "X"]
+    assert len(rows) == 26
+    for row, year, name, value in zip(rows[1:], data["year"], data["country_name"], data["X"]):
+        # Пропуск - пустая ячейка, числа - в том же виде, что у csv.writer
+        assert row == [str(year), name, "" if np.isnan(value) else str(value)]
+
+
+def test_csv_empty_section_has_header():
+    assert b"".join(exports.csv_chunks({"year": np.array([], dtype=int)}, 0)) == b"year\r\n"
+
+
+def test_filter_years():
+    data, rows = exports.filter_years(columns(), 25, 2010, 2012)
+    assert rows == 3 and data["year"].tolist() == [2010, 2011, 2012]
+    assert exports.filter_years({"name": ["a"]}, 1, 2010, 2012) == ({"name": ["a"]}, 1)
+
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = columns()
+    body = b"".join(exports.parquet_chunks(data, 25, chunk_rows=10))
+    table = pq.read_table(io.BytesIO(body))
+    assert table.num_rows == 25
+    assert table.column("country_name").to_pylist() == data["country_name"].tolist()
+    assert np.allclose(table.column("X").to_numpy(), data["X"], equal_nan=True)
+
+
+@pytest.fixture(scope="module")
+def client():
+    import app
+
+    return app.server.test_client()
+
+
+def test_download_etag_and_metrics(client):
+    with open("dashboard_data.json", encoding="utf-8") as f:
+        records = json.load(f)["trade_dynamics"]
+    key = ("/download/<section>.<fmt>",)
+    before = dict(metrics.response_bytes.samples.get(key, {"sum": 0.0, "count": 0}))
+
+    response = client.get("/download/trade_dynamics.csv?from=2010&to=2015")
+    body = response.data
+    assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == 'attachment; filename="trade_dynamics.csv"'
+    rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+    assert [int(row["year"]) for row in rows] == [r["year"] for r in records if 2010 <= r["year"] <= 2015]
+    # Размер потокового ответа считается по отданным порциям
+    after = metrics.response_bytes.samples[key]
+    assert after["sum"] - before["sum"] == len(body)
+    assert after["count"] - before["count"] == 1
+
+    etag = response.headers["ETag"]
+    cached = client.get("/download/trade_dynamics.csv?from=2010&to=2015", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b""
+    # Другие параметры - другой ETag
+    other = client.get("/download/trade_dynamics.csv?from=2011&to=2015", headers={"If-None-Match": etag})
+    assert other.status_code == 200 and other.headers["ETag"] != etag
+
+
+def test_download_unknown(client):
+    assert client.get("/download/nothing.csv").status_code == 404
+    assert client.get("/download/trade_dynamics.xlsx").status_code == 404
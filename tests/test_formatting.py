@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from formatting import UNITS, fmt_ru, fmt_ru_array
+
+VALUES = [0.0, -0.0, 1.0, -1.0, 0.99999, 0.00004, -0.00004, 0.5, -0.5, 12.345, -12.345,
+          1234.56, -98765.4321, 1e9, -1e12, 0.95, 0.05, float("nan"), 1.0, 0.5]
+
+
+@pytest.mark.parametrize("unit", sorted(UNITS))
+def test_array_matches_per_element(unit):
+    values = np.array(VALUES) * UNITS[unit]
+    # Прежнее форматирование - fmt_ru на каждое значение в млрд USD
+    expected = [fmt_ru(value / UNITS[unit]) for value in values.tolist()]
+    assert fmt_ru_array(values, unit) == expected
+
+
+def test_array_random_values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, 1000) * 10.0 ** rng.integers(-4, 6, 1000)
+    values[::37] = np.nan
+    assert fmt_ru_array(values) == [fmt_ru(value) for value in values.tolist()]
+
+
+def test_empty_and_all_missing():
+    assert fmt_ru_array([]) == []
+    assert fmt_ru_array([None, float("nan")]) == ["", ""]
+    assert fmt_ru(None) == ""
@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+from datamodel import table
+from partner_shards import write_shards
+from partners import PartnerIndex
+
+# Ряды стран-партнёров подключаются при импорте app.py, поэтому каждый
+# вариант каталога проверяется в отдельном процессе
+PROBE = """
+import json
+import app
+from benchmarks.visitor import find_component_props
+
+layout = json.loads(app.server.test_client().get("/_dash-layout").data)
+print(json.dumps({
+    "shards": app.partner_shards is not None,
+    "picker": find_component_props(layout, "bilateral-partner") is not None,
+    "title": find_component_props(layout, "bilateral-title")["children"],
+    "builtin": find_component_props(layout, "russia-trade-chart")["figure"]
+               == app.data_manager.current.figures.figure("russia-trade-chart"),
+}))
+"""
+
+
+def probe(shards):
+    env = dict(os.environ, DASH_RENDER_MODE="layout", DATA_RELOAD_INTERVAL="0", DASHBOARD_CUBE="",
+               DASHBOARD_PARTNER_SHARDS=shards)
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+BUILTIN = {"shards": False, "picker": False, "title": "Торговля с Россией (5 лет)", "builtin": True}
+
+
+def test_builtin_russia_series_without_shards(tmp_path):
+    # Каталога нет, каталог без index.json, индекс без стран
+    assert probe(str(tmp_path / "missing")) == BUILTIN
+    assert probe(str(tmp_path)) == BUILTIN
+    write_shards({}, str(tmp_path))
+    assert probe(str(tmp_path)) == BUILTIN
+
+
+def test_partner_picker_with_shards(tmp_path):
+    write_shards({"Россия": [{"year": 2023, "M": 1.0, "X": 2.0, "balance": 1.0}],
+                  "Швеция": [{"year": 2023, "M": 3.0, "X": 1.0, "balance": -2.0}]}, str(tmp_path))
+    result = probe(str(tmp_path))
+    assert result["shards"] and result["picker"]
+
+
+def test_partner_card_without_partners():
+    import app
+
+    partners = PartnerIndex(table([], "top_partner_countries"))
+    assert partners.default is None and partners.countries == []
+    card = app.build_partner_card(partners)
+    title, select = card.children[0], card.children[1]
+    assert title.children == "Ключевой партнёр — нет данных"
+    assert select.style == {"display": "none"} and select.options == []
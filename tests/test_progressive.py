@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from olap import TradeOlapCube
+
+# app.py настраивается переменными окружения при импорте, поэтому каждый
+# вариант запускается в отдельном процессе
+PROBE = """
+import json
+import app
+from benchmarks.visitor import find_component_props
+
+client = app.server.test_client()
+layout = json.loads(client.get("/_dash-layout").data)
+dependencies = json.loads(client.get("/_dash-dependencies").data)
+print(json.dumps({
+    "lazy": list(app.LAZY_GRAPHS),
+    "placeholders": [graph_id for graph_id in app.GRAPH_IDS
+                     if find_component_props(layout, graph_id)["figure"] == app.LAZY_PLACEHOLDER],
+    "lazy_inputs": [dep["inputs"][0]["id"] for dep in dependencies
+                    if dep["inputs"][0]["id"].endswith("-visible")],
+}))
+"""
+
+
+def probe(**env):
+    env = dict(os.environ, DASH_RENDER_MODE="progressive", DATA_RELOAD_INTERVAL="0",
+               **{"DASHBOARD_CUBE": "", "DASHBOARD_PARTNER_SHARDS": "", **env})
+    out = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_lazy_graphs_without_cube():
+    result = probe()
+    assert set(result["placeholders"]) == set(result["lazy"]) == {
+        "russia-trade-chart", "top-growth-export-chart", "top-growth-import-chart", "structure-changes-chart"}
+    assert sorted(result["lazy_inputs"]) == sorted(f"{graph_id}-visible" for graph_id in result["lazy"])
+
+
+def test_ranking_graphs_are_not_lazy_with_cube(tmp_path):
+    # Слайдеры рейтингов пересчитывают эти графики до прокрутки: ленивая загрузка
+    # фигуры по умолчанию затёрла бы выбранный рейтинг
+    rng = np.random.default_rng(0)
+    cube = TradeOlapCube(np.arange(2010, 2020), ["A", "B", "C"], ["x", "y", "z", "w"],
+                         rng.random((2, 10, 3, 4)) * 1e9)
+    path = str(tmp_path / "cube.npz")
+    cube.save(path)
+
+    result = probe(DASHBOARD_CUBE=path)
+    assert result["lazy"] == ["russia-trade-chart"]
+    assert result["placeholders"] == ["russia-trade-chart"]
+    assert result["lazy_inputs"] == ["russia-trade-chart-visible"]
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import plotly.io as pio
+import pytest
+
+from datamodel import TradeData
+from figures import FIGURE_BUILDERS, RANKING_BARS, FigureRegistry, refill_ranking
+from olap import TradeOlapCube
+
+
+@pytest.fixture(scope="module")
+def cube():
+    rng = np.random.default_rng(0)
+    # Отрицательные значения дают и рост, и снижение, и сальдо обоих знаков
+    return TradeOlapCube(np.arange(2000, 2024), [f"Страна {i}" for i in range(12)],
+                         [f"Товарная группа {i}" for i in range(15)],
+                         rng.normal(1.0, 1.0, (2, 24, 12, 15)) * 1e9)
+
+
+@pytest.fixture(scope="module")
+def registry():
+    with open("dashboard_data.json", encoding="utf-8") as f:
+        return FigureRegistry(TradeData(json.load(f)))
+
+
+def test_windows_default_to_data_preparation():
+    import app
+
+    windows = app.ranking_windows(10, 2000, 2023)
+    assert (windows["partner_first"], windows["growth_first"], windows["growth_n"]) == (2019, 2021, 5)
+    assert (windows["structure_first"], windows["middle"]) == (2014, 2019)
+    # Период короче окон: окна не выходят за его начало
+    windows = app.ranking_windows(3, 2022, 2023)
+    assert (windows["partner_first"], windows["structure_first"], windows["growth_first"]) == (2022, 2022, 2022)
+    assert windows["growth_n"] == 1
+
+
+@pytest.mark.parametrize("n, first, last", [(10, 2000, 2023), (3, 2010, 2015), (25, 2023, 2023)])
+def test_refill_matches_builders(cube, registry, n, first, last):
+    import app
+
+    sections = TradeData(app.ranking_sections(cube, n, first, last))
+    for graph_id in RANKING_BARS:
+        expected = FIGURE_BUILDERS[graph_id](sections)
+        expected.update_layout(title="Заголовок")
+        figure = refill_ranking(registry.figure(graph_id), graph_id, sections, "Заголовок")
+        if not isinstance(figure, dict):
+            figure = json.loads(pio.to_json(figure, validate=False))
+        assert figure == json.loads(pio.to_json(expected, validate=False)), graph_id
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from datamodel import table
+from trade_totals import TradeTotals
+
+
+@pytest.fixture(scope="module")
+def records():
+    rng = np.random.default_rng(0)
+    years = rng.permutation(np.arange(1990, 2024))
+    exports, imports = rng.random((2, len(years))) * 1e10
+    return [{"year": int(year), "X": float(x), "M": float(m), "balance": float(x - m)}
+            for year, x, m in zip(years, exports, imports)]
+
+
+def expected(records, start_year, end_year):
+    rows = sorted((r for r in records if start_year <= r["year"] <= end_year), key=lambda r: r["year"])
+    return {key: np.sum([r[key] for r in rows]) for key in ("X", "M", "balance")}, rows
+
+
+def test_totals_match_direct_sums(records):
+    totals = TradeTotals(table(records, "trade_dynamics"))
+    first, last = totals.first_year, totals.last_year
+    assert (first, last) == (1990, 2023)
+    ranges = [(first, last), (first, first), (last, last), (first, first + 1), (last - 1, last),
+              (2000, 2000), (2000, 2010), (first - 5, first + 2), (last - 2, last + 5)]
+    for start_year, end_year in ranges:
+        result = totals.totals(start_year, end_year)
+        sums, rows = expected(records, start_year, end_year)
+        for key, value in sums.items():
+            assert result[key] == pytest.approx(value, rel=1e-12), (start_year, end_year, key)
+        if len(rows) > 1:
+            cagr = (rows[-1]["X"] / rows[0]["X"]) ** (1 / (len(rows) - 1)) - 1
+            assert result["cagr"] == pytest.approx(cagr)
+        else:
+            assert result["cagr"] is None
+
+
+def test_window_indices(records):
+    totals = TradeTotals(table(records, "trade_dynamics"))
+    assert totals.window(1990, 2023) == (0, 34)
+    assert totals.window(2023, 2023) == (33, 34)
+    assert totals.window(2030, 2040) == (34, 34)
+    assert totals.totals(2030, 2040)["X"] == 0.0
@@ -0,0 +1,45 @@
+"""Итоги торговли за произвольный диапазон лет на префиксных суммах.
+
+Кумулятивные суммы экспорта, импорта и сальдо считаются один раз на версию
+данных, после чего сумма за любой диапазон - разность двух элементов, без
+фильтрации таблицы и повторной агрегации на каждое движение слайдера.
+"""
+import numpy as np
+
+
+class TradeTotals:
+    def __init__(self, table):
+        """table - раздел trade_dynamics из datamodel.TradeData."""
+        order = np.argsort(table["year"], kind="stable")
+        self.years = table["year"][order]
+        self.exports = table["X"][order]
+        # Ведущий ноль: сумма по [i, j) = cum[j] - cum[i]
+        self._cumulative = {
+            key: np.concatenate(([0.0], np.cumsum(table[key][order])))
+            for key in ("X", "M", "balance")
+        }
+
+    @property
+    def first_year(self):
+        return int(self.years[0])
+
+    @property
+    def last_year(self):
+        return int(self.years[-1])
+
+    def window(self, start_year, end_year):
+        """Индексы [start, stop) строк, попадающих в диапазон лет включительно."""
+        start = int(np.searchsorted(self.years, start_year, side="left"))
+        stop = int(np.searchsorted(self.years, end_year, side="right"))
+        return start, stop
+
+    def totals(self, start_year, end_year):
+        start, stop = self.window(start_year, end_year)
+        result = {key: float(cum[stop] - cum[start]) for key, cum in self._cumulative.items()}
+        # Среднегодовой темп роста экспорта между крайними годами окна
+        periods = stop - start - 1
+        if periods > 0 and self.exports[start] > 0:
+            result["cagr"] = float((self.exports[stop - 1] / self.exports[start]) ** (1 / periods) - 1)
+        else:
+            result["cagr"] = None
+        return result